@@ -4,8 +4,9 @@ import PaperCard from '@/components/PaperCard';
 import { notFound } from 'next/navigation';
 import Link from 'next/link';
 import type { Metadata } from 'next';
+import { cache } from 'react';
+import { getPaperBySlug, getPapersForDate } from '@/lib/database';
 import { generatePaperSlug } from '@/lib/slugUtils';
-import { getPapersForDate } from '@/lib/database';
 import ShareButtons from '@/components/ShareButtons';
 
 export const revalidate = 3600; // Revalidate every hour
@@ -32,16 +33,17 @@ function parseDateSlug(slug: string): { month: number; day: number } | null {
   return { month: monthIndex + 1, day };
 }
 
-// Find paper matching the slug
-function findPaperBySlug(papers: Paper[], targetSlug: string): Paper | null {
-  for (const paper of papers) {
-    const paperSlug = generatePaperSlug(paper);
-    if (paperSlug === targetSlug) {
-      return paper;
-    }
+// generateMetadata and the page share one lookup per request: the stored slug index first,
+// then the computed slug of papers without a stored one (not backfilled yet, or no migration 008)
+const findPaperBySlug = cache(async (monthDay: string, slug: string): Promise<Paper | null> => {
+  const paper = await getPaperBySlug(monthDay, slug);
+  if (paper) {
+    return paper;
   }
-  return null;
-}
+
+  const papers = await getPapersForDate(monthDay);
+  return papers.find(candidate => !candidate.slug && generatePaperSlug(candidate) === slug) ?? null;
+});
 
 export async function generateMetadata({ params }: PageProps): Promise<Metadata> {
   const { date, slug } = await params;
@@ -56,8 +58,7 @@ export async function generateMetadata({ params }: PageProps): Promise<Metadata>
   const monthDay = `${String(parsed.month).padStart(2, '0')}-${String(parsed.day).padStart(2, '0')}`;
 
   try {
-    const papers = await getPapersForDate(monthDay);
-    const paper = findPaperBySlug(papers, slug);
+    const paper = await findPaperBySlug(monthDay, slug);
 
     if (!paper) {
       return {
@@ -104,19 +105,16 @@ export default async function PaperPage({ params }: PageProps) {
   const monthDay = `${String(parsed.month).padStart(2, '0')}-${String(parsed.day).padStart(2, '0')}`;
   const formattedDate = formatDateForDisplay(monthDay);
 
-  // Fetch papers from database
-  let papers: Paper[];
+  // Fetch the paper from the database
+  let paper: Paper | null;
 
   try {
-    papers = await getPapersForDate(monthDay);
+    paper = await findPaperBySlug(monthDay, slug);
   } catch (error) {
-    console.error(`Error fetching papers for ${monthDay}`, error);
+    console.error(`Error fetching paper ${monthDay}/${slug}`, error);
     notFound();
   }
 
-  // Find the specific paper matching this slug
-  const paper = findPaperBySlug(papers, slug);
-
   if (!paper) {
     notFound();
   }
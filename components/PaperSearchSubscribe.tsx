@@ -2,6 +2,7 @@
 
 import { useState } from 'react';
 import { Paper } from '@/types/paper';
+import { searchStaticIndex } from '@/lib/searchIndex';
 
 export default function PaperSearchSubscribe() {
   const [searchQuery, setSearchQuery] = useState('');
@@ -24,6 +25,16 @@ export default function PaperSearchSubscribe() {
     setMessage(null);
 
     try {
+      // Static index first; the database route is only a fallback when it isn't published
+      const papers = await searchStaticIndex(searchQuery.trim());
+      if (papers) {
+        setSearchResults(papers);
+        if (papers.length === 0) {
+          setMessage({ type: 'error', text: 'No papers found. Try a different search term.' });
+        }
+        return;
+      }
+
       const response = await fetch(`/api/search-papers?q=${encodeURIComponent(searchQuery)}`);
       const data = await response.json();
 
@@ -0,0 +1,37 @@
+-- Migration: Per-day admission thresholds shared by all ingesters
+-- Run this migration: python scripts/run_migration.py database/migrations/003_day_admission_threshold.sql
+--
+-- Only the top 1000 papers per day survive the annual trim, so ingesters load
+-- this table and drop papers that could never make the cut before writing them.
+
+CREATE TABLE IF NOT EXISTS day_admission_threshold (
+    month_day VARCHAR(5) PRIMARY KEY,            -- Format: MM-DD
+    kth_citation_count INTEGER NOT NULL DEFAULT 0, -- Citation count of the day's 1000th paper (0 if fewer)
+    row_count INTEGER NOT NULL DEFAULT 0,        -- Papers currently stored for the day
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Seed from the current papers table
+INSERT INTO day_admission_threshold (month_day, kth_citation_count, row_count, updated_at)
+SELECT
+    publication_month_day,
+    COALESCE(MIN(citation_count) FILTER (WHERE rank = 1000), 0),
+    COUNT(*),
+    NOW()
+FROM (
+    SELECT
+        publication_month_day,
+        citation_count,
+        ROW_NUMBER() OVER (
+            PARTITION BY publication_month_day
+            ORDER BY citation_count DESC
+        ) AS rank
+    FROM papers
+) ranked
+GROUP BY publication_month_day
+ON CONFLICT (month_day) DO UPDATE SET
+    kth_citation_count = EXCLUDED.kth_citation_count,
+    row_count = EXCLUDED.row_count,
+    updated_at = NOW();
+
+COMMENT ON TABLE day_admission_threshold IS 'Per-day citation cutoff for the top-1000 retention policy, kept current by the ingesters';
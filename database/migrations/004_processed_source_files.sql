@@ -0,0 +1,16 @@
+-- Migration: Track which bulk source files have been ingested
+-- Run this migration: python scripts/run_migration.py database/migrations/004_processed_source_files.sql
+--
+-- File-based sources (PubMed baseline/update files) are applied once each;
+-- re-runs skip anything already recorded here and only process new deltas.
+
+CREATE TABLE IF NOT EXISTS processed_source_files (
+    source VARCHAR(50) NOT NULL,
+    file_name VARCHAR(255) NOT NULL,
+    records_seen INTEGER DEFAULT 0,
+    records_written INTEGER DEFAULT 0,
+    processed_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (source, file_name)
+);
+
+COMMENT ON TABLE processed_source_files IS 'Bulk source files already applied, so incremental runs only pick up new files';
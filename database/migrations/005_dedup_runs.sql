@@ -0,0 +1,20 @@
+-- Migration: Track deduplication runs
+-- Run this migration: python scripts/run_migration.py database/migrations/005_dedup_runs.sql
+--
+-- Incremental dedup runs only compare papers created after the last run's
+-- watermark against the index of everything older.
+
+CREATE TABLE IF NOT EXISTS dedup_runs (
+    id SERIAL PRIMARY KEY,
+    watermark TIMESTAMP NOT NULL,   -- MAX(created_at) of the papers covered by this run
+    papers_checked INTEGER DEFAULT 0,
+    merges_logged INTEGER DEFAULT 0,
+    reviews_logged INTEGER DEFAULT 0,
+    duration_seconds INTEGER,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Skip pairs that were already logged
+CREATE UNIQUE INDEX IF NOT EXISTS idx_dedup_pair ON deduplication_log(primary_paper_id, duplicate_paper_id);
+
+COMMENT ON TABLE dedup_runs IS 'Deduplication runs; the latest watermark bounds the next incremental run';
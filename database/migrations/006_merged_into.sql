@@ -0,0 +1,23 @@
+-- Migration: Point merged duplicates at their canonical paper
+-- Run this migration: python scripts/run_migration.py database/migrations/006_merged_into.sql
+--
+-- scripts/merge_duplicates.py writes the merged values onto the canonical row of each
+-- duplicate cluster and sets merged_into on the others. Readers only show canonical
+-- rows (merged_into IS NULL); duplicates stay so old paper_ids still resolve.
+
+ALTER TABLE papers ADD COLUMN IF NOT EXISTS merged_into VARCHAR(255);
+
+CREATE INDEX IF NOT EXISTS idx_merged_into ON papers(merged_into) WHERE merged_into IS NOT NULL;
+
+-- Per-day reads of canonical papers, most cited first
+CREATE INDEX IF NOT EXISTS idx_canonical_month_day_citations
+    ON papers(publication_month_day, citation_count DESC)
+    WHERE merged_into IS NULL;
+
+-- Log pairs still waiting for the merge stage
+ALTER TABLE deduplication_log ADD COLUMN IF NOT EXISTS merged_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_dedup_pending ON deduplication_log(id)
+    WHERE action = 'merged' AND merged_at IS NULL;
+
+COMMENT ON COLUMN papers.merged_into IS 'paper_id of the canonical record this duplicate was merged into (NULL = canonical)';
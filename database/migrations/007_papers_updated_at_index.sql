@@ -0,0 +1,7 @@
+-- Migration: Index papers.updated_at
+-- Run this migration: python scripts/run_migration.py database/migrations/007_papers_updated_at_index.sql
+--
+-- generate_json.py asks which month-days have rows updated since its last run;
+-- without this index that is a full table scan every time.
+
+CREATE INDEX IF NOT EXISTS idx_papers_updated_at ON papers(updated_at);
@@ -0,0 +1,18 @@
+-- Migration: Store each paper's URL slug
+-- Run this migration: python scripts/run_migration.py database/migrations/008_paper_slugs.sql
+--
+-- /<date>/<slug> pages used to load the whole day and run generatePaperSlug on every
+-- paper until one matched. The slug is now assigned once (ingestion_engine.assign_slugs
+-- on write, scripts/backfill_slugs.py for existing rows) and looked up through the
+-- unique index. Papers whose title/year slug is already taken on their day get -2, -3, ...
+-- After running this, run: python scripts/backfill_slugs.py
+
+ALTER TABLE papers ADD COLUMN IF NOT EXISTS slug TEXT;
+
+-- One paper per slug per day; rows still waiting for a slug (NULL) don't conflict
+CREATE UNIQUE INDEX IF NOT EXISTS idx_papers_month_day_slug ON papers(publication_month_day, slug);
+
+-- Rows the backfill still has to visit
+CREATE INDEX IF NOT EXISTS idx_papers_slug_pending ON papers(publication_month_day) WHERE slug IS NULL;
+
+COMMENT ON COLUMN papers.slug IS 'URL slug, unique per publication_month_day (lib/slugUtils.ts, with -N suffixes on collisions)';
@@ -0,0 +1,17 @@
+-- Migration: Flag papers whose day is a month-only placeholder
+-- Run this migration: python scripts/run_migration.py database/migrations/009_placeholder_dates.sql
+--
+-- Many sources record a month-only date as the 1st, so 02-01, 05-01 and 06-01 hold
+-- several times the papers of a normal day. scripts/flag_placeholder_dates.py sets
+-- date_placeholder on day-1 rows that look like this; generate_json.py and the annual
+-- trim keep only the top PLACEHOLDER_CONFIG['cap_per_day'] of them per day.
+-- After running this, run: python scripts/flag_placeholder_dates.py
+
+ALTER TABLE papers ADD COLUMN IF NOT EXISTS date_placeholder BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Per-day ranking of flagged papers for the cap
+CREATE INDEX IF NOT EXISTS idx_placeholder_month_day_citations
+    ON papers(publication_month_day, citation_count DESC)
+    WHERE date_placeholder AND merged_into IS NULL;
+
+COMMENT ON COLUMN papers.date_placeholder IS 'publication date is probably a month-only placeholder (day 1); set by scripts/flag_placeholder_dates.py';
@@ -0,0 +1,13 @@
+-- Migration: Keep the DOI of merged duplicates
+-- Run this migration: python scripts/run_migration.py database/migrations/010_merged_doi.sql
+--
+-- DOIs are unique (idx_unique_doi), so scripts/merge_duplicates.py clears doi on the
+-- duplicates of a cluster before the canonical row takes the winning one. The cleared
+-- value moves to merged_doi so a duplicate's own DOI (e.g. an arXiv DOI next to the
+-- publisher's) is still on record.
+
+ALTER TABLE papers ADD COLUMN IF NOT EXISTS merged_doi VARCHAR(255);
+
+CREATE INDEX IF NOT EXISTS idx_merged_doi ON papers(merged_doi) WHERE merged_doi IS NOT NULL;
+
+COMMENT ON COLUMN papers.merged_doi IS 'DOI this row had before it was merged into merged_into (doi itself is cleared)';
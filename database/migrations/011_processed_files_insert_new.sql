@@ -0,0 +1,10 @@
+-- Migration: Record whether a source file was applied with --insert-new
+-- Run this migration: python scripts/run_migration.py database/migrations/011_processed_files_insert_new.sql
+--
+-- scripts/ingest_pubmed.py without --insert-new only updates papers we already store,
+-- so a file it processed that way still has papers to insert. Such files are skipped
+-- by later update-only runs but picked up again by the next --insert-new run.
+
+ALTER TABLE processed_source_files ADD COLUMN IF NOT EXISTS insert_new BOOLEAN NOT NULL DEFAULT FALSE;
+
+COMMENT ON COLUMN processed_source_files.insert_new IS 'File was applied with --insert-new (not just matched against stored papers)';
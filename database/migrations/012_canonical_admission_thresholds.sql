@@ -0,0 +1,47 @@
+-- Migration: Re-seed admission thresholds from the rows the annual trim ranks
+-- Run this migration: python scripts/run_migration.py database/migrations/012_canonical_admission_thresholds.sql
+--
+-- The 003 seed counted every row. Merged duplicates (006) and placeholder dates beyond
+-- the per-day cap (009) don't compete for a day's top 1000, so counting them made the
+-- thresholds stricter than the trim. This recomputes them the way
+-- AdmissionThresholds.refresh (scripts/ingestion_engine.py) does now.
+-- 1000 = RETENTION_CONFIG['papers_per_day'], 100 = PLACEHOLDER_CONFIG['cap_per_day'].
+
+WITH retained AS (
+    SELECT publication_month_day, citation_count
+    FROM (
+        SELECT
+            publication_month_day,
+            citation_count,
+            date_placeholder,
+            ROW_NUMBER() OVER (
+                PARTITION BY publication_month_day, date_placeholder
+                ORDER BY citation_count DESC, paper_id
+            ) AS placeholder_rank
+        FROM papers
+        WHERE merged_into IS NULL
+    ) canonical
+    WHERE NOT date_placeholder OR placeholder_rank <= 100
+),
+ranked AS (
+    SELECT
+        publication_month_day,
+        citation_count,
+        ROW_NUMBER() OVER (
+            PARTITION BY publication_month_day
+            ORDER BY citation_count DESC
+        ) AS rank
+    FROM retained
+)
+INSERT INTO day_admission_threshold (month_day, kth_citation_count, row_count, updated_at)
+SELECT
+    publication_month_day,
+    COALESCE(MIN(citation_count) FILTER (WHERE rank = 1000), 0),
+    COUNT(*),
+    NOW()
+FROM ranked
+GROUP BY publication_month_day
+ON CONFLICT (month_day) DO UPDATE SET
+    kth_citation_count = EXCLUDED.kth_citation_count,
+    row_count = EXCLUDED.row_count,
+    updated_at = NOW();
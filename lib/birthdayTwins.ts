@@ -0,0 +1,53 @@
+import { BirthdayTwins } from '@/types/paper';
+
+// Exact-birthday lookups against the files written by generate_json.py
+// (twins/bitmap.json + twins/YYYY/MM-DD.json); no database queries.
+
+interface TwinBitmap {
+  year_min: number | null;
+  year_max: number | null;
+  days_per_year: number;
+  bits: string; // base64, LSB-first within each byte
+}
+
+let bitmapRequest: Promise<{ info: TwinBitmap; bytes: Uint8Array }> | null = null;
+
+function loadBitmap() {
+  if (!bitmapRequest) {
+    bitmapRequest = fetch('/data/twins/bitmap.json')
+      .then(response => response.json())
+      .then((info: TwinBitmap) => ({
+        info,
+        bytes: Uint8Array.from(atob(info.bits), c => c.charCodeAt(0)),
+      }));
+    bitmapRequest.catch(() => { bitmapRequest = null; });
+  }
+  return bitmapRequest;
+}
+
+// Position of MM-DD in the generator's 366-day order (Feb 29 included)
+function dayOfLeapYear(month: number, day: number): number {
+  const start = Date.UTC(2024, 0, 1);
+  return Math.round((Date.UTC(2024, month - 1, day) - start) / 86400000);
+}
+
+/**
+ * Papers published on an exact date (YYYY-MM-DD), or null if there are none.
+ * Dates without papers are answered from the bitmap without fetching anything else.
+ */
+export async function getBirthdayTwins(date: string): Promise<BirthdayTwins | null> {
+  const [year, month, day] = date.split('-').map(Number);
+  const { info, bytes } = await loadBitmap();
+  if (info.year_min === null || info.year_max === null || year < info.year_min || year > info.year_max) {
+    return null;
+  }
+
+  const bit = (year - info.year_min) * info.days_per_year + dayOfLeapYear(month, day);
+  if (!(bytes[bit >> 3] & (1 << (bit & 7)))) {
+    return null;
+  }
+
+  const mmdd = `${String(month).padStart(2, '0')}-${String(day).padStart(2, '0')}`;
+  const response = await fetch(`/data/twins/${year}/${mmdd}.json`);
+  return response.ok ? response.json() : null;
+}
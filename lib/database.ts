@@ -14,18 +14,51 @@ function getPool(): Pool {
   return pool;
 }
 
+let paperColumns: Promise<Set<string>> | null = null;
+
+/**
+ * Columns papers has, checked once per process, so pages work before the migrations
+ * that add merged_into (006) and slug (008) are applied
+ */
+function getPaperColumns(): Promise<Set<string>> {
+  if (!paperColumns) {
+    paperColumns = getPool()
+      .query(`SELECT column_name FROM information_schema.columns WHERE table_name = 'papers'`)
+      .then(result => new Set<string>(result.rows.map(row => row.column_name)))
+      .catch(error => {
+        paperColumns = null;
+        throw error;
+      });
+  }
+  return paperColumns;
+}
+
+async function hasSlugColumn(): Promise<boolean> {
+  return (await getPaperColumns()).has('slug');
+}
+
+/**
+ * Condition for canonical papers (merged duplicates are hidden), TRUE before migration 006
+ */
+async function canonicalFilter(): Promise<string> {
+  return (await getPaperColumns()).has('merged_into') ? 'merged_into IS NULL' : 'TRUE';
+}
+
 /**
  * Fetch papers for a specific MM-DD date
  */
 export async function getPapersForDate(monthDay: string): Promise<Paper[]> {
   const db = getPool();
+  const slug = (await hasSlugColumn()) ? ', slug' : '';
+  const canonical = await canonicalFilter();
 
   const result = await db.query(`
     SELECT
       paper_id, title, author_count, year, citation_count,
-      fields_of_study, subfield, venue, url
+      fields_of_study, subfield, venue, url${slug}
     FROM papers
     WHERE publication_month_day = $1
+      AND ${canonical}
       AND venue IS NOT NULL
       AND venue != 'Unknown Venue'
       AND TRIM(venue) != ''
@@ -41,16 +74,62 @@ export async function getPapersForDate(monthDay: string): Promise<Paper[]> {
     field: normalizeField(row.fields_of_study),
     subfield: row.subfield,
     venue: row.venue || 'Unknown Venue',
-    url: row.url || 'https://example.com'
+    url: row.url || 'https://example.com',
+    slug: row.slug || undefined
   }));
 }
 
+/**
+ * Fetch the paper at /[date]/[slug] with one lookup on the (publication_month_day, slug) index.
+ * Returns null when no stored slug matches, including before migration 008.
+ */
+export async function getPaperBySlug(monthDay: string, slug: string): Promise<Paper | null> {
+  const db = getPool();
+
+  if (!(await hasSlugColumn())) {
+    return null;
+  }
+  const canonical = await canonicalFilter();
+
+  const result = await db.query(`
+    SELECT
+      paper_id, title, author_count, year, citation_count,
+      fields_of_study, subfield, venue, url, publication_month_day, slug
+    FROM papers
+    WHERE publication_month_day = $1
+      AND slug = $2
+      AND ${canonical}
+      AND venue IS NOT NULL
+      AND venue != 'Unknown Venue'
+      AND TRIM(venue) != ''
+  `, [monthDay, slug]);
+
+  if (result.rows.length === 0) {
+    return null;
+  }
+
+  const row = result.rows[0];
+  return {
+    id: row.paper_id,
+    title: row.title,
+    author_count: row.author_count,
+    year: row.year,
+    citation_count: row.citation_count,
+    field: normalizeField(row.fields_of_study),
+    subfield: row.subfield,
+    venue: row.venue || 'Unknown Venue',
+    url: row.url || 'https://example.com',
+    publication_month_day: row.publication_month_day,
+    slug: row.slug
+  };
+}
+
 /**
  * Get total count of papers in database
  */
 export async function getTotalPaperCount(): Promise<number> {
   const db = getPool();
-  const result = await db.query('SELECT COUNT(*) as count FROM papers');
+  const result = await db.query(`SELECT COUNT(*) as count FROM papers WHERE ${await canonicalFilter()}`);
   return parseInt(result.rows[0].count);
 }
 
@@ -62,6 +141,7 @@ export async function getFieldDistribution(): Promise<Record<string, number>> {
   const result = await db.query(`
     SELECT field, COUNT(*) as count
     FROM papers
+    WHERE ${await canonicalFilter()}
     GROUP BY field
     ORDER BY count DESC
   `);
@@ -128,6 +208,7 @@ export async function searchPapers(query: string, limit: number = 20): Promise<P
       fields_of_study, subfield, venue, url, publication_month_day
     FROM papers
     WHERE title ILIKE $1
+      AND ${await canonicalFilter()}
       AND venue IS NOT NULL
       AND venue != 'Unknown Venue'
       AND TRIM(venue) != ''
@@ -0,0 +1,38 @@
+import { DailyPapers, Paper } from '@/types/paper';
+
+// Row-level patch between two versions of a date file (deltas/ in public/data,
+// listed under "deltas" in manifest.json). Mirrors apply_delta in scripts/generate_json.py.
+export interface DateDelta {
+  format: string;
+  date: string;
+  from: string; // Hashed file name the delta applies to
+  to: string; // Hashed file name it produces
+  total_papers: number;
+  last_updated?: string;
+  order: (number | [number, number])[]; // [old index, count] runs, or a count of rows from added
+  added: Paper[];
+  changed: Record<string, Partial<Paper>>;
+}
+
+export function applyDelta(old: DailyPapers, delta: DateDelta): DailyPapers {
+  const papers: Paper[] = [];
+  let next = 0;
+  for (const step of delta.order) {
+    if (Array.isArray(step)) {
+      papers.push(...old.papers.slice(step[0], step[0] + step[1]).map(paper => ({ ...paper })));
+    } else {
+      papers.push(...delta.added.slice(next, next + step));
+      next += step;
+    }
+  }
+  for (const paper of papers) {
+    Object.assign(paper, delta.changed[paper.id]);
+  }
+
+  return {
+    date: delta.date,
+    total_papers: delta.total_papers,
+    papers,
+    last_updated: delta.last_updated,
+  };
+}
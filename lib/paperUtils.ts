@@ -1,4 +1,4 @@
-import { Paper } from '@/types/paper';
+import { Paper, SamplingTable } from '@/types/paper';
 
 export function shuffleArray<T>(array: T[]): T[] {
   const shuffled = [...array];
@@ -10,8 +10,24 @@ export function shuffleArray<T>(array: T[]): T[] {
 }
 
 export function getRandomPaper(papers: Paper[]): Paper {
-  const shuffled = shuffleArray(papers);
-  return shuffled[0];
+  return papers[Math.floor(Math.random() * papers.length)];
+}
+
+// Weighted pick in O(1) from a date's sampling table. Returns a position in the
+// date's citation-sorted papers (page = floor(position / page_size)), or null if empty.
+export function sampleFromTable(table: SamplingTable, field?: string): number | null {
+  const entries = field ? table.fields?.[field] : table;
+  if (!entries || entries.prob.length === 0) {
+    return null;
+  }
+  const i = Math.floor(Math.random() * entries.prob.length);
+  const pick = Math.random() * table.prob_scale < entries.prob[i] ? i : entries.alias[i];
+  return entries.positions ? entries.positions[pick] : pick;
+}
+
+export function getWeightedRandomPaper(papers: Paper[], table: SamplingTable, field?: string): Paper | undefined {
+  const position = sampleFromTable(table, field);
+  return position === null ? undefined : papers[position];
 }
 
 // Future: filter by citation count, author count, year, etc.
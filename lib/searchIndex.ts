@@ -0,0 +1,149 @@
+import { Paper } from '@/types/paper';
+
+// Client for the static title index written by scripts/build_search_index.py.
+// Term lookups fetch one or two shards; no database queries.
+
+const BASE = '/data/search';
+
+interface SearchIndexInfo {
+  format: string;
+  build: string;
+  total_docs: number;
+  doc_shard_size: number;
+  max_prefix_len: number;
+  term_shards: string[];
+  trigram_shards: string[];
+  stopwords: string[];
+}
+
+// term -> [document frequency, [[doc id, bm25 score], ...]]
+type TermShard = Record<string, [number, [number, number][]]>;
+
+const shardCache = new Map<string, Promise<any>>();
+
+function fetchShard(path: string): Promise<any> {
+  if (!shardCache.has(path)) {
+    const request = fetch(`${BASE}/${path}`).then(response => {
+      if (!response.ok) {
+        throw new Error(`Search shard ${path}: ${response.status}`);
+      }
+      return response.json();
+    });
+    request.catch(() => shardCache.delete(path));
+    shardCache.set(path, request);
+  }
+  return shardCache.get(path)!;
+}
+
+// Must match tokenize() in scripts/build_search_index.py
+export function tokenize(text: string, stopwords: Set<string>): string[] {
+  const folded = text.normalize('NFKD').replace(/[\u0300-\u036f]/g, '').toLowerCase();
+  return (folded.match(/[a-z0-9]+/g) || []).filter(t => t.length > 1 && !stopwords.has(t));
+}
+
+function trigrams(term: string): string[] {
+  const grams = new Set<string>();
+  for (let i = 0; i + 3 <= term.length; i++) {
+    grams.add(term.slice(i, i + 3));
+  }
+  return Array.from(grams);
+}
+
+async function termPostings(index: SearchIndexInfo, term: string) {
+  for (let length = Math.min(term.length, index.max_prefix_len); length > 0; length--) {
+    if (index.term_shards.includes(term.slice(0, length))) {
+      const shard: TermShard = await fetchShard(`${index.build}/terms/${term.slice(0, length)}.json`);
+      return shard[term];
+    }
+  }
+  return undefined;
+}
+
+async function prefixTerms(index: SearchIndexInfo, prefix: string): Promise<TermShard> {
+  const keys = index.term_shards.filter(key => key.startsWith(prefix) || prefix.startsWith(key));
+  const shards: TermShard[] = await Promise.all(keys.map(key => fetchShard(`${index.build}/terms/${key}.json`)));
+  const found: TermShard = {};
+  for (const shard of shards) {
+    for (const [term, entry] of Object.entries(shard)) {
+      if (term.startsWith(prefix)) {
+        found[term] = entry;
+      }
+    }
+  }
+  return found;
+}
+
+async function similarTerms(index: SearchIndexInfo, term: string, limit = 3): Promise<string[]> {
+  const grams = trigrams(term);
+  const shared = new Map<string, number>();
+  await Promise.all(grams.map(async gram => {
+    if (!index.trigram_shards.includes(gram.slice(0, 2))) {
+      return;
+    }
+    const shard: Record<string, string[]> = await fetchShard(`${index.build}/trigrams/${gram.slice(0, 2)}.json`);
+    for (const candidate of shard[gram] || []) {
+      shared.set(candidate, (shared.get(candidate) || 0) + 1);
+    }
+  }));
+  return Array.from(shared.entries())
+    .filter(([, count]) => count * 2 >= grams.length)
+    .sort((a, b) => b[1] - a[1])
+    .slice(0, limit)
+    .map(([candidate]) => candidate);
+}
+
+/**
+ * BM25 title search over the static index. The last word is matched as a prefix and
+ * unknown words fall back to trigram matches. Returns null if the index isn't published.
+ */
+export async function searchStaticIndex(query: string, limit: number = 20, prefixExpansions: number = 20): Promise<Paper[] | null> {
+  let index: SearchIndexInfo;
+  try {
+    index = await fetchShard('index.json');
+  } catch {
+    return null;
+  }
+
+  const tokens = tokenize(query, new Set(index.stopwords));
+  const scores = new Map<number, number>();
+
+  for (let i = 0; i < tokens.length; i++) {
+    const token = tokens[i];
+    let expansions: TermShard = {};
+    if (i === tokens.length - 1 && !query.endsWith(' ')) {
+      expansions = await prefixTerms(index, token);
+    } else {
+      const entry = await termPostings(index, token);
+      if (entry) {
+        expansions[token] = entry;
+      }
+    }
+    if (Object.keys(expansions).length === 0 && token.length >= 3) {
+      for (const similar of await similarTerms(index, token)) {
+        const entry = await termPostings(index, similar);
+        if (entry) {
+          expansions[similar] = entry;
+        }
+      }
+    }
+
+    const best = new Map<number, number>();
+    const top = Object.values(expansions).sort((a, b) => b[0] - a[0]).slice(0, prefixExpansions);
+    for (const [, postings] of top) {
+      for (const [doc, score] of postings) {
+        best.set(doc, Math.max(best.get(doc) || 0, score));
+      }
+    }
+    best.forEach((score, doc) => scores.set(doc, (scores.get(doc) || 0) + score));
+  }
+
+  const ranked = Array.from(scores.entries())
+    .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+    .slice(0, limit);
+
+  const size = index.doc_shard_size;
+  return Promise.all(ranked.map(async ([doc]) => {
+    const shard: Paper[] = await fetchShard(`${index.build}/docs/${Math.floor(doc / size)}.json`);
+    return shard[doc % size];
+  }));
+}
@@ -21,8 +21,15 @@ export function slugify(text: string): string {
  * Generate a unique slug for a paper
  * Format: first-few-words-of-title-YEAR
  * Example: "causal-inference-statistics-2016"
+ * Papers read from the database carry their stored slug, which may have a -2, -3, ...
+ * suffix when another paper on the same date has the same title words and year
+ * (scripts/ingestion_engine.py assign_slugs, which mirrors this function).
  */
 export function generatePaperSlug(paper: Paper, maxWords: number = 5): string {
+  if (paper.slug) {
+    return paper.slug;
+  }
+
   // Take first few words of title
   const words = paper.title.split(' ').slice(0, maxWords);
   const titleSlug = slugify(words.join(' '));
@@ -3,7 +3,8 @@
 Annual Paper Ingestion - Run once per year
 Logic:
 1. Ingest papers published since last ingestion with citations > 10
-2. Keep only top 1000 papers per day (by citation count)
+2. Keep only top 1000 papers per day (by citation count), with papers on
+   month-only placeholder dates capped separately
 3. VACUUM database to reclaim space
 """
 
@@ -15,26 +16,14 @@ import time
 from datetime import datetime
 from dotenv import load_dotenv
 
-load_dotenv()
-
-def normalize_field(fields):
-    """Simple field normalization"""
-    if not fields:
-        return 'Other'
-
-    field_map = {
-        'Computer Science': ['Computer Science'],
-        'Economics': ['Economics', 'Business'],
-        'Physics': ['Physics'],
-        'Biology': ['Biology', 'Medicine'],
-        'Mathematics': ['Mathematics'],
-        'Psychology': ['Psychology'],
-    }
+from config import PLACEHOLDER_CONFIG, RETENTION_CONFIG
+from flag_placeholder_dates import flag_placeholder_dates
+from ingestion_engine import (
+    AdmissionThresholds, BatchWriter, FieldNormalizer, load_field_mappings,
+    record_from_api, refresh_all_thresholds, table_columns
+)
 
-    for canonical, variants in field_map.items():
-        if any(f in fields for f in variants):
-            return canonical
-    return fields[0] if fields else 'Other'
+load_dotenv()
 
 def get_database_connection():
     """Connect to PostgreSQL database"""
@@ -97,8 +86,8 @@ def ingest_new_papers(cursor, last_ingestion_date):
 
     print(f"   Will ingest years {start_year} to {end_year}")
 
-    total_inserted = 0
-    total_updated = 0
+    normalizer = FieldNormalizer(load_field_mappings(cursor.connection))
+    writer = BatchWriter(cursor.connection, admission=AdmissionThresholds.load(cursor.connection))
 
     # For each month-day, fetch papers from new years
     for idx, month_day in enumerate(month_days, 1):
@@ -136,12 +125,8 @@ def ingest_new_papers(cursor, last_ingestion_date):
                             break
 
                         for paper in papers:
-                            if not paper.get('paperId') or not paper.get('title'):
-                                continue
-
                             # Validate actual publication date
-                            actual_pub_date = paper.get('publicationDate')
-                            if not actual_pub_date or actual_pub_date != date_str:
+                            if paper.get('publicationDate') != date_str:
                                 continue
 
                             # CRITICAL: Only keep papers with MORE than 10 citations
@@ -149,68 +134,18 @@ def ingest_new_papers(cursor, last_ingestion_date):
                             if citation_count <= 10:
                                 continue
 
-                            # Extract month-day
-                            try:
-                                parts = actual_pub_date.split('-')
-                                if len(parts) >= 3:
-                                    actual_month_day = f"{parts[1]}-{parts[2]}"
-                                    actual_year = int(parts[0])
-                                else:
-                                    continue
-                            except:
+                            record = record_from_api(paper, normalizer)
+                            if record is None:
                                 continue
 
-                            fields = paper.get('fieldsOfStudy', [])
-
-                            # Extract author names
-                            authors_list = paper.get('authors', [])
-                            author_names = [author.get('name') for author in authors_list if author.get('name')]
-
-                            try:
-                                cursor.execute("""
-                                    INSERT INTO papers (
-                                        paper_id, source, title, authors, author_count,
-                                        publication_date, publication_month_day, year,
-                                        venue, field, fields_of_study, citation_count,
-                                        doi, url, pdf_url, is_open_access
-                                    ) VALUES (
-                                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                                    )
-                                    ON CONFLICT (paper_id) DO UPDATE SET
-                                        authors = EXCLUDED.authors,
-                                        citation_count = EXCLUDED.citation_count,
-                                        updated_at = NOW()
-                                    RETURNING (xmax = 0) AS inserted
-                                """, (
-                                    paper['paperId'],
-                                    'semantic_scholar',
-                                    paper.get('title'),
-                                    author_names,  # Store author names array
-                                    len(authors_list),
-                                    actual_pub_date,
-                                    actual_month_day,
-                                    actual_year,
-                                    paper.get('venue'),
-                                    normalize_field(fields),
-                                    fields,
-                                    citation_count,
-                                    paper.get('externalIds', {}).get('DOI'),
-                                    f"https://www.semanticscholar.org/paper/{paper['paperId']}",
-                                    paper.get('openAccessPdf', {}).get('url') if isinstance(paper.get('openAccessPdf'), dict) else None,
-                                    bool(paper.get('openAccessPdf'))
-                                ))
-
-                                # Check if it was an insert or update
-                                was_inserted = cursor.fetchone()[0]
-                                if was_inserted:
-                                    total_inserted += 1
-                                else:
-                                    total_updated += 1
-                                year_papers += 1
-
-                            except Exception as e:
-                                print(f"\n      Error inserting paper: {e}")
-                                continue
+                            writer.add(record)
+                            year_papers += 1
+
+                        # One batched upsert per page
+                        try:
+                            writer.flush()
+                        except Exception as e:
+                            print(f"\n      Error inserting papers: {e}")
 
                         # If we got less than limit, no need to paginate
                         if len(papers) < limit:
@@ -246,14 +181,19 @@ def ingest_new_papers(cursor, last_ingestion_date):
                 continue
 
         # Commit after each month-day
-        cursor.connection.commit()
+        writer.flush()
+
+    # Refresh the admission thresholds of the days written to
+    writer.close()
 
     print(f"\n✅ Ingestion complete!")
-    print(f"   Inserted: {total_inserted:,} new papers")
-    print(f"   Updated: {total_updated:,} existing papers")
-    print(f"   Total processed: {total_inserted + total_updated:,}")
+    print(f"   Inserted: {writer.inserted:,} new papers")
+    print(f"   Updated: {writer.updated:,} existing papers")
+    print(f"   Total processed: {writer.written:,}")
+    print(f"   Skipped below admission threshold: {writer.rejected:,}")
+    print(f"   Failed to write: {writer.failed:,}")
 
-    return total_inserted + total_updated
+    return writer.written
 
 def get_database_stats(cursor):
     """Get current database statistics"""
@@ -287,28 +227,48 @@ def trim_to_top_1000_per_day(cursor):
     """
     Keep only top 1000 papers per day (by citation count)
     Delete the rest
-    """
-    print("\n🔪 Trimming to top 1000 papers per day...")
 
-    cursor.execute("""
-        DELETE FROM papers
-        WHERE paper_id IN (
-            SELECT paper_id
-            FROM (
-                SELECT
-                    paper_id,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY publication_month_day
-                        ORDER BY citation_count DESC
-                    ) as rank
-                FROM papers
-            ) ranked
-            WHERE rank > 1000
-        )
-    """)
-
-    deleted_count = cursor.rowcount
-    print(f"✅ Deleted {deleted_count:,} papers (keeping top 1000 per day)")
+    Papers flagged as month-only placeholder dates are capped first, so the
+    first of each month keeps room for the papers really published on it.
+    Only canonical papers are ranked; merged duplicates go with their canonical
+    paper. Steps whose migration (006_merged_into, 009_placeholder_dates) isn't
+    applied yet are skipped.
+    """
+    papers_per_day = RETENTION_CONFIG['papers_per_day']
+    placeholder_cap = PLACEHOLDER_CONFIG['cap_per_day']
+    columns = table_columns(cursor)
+    canonical = "merged_into IS NULL" if 'merged_into' in columns else "TRUE"
+    with_duplicates = "OR merged_into IN (SELECT paper_id FROM trimmed)" if 'merged_into' in columns else ""
+    print(f"\n🔪 Trimming to top {papers_per_day} papers per day...")
+
+    def trim(where, keep):
+        cursor.execute(f"""
+            WITH trimmed AS (
+                SELECT paper_id
+                FROM (
+                    SELECT
+                        paper_id,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY publication_month_day
+                            ORDER BY citation_count DESC, paper_id
+                        ) as rank
+                    FROM papers
+                    WHERE {where}
+                ) ranked
+                WHERE rank > %s
+            )
+            DELETE FROM papers
+            WHERE paper_id IN (SELECT paper_id FROM trimmed) {with_duplicates}
+        """, (keep,))
+        return cursor.rowcount
+
+    placeholder_count = 0
+    if 'date_placeholder' in columns:
+        placeholder_count = trim(f"{canonical} AND date_placeholder", placeholder_cap)
+        print(f"   Deleted {placeholder_count:,} placeholder-date papers (keeping top {placeholder_cap} per day)")
+
+    deleted_count = placeholder_count + trim(canonical, papers_per_day)
+    print(f"✅ Deleted {deleted_count:,} papers (keeping top {papers_per_day} per day)")
 
     return deleted_count
 
@@ -363,10 +323,18 @@ def main():
         new_papers_count = ingest_new_papers(cursor, last_ingestion)
         conn.commit()
 
-        # Step 4: Trim to top 1000 per day
+        # Step 4: Flag month-only placeholder dates, then trim to top 1000 per day
+        if {'merged_into', 'date_placeholder'} <= table_columns(cursor):
+            flagged, cleared, _ = flag_placeholder_dates(conn)
+            print(f"\n📅 Flagged {flagged:,} placeholder dates (cleared {cleared:,})")
+        else:
+            print("\n⚠️  Skipping placeholder dates: migrations 006 and 009 not applied")
         deleted_count = trim_to_top_1000_per_day(cursor)
         conn.commit()
 
+        # Re-seed the per-day admission thresholds from the trimmed table
+        refresh_all_thresholds(conn)
+
         # Step 5: VACUUM to reclaim space
         vacuum_database(conn)
 
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Paper Birthdays - Slug Backfill
+Fills papers.slug (database/migrations/008_paper_slugs.sql) for rows that don't have one.
+
+Slugs are computed like lib/slugUtils.generatePaperSlug. Within a day the paper the
+page used to resolve each slug to (the most cited one with a page) keeps the plain
+slug, and later ones get -2, -3, ... so existing links keep pointing at the same paper.
+Each day is filled in batches of --batch-size rows, one transaction per batch, so the
+script can be stopped and rerun at any point. Ingesters assign slugs on write, so this
+only has to run once after the migration (and is a no-op after that).
+
+Usage:
+    python scripts/backfill_slugs.py                   # Every day with missing slugs
+    python scripts/backfill_slugs.py --date 06-01
+    python scripts/backfill_slugs.py --batch-size 20000
+"""
+
+import os
+import sys
+import time
+import argparse
+import psycopg2
+from dotenv import load_dotenv
+
+from ingestion_engine import assign_slugs
+
+load_dotenv()
+
+
+def pending_days(db_connection):
+    """Month-days with rows still waiting for a slug"""
+    cursor = db_connection.cursor()
+    cursor.execute("""
+        SELECT publication_month_day, COUNT(*)
+        FROM papers
+        WHERE slug IS NULL
+        GROUP BY publication_month_day
+        ORDER BY publication_month_day
+    """)
+    days = cursor.fetchall()
+    cursor.close()
+    return days
+
+
+def backfill_day(db_connection, month_day: str, batch_size: int) -> int:
+    """Assign slugs to one day's rows, batch by batch. Returns how many were filled."""
+    filled = 0
+    while True:
+        cursor = db_connection.cursor()
+        try:
+            count = assign_slugs(cursor, [month_day], limit=batch_size)
+            db_connection.commit()
+        except Exception:
+            db_connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        filled += count
+        if count < batch_size:
+            return filled
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Backfill papers.slug')
+    parser.add_argument('--date', help='Only this MM-DD')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Rows per transaction')
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("ERROR: DATABASE_URL not set")
+        sys.exit(1)
+
+    try:
+        db = psycopg2.connect(database_url)
+        print("✓ Connected to database")
+    except Exception as e:
+        print(f"✗ Database connection failed: {e}")
+        sys.exit(1)
+
+    start_time = time.time()
+    days = pending_days(db)
+    if args.date:
+        days = [(month_day, count) for month_day, count in days if month_day == args.date]
+    print(f"\n🔗 {sum(count for _, count in days):,} papers without a slug across {len(days)} days\n")
+
+    total = 0
+    for month_day, count in days:
+        filled = backfill_day(db, month_day, args.batch_size)
+        total += filled
+        print(f"  {month_day}: {filled:,} slugs")
+
+    remaining = sum(count for month_day, count in pending_days(db)
+                    if not args.date or month_day == args.date)
+    print(f"\n✓ {total:,} slugs assigned in {time.time() - start_time:.1f}s")
+    if remaining:
+        print(f"⚠️  {remaining:,} rows still without a slug (written concurrently?) - run again")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
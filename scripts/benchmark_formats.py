@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Paper Birthdays - Date File Format Benchmark
+Compares JSON against MessagePack (and CBOR, if cbor2 is installed) on the generated
+per-date payloads: encode time, decode time, raw size and gzip size, for all 366 dates.
+
+Reads public/data/MM-DD.json as produced by generate_json.py, so no database is needed.
+
+Usage:
+    python scripts/benchmark_formats.py                # All dates, 5 repetitions each
+    python scripts/benchmark_formats.py --repeat 20
+    python scripts/benchmark_formats.py --dir public/data-a
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+from typing import Callable, Dict, List, Tuple
+
+from generate_json import ALL_MONTH_DAYS
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+
+# ============================================
+# Formats
+# ============================================
+
+def available_formats() -> Dict[str, Tuple[Callable, Callable]]:
+    """name -> (encode to bytes, decode from bytes)"""
+    formats = {
+        'json': (
+            lambda data: json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+            json.loads,
+        ),
+    }
+    if msgpack is not None:
+        formats['msgpack'] = (
+            lambda data: msgpack.packb(data, use_bin_type=True),
+            lambda payload: msgpack.unpackb(payload, raw=False),
+        )
+    if cbor2 is not None:
+        formats['cbor'] = (cbor2.dumps, cbor2.loads)
+    return formats
+
+
+def best_time(fn: Callable, arg, repeat: int) -> float:
+    """Fastest of `repeat` runs, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# ============================================
+# Benchmark
+# ============================================
+
+def benchmark(data_dir: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    formats = available_formats()
+    totals = {name: {'encode': 0.0, 'decode': 0.0, 'size': 0, 'gzip': 0} for name in formats}
+    slowest: List[Tuple[float, str]] = []
+    dates = 0
+
+    for month_day in ALL_MONTH_DAYS:
+        path = os.path.join(data_dir, f"{month_day}.json")
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        dates += 1
+
+        for name, (encode, decode) in formats.items():
+            payload = encode(data)
+            assert decode(payload) == data, f"{name} round-trip mismatch on {month_day}"
+            totals[name]['encode'] += best_time(encode, data, repeat)
+            decode_time = best_time(decode, payload, repeat)
+            totals[name]['decode'] += decode_time
+            totals[name]['size'] += len(payload)
+            totals[name]['gzip'] += len(gzip.compress(payload, compresslevel=9, mtime=0))
+            if name == 'json':
+                slowest.append((decode_time, month_day))
+
+        if dates % 50 == 0:
+            print(f"   Benchmarked {dates} dates...", end='\r')
+
+    totals['_dates'] = dates
+    totals['_slowest'] = sorted(slowest, reverse=True)[:5]
+    return totals
+
+
+def print_report(totals: Dict):
+    dates = totals.pop('_dates')
+    slowest = totals.pop('_slowest')
+    baseline = totals['json']
+
+    print(f"\n📊 {dates} date files (best of N runs per file, summed)\n")
+    print(f"  {'format':<10}{'encode ms':>11}{'decode ms':>11}{'size MB':>10}{'gzip MB':>10}{'decode vs json':>16}")
+    for name, t in totals.items():
+        speedup = baseline['decode'] / t['decode'] if t['decode'] else 0
+        print(f"  {name:<10}{t['encode'] * 1000:>11.1f}{t['decode'] * 1000:>11.1f}"
+              f"{t['size'] / 1e6:>10.2f}{t['gzip'] / 1e6:>10.2f}{speedup:>15.2f}x")
+
+    print("\n  Slowest JSON decodes:")
+    for seconds, month_day in slowest:
+        print(f"    {month_day}: {seconds * 1000:.1f} ms")
+
+
+# ============================================
+# Main
+# ============================================
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark JSON vs binary encodings of the date files')
+    parser.add_argument('--dir', default=os.path.join(os.getcwd(), 'public', 'data'),
+                        help='Directory holding the generated MM-DD.json files')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per file and format (fastest counts)')
+    args = parser.parse_args()
+
+    if msgpack is None:
+        print("ERROR: msgpack not installed. Run: pip install msgpack")
+        sys.exit(1)
+    if cbor2 is None:
+        print("⚠️  cbor2 not installed, skipping CBOR. Run: pip install cbor2")
+
+    if not os.path.isdir(args.dir):
+        print(f"ERROR: {args.dir} not found. Run generate_json.py first")
+        sys.exit(1)
+
+    print(f"⏱️  Benchmarking date files in {args.dir}...")
+    print_report(benchmark(args.dir, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
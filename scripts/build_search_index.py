@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Paper Birthdays - Static Search Index
+Builds a BM25 inverted index over paper titles from the generated date files and
+writes it as small static shards under public/data/search/, so title search needs
+one or two shard fetches and no database queries (lib/searchIndex.ts reads it).
+
+Layout:
+    search/index.json                   Parameters, shard keys, document count, build id
+    search/<build>/terms/<key>.json     term -> [df, [[doc, bm25], ...]] for terms starting
+                                        with <key>. Keys are 1-6 character prefixes, split
+                                        further wherever a shard would exceed
+                                        SHARD_TARGET_BYTES. A term lives in the longest key
+                                        that prefixes it.
+    search/<build>/trigrams/<ab>.json   trigram -> terms containing it (typo / substring fallback)
+    search/<build>/docs/<n>.json        Papers by doc id (doc ids follow citations, descending)
+
+Each build's shards go in their own directory (named by a hash of the indexed papers)
+and are complete before index.json is swapped to point at them, so a reader never mixes
+shards from two builds. The previous build is kept until the next one, like the hashed
+date files in manifest.json, for clients still holding the old index.json.
+
+Runs as part of generate_json.py (OUTPUT_CONFIG['search_index']) or standalone.
+
+Usage:
+    python scripts/build_search_index.py                    # Rebuild from public/data
+    python scripts/build_search_index.py --query "graphene"  # Query the built index
+"""
+
+import os
+import re
+import shutil
+import hashlib
+import sys
+import json
+import math
+import argparse
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+SEARCH_FORMAT = 'paper-birthdays-search/2'
+
+# Build directories under search/
+BUILD_NAME_RE = re.compile(r'^[0-9a-f]{12}$')
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Shard sizing
+SHARD_TARGET_BYTES = 64 * 1024
+MAX_PREFIX_LEN = 6
+DOC_SHARD_SIZE = 200
+
+# Postings kept per term (best scores; df still counts every match)
+MAX_POSTINGS = 200
+
+# Terms kept per trigram (most frequent first)
+MAX_TRIGRAM_TERMS = 50
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'into', 'is',
+    'its', 'of', 'on', 'or', 'the', 'their', 'this', 'that', 'to', 'via', 'with',
+}
+
+# Same filter searchPapers applies in lib/database.ts
+EXCLUDED_VENUES = {None, '', 'Unknown Venue'}
+
+DOC_FIELDS = ['id', 'title', 'author_count', 'year', 'citation_count', 'field', 'subfield', 'venue', 'url']
+
+DATE_FILE_RE = re.compile(r'^(\d{2}-\d{2})\.json$')
+
+
+# ============================================
+# Tokenizing
+# ============================================
+
+def tokenize(text: str) -> List[str]:
+    """Accent-folded lowercase [a-z0-9] runs, minus stopwords and single characters"""
+    folded = ''.join(c for c in unicodedata.normalize('NFKD', text or '') if not unicodedata.combining(c))
+    return [t for t in re.findall(r'[a-z0-9]+', folded.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def trigrams(term: str) -> List[str]:
+    return sorted({term[i:i + 3] for i in range(len(term) - 2)})
+
+
+def shard_key(term: str, keys: List[str]) -> Optional[str]:
+    """Longest shard key that prefixes the term"""
+    for length in range(min(len(term), MAX_PREFIX_LEN), 0, -1):
+        if term[:length] in keys:
+            return term[:length]
+    return None
+
+
+# ============================================
+# Building
+# ============================================
+
+def load_documents(data_dir: str) -> List[Dict]:
+    """Every searchable paper in the date files, in doc id order (most cited first)"""
+    docs = []
+    for name in sorted(os.listdir(data_dir)):
+        match = DATE_FILE_RE.match(name)
+        if not match:
+            continue
+        with open(os.path.join(data_dir, name), encoding='utf-8') as f:
+            data = json.load(f)
+        for paper in data['papers']:
+            if paper.get('venue') in EXCLUDED_VENUES or not paper.get('venue', '').strip():
+                continue
+            doc = {key: paper.get(key) for key in DOC_FIELDS}
+            doc['publication_month_day'] = match.group(1)
+            docs.append(doc)
+
+    docs.sort(key=lambda doc: (-(doc['citation_count'] or 0), doc['id']))
+    return docs
+
+
+def build_postings(docs: List[Dict]) -> Tuple[Dict[str, list], float]:
+    """term -> [df, [[doc, score], ...]] with BM25 scores, plus the average title length"""
+    term_docs: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+    lengths = []
+    for doc_id, doc in enumerate(docs):
+        tokens = tokenize(doc['title'])
+        lengths.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            term_docs[term].append((doc_id, tf))
+
+    total = len(docs)
+    avgdl = sum(lengths) / total if total else 0.0
+    postings = {}
+    for term, matches in term_docs.items():
+        df = len(matches)
+        idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+        scored = []
+        for doc_id, tf in matches:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / avgdl)
+            scored.append([doc_id, round(idf * tf * (BM25_K1 + 1) / (tf + norm), 3)])
+        scored.sort(key=lambda posting: (-posting[1], posting[0]))
+        postings[term] = [df, scored[:MAX_POSTINGS]]
+    return postings, avgdl
+
+
+def estimated_size(postings: Dict[str, list], terms: List[str]) -> int:
+    return sum(len(term) + 12 + 14 * len(postings[term][1]) for term in terms)
+
+
+def split_shards(postings: Dict[str, list], terms: List[str], prefix: str = '') -> Dict[str, List[str]]:
+    """Prefix -> terms, splitting any prefix whose shard would be too large"""
+    if prefix and (len(prefix) >= MAX_PREFIX_LEN or estimated_size(postings, terms) <= SHARD_TARGET_BYTES):
+        return {prefix: terms}
+
+    shards: Dict[str, List[str]] = {}
+    children: Dict[str, List[str]] = defaultdict(list)
+    for term in terms:
+        if len(term) == len(prefix):
+            shards.setdefault(prefix, []).append(term)
+        else:
+            children[term[len(prefix)]].append(term)
+    for char, child_terms in sorted(children.items()):
+        shards.update(split_shards(postings, child_terms, prefix + char))
+    return shards
+
+
+def build_trigram_shards(postings: Dict[str, list]) -> Dict[str, Dict[str, List[str]]]:
+    """First two characters -> trigram -> most frequent terms containing it"""
+    by_trigram: Dict[str, List[str]] = defaultdict(list)
+    for term in postings:
+        for gram in trigrams(term):
+            by_trigram[gram].append(term)
+
+    shards: Dict[str, Dict[str, List[str]]] = defaultdict(dict)
+    for gram, terms in sorted(by_trigram.items()):
+        terms.sort(key=lambda term: (-postings[term][0], term))
+        shards[gram[:2]][gram] = terms[:MAX_TRIGRAM_TERMS]
+    return shards
+
+
+def write_shards(directory: str, shards: Dict[str, object], write_json: Callable):
+    """Write <key>.json for every shard and drop shards from earlier builds"""
+    os.makedirs(directory, exist_ok=True)
+    names = {f"{key}.json" for key in shards}
+    for key, data in shards.items():
+        write_json(os.path.join(directory, f"{key}.json"), data)
+    for name in os.listdir(directory):
+        if name.split('.json')[0] + '.json' not in names:
+            os.remove(os.path.join(directory, name))
+
+
+def prune_builds(search_dir: str, keep: set):
+    """Delete build directories other than those in keep"""
+    for name in os.listdir(search_dir):
+        path = os.path.join(search_dir, name)
+        if BUILD_NAME_RE.match(name) and name not in keep and os.path.isdir(path):
+            shutil.rmtree(path)
+
+
+def build_search_index(data_dir: str, write_json: Callable) -> Dict:
+    """
+    Rebuild public/data/search/ from the date files in data_dir: write the new build's
+    shards, swap index.json over to them, then drop builds older than the previous one.
+    Returns index.json.
+    """
+    docs = load_documents(data_dir)
+    postings, avgdl = build_postings(docs)
+    term_shards = split_shards(postings, sorted(postings))
+    trigram_shards = build_trigram_shards(postings)
+    doc_shards = {
+        str(i // DOC_SHARD_SIZE): docs[i:i + DOC_SHARD_SIZE] for i in range(0, len(docs), DOC_SHARD_SIZE)
+    }
+
+    search_dir = os.path.join(data_dir, 'search')
+    index_path = os.path.join(search_dir, 'index.json')
+    previous = None
+    if os.path.exists(index_path):
+        with open(index_path, encoding='utf-8') as f:
+            previous = json.load(f).get('build')
+
+    fingerprint = json.dumps([SEARCH_FORMAT, MAX_PREFIX_LEN, DOC_SHARD_SIZE, docs], sort_keys=True)
+    build = hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:12]
+    build_dir = os.path.join(search_dir, build)
+    write_shards(os.path.join(build_dir, 'terms'),
+                 {key: {term: postings[term] for term in terms} for key, terms in term_shards.items()}, write_json)
+    write_shards(os.path.join(build_dir, 'trigrams'), trigram_shards, write_json)
+    write_shards(os.path.join(build_dir, 'docs'), doc_shards, write_json)
+
+    index = {
+        'format': SEARCH_FORMAT,
+        'build': build,
+        'total_docs': len(docs),
+        'total_terms': len(postings),
+        'avgdl': round(avgdl, 3),
+        'k1': BM25_K1,
+        'b': BM25_B,
+        'max_prefix_len': MAX_PREFIX_LEN,
+        'doc_shard_size': DOC_SHARD_SIZE,
+        'term_shards': sorted(term_shards),
+        'trigram_shards': sorted(trigram_shards),
+        'stopwords': sorted(STOPWORDS),
+    }
+    write_json(index_path, index)
+
+    prune_builds(search_dir, {build, previous})
+    # Unversioned shards from before build directories are kept for one build, like any other
+    if previous is not None:
+        for name in ('terms', 'trigrams', 'docs'):
+            if os.path.isdir(os.path.join(search_dir, name)):
+                shutil.rmtree(os.path.join(search_dir, name))
+    return index
+
+
+# ============================================
+# Querying (reference for lib/searchIndex.ts)
+# ============================================
+
+class StaticIndexReader:
+    """Reads shards from disk the way the client fetches them, counting fetches"""
+
+    def __init__(self, data_dir: str):
+        self.search_dir = os.path.join(data_dir, 'search')
+        self.cache: Dict[str, object] = {}
+        self.index = self.load('index.json')
+
+    def shard(self, relative: str):
+        """A shard of the build index.json points at"""
+        return self.load(f"{self.index['build']}/{relative}")
+
+    def load(self, relative: str):
+        if relative not in self.cache:
+            with open(os.path.join(self.search_dir, relative), encoding='utf-8') as f:
+                self.cache[relative] = json.load(f)
+        return self.cache[relative]
+
+    def term_postings(self, term: str) -> Optional[list]:
+        key = shard_key(term, self.index['term_shards'])
+        return self.shard(f"terms/{key}.json").get(term) if key else None
+
+    def prefix_terms(self, prefix: str) -> Dict[str, list]:
+        """Terms starting with prefix, from the shard holding it or the shards split below it"""
+        keys = [key for key in self.index['term_shards'] if key.startswith(prefix) or prefix.startswith(key)]
+        found = {}
+        for key in keys:
+            for term, entry in self.shard(f"terms/{key}.json").items():
+                if term.startswith(prefix):
+                    found[term] = entry
+        return found
+
+    def similar_terms(self, term: str, limit: int = 3) -> List[str]:
+        """Terms sharing at least half of the term's trigrams"""
+        grams = trigrams(term)
+        shared: Counter = Counter()
+        for gram in grams:
+            if gram[:2] in self.index['trigram_shards']:
+                shared.update(self.shard(f"trigrams/{gram[:2]}.json").get(gram, []))
+        return [t for t, count in shared.most_common(limit) if count * 2 >= len(grams)]
+
+
+def search(data_dir: str, query: str, limit: int = 20, prefix_expansions: int = 20) -> List[Dict]:
+    """BM25 OR-query; the last word is a prefix, unknown words fall back to trigram matches"""
+    reader = StaticIndexReader(data_dir)
+    tokens = tokenize(query)
+    scores: Dict[int, float] = defaultdict(float)
+
+    for i, token in enumerate(tokens):
+        if i == len(tokens) - 1 and not query.endswith(' '):
+            expansions = reader.prefix_terms(token)
+        else:
+            entry = reader.term_postings(token)
+            expansions = {token: entry} if entry else {}
+        if not expansions and len(token) >= 3:
+            expansions = {t: reader.term_postings(t) for t in reader.similar_terms(token)}
+
+        best: Dict[int, float] = {}
+        top = sorted(expansions.items(), key=lambda item: -item[1][0])[:prefix_expansions]
+        for _, (_, postings) in top:
+            for doc_id, score in postings:
+                best[doc_id] = max(best.get(doc_id, 0.0), score)
+        for doc_id, score in best.items():
+            scores[doc_id] += score
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    shard_size = reader.index['doc_shard_size']
+    return [reader.shard(f"docs/{doc_id // shard_size}.json")[doc_id % shard_size] for doc_id, _ in ranked]
+
+
+# ============================================
+# Main
+# ============================================
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Build or query the static title search index')
+    parser.add_argument('--dir', default=os.path.join(os.getcwd(), 'public', 'data'),
+                        help='Directory holding the generated MM-DD.json files')
+    parser.add_argument('--query', help='Search the built index instead of building it')
+    parser.add_argument('--minify', action='store_true', help='Write shards without whitespace')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        print(f"ERROR: {args.dir} not found. Run generate_json.py first")
+        sys.exit(1)
+
+    if args.query:
+        for paper in search(args.dir, args.query):
+            print(f"  {paper['citation_count']:>7,}  {paper['publication_month_day']}  {paper['title']}")
+        return
+
+    from generate_json import atomic_write
+
+    def write_json(path, data):
+        separators = (',', ':') if args.minify else None
+        text = json.dumps(data, ensure_ascii=False, separators=separators, indent=None if args.minify else 2)
+        atomic_write(path, text.encode('utf-8'))
+
+    print(f"🔎 Building search index from {args.dir}...")
+    index = build_search_index(args.dir, write_json)
+    print(f"✓ Indexed {index['total_docs']:,} papers, {index['total_terms']:,} terms")
+    print(f"  {len(index['term_shards'])} term shards, {len(index['trigram_shards'])} trigram shards, "
+          f"{math.ceil(index['total_docs'] / DOC_SHARD_SIZE)} doc shards")
+
+
+if __name__ == "__main__":
+    main()
@@ -30,7 +30,7 @@ FIELD_PRIORITY = {
     'fields_of_study': 'openalex',             # Most detailed classification
     'venue': 'crossref',                        # Most authoritative venue names
     'doi': 'crossref',                          # DOI registry
-    'is_open_access': 'openalex',              # Tracks OA status best
+    'is_open_access': 'openalex',              # Tracks OA status best (merges OR it across sources)
     'publication_date': 'crossref',            # Most precise dates
 }
 
@@ -94,10 +94,16 @@ ARXIV_CONFIG = {
         'cs.AI', 'cs.LG', 'physics', 'math', 'q-bio',
         'econ', 'stat', 'astro-ph', 'cond-mat', 'hep-th'
     ],
+    # --insert-new only inserts papers with at least this many citations. arXiv has no
+    # citation counts, so uncited arXiv-only papers are held back until another source
+    # stores them with citations (0 inserts them anyway)
+    'min_citations_to_insert': 1,
 }
 
 OPENALEX_CONFIG = {
     'api_base': 'https://api.openalex.org',
+    'snapshot_base': 'https://openalex.s3.amazonaws.com',  # Public S3 bucket (no auth)
+    'snapshot_manifest': 'data/works/manifest',
     'rate_limit': None,  # Polite pool: no hard limit
     'email': 'your-email@example.com',  # Get into polite pool
     'fields': [
@@ -107,6 +113,17 @@ OPENALEX_CONFIG = {
     ],
 }
 
+PUBMED_CONFIG = {
+    'baseline_base': 'https://ftp.ncbi.nlm.nih.gov/pubmed/baseline',
+    'updates_base': 'https://ftp.ncbi.nlm.nih.gov/pubmed/updatefiles',
+    'file_pattern': r'pubmed\d+n\d{4}\.xml\.gz',
+    'article_url': 'https://pubmed.ncbi.nlm.nih.gov',
+    # --insert-new only inserts papers with at least this many citations. PubMed has no
+    # citation counts, so PubMed-only papers are held back until another source stores
+    # them with citations (0 inserts them anyway), as with ARXIV_CONFIG
+    'min_citations_to_insert': 1,
+}
+
 # ============================================
 # Deduplication Settings
 # ============================================
@@ -125,6 +142,10 @@ DEDUPLICATION_CONFIG = {
     'auto_merge_threshold': 0.95,   # >95% confidence: auto-merge
     'manual_review_threshold': 0.75, # 75-95%: flag for review
     'ignore_threshold': 0.75,        # <75%: ignore as false positive
+
+    # Incremental runs re-check papers created this long before the last watermark, so
+    # rows whose transaction committed after that run read the table aren't skipped
+    'watermark_overlap_hours': 24,
 }
 
 # ============================================
@@ -167,6 +188,98 @@ QUALITY_CONFIG = {
     'required_fields': ['title', 'year', 'publication_date'],
 }
 
+# ============================================
+# Retention Settings
+# ============================================
+
+RETENTION_CONFIG = {
+    # Annual trim keeps only the top N papers per day (by citation count)
+    'papers_per_day': 1000,
+
+    # Ingesters refresh the admission thresholds of the days they wrote to every this
+    # many batches (and when they finish), so a long run tightens as days fill up
+    'threshold_refresh_batches': 50,
+}
+
+# ============================================
+# Placeholder Date Settings
+# ============================================
+
+# Sources that store month-only (or year-only) dates as the 1st pile them onto
+# MM-01; scripts/flag_placeholder_dates.py marks those rows date_placeholder
+PLACEHOLDER_CONFIG = {
+    # A venue (or source) month is skewed when its day-1 count is this many times
+    # the average count of the month's other days
+    'day1_ratio': 4.0,
+
+    # Day-1 papers a venue needs in a month before its own counts are trusted;
+    # smaller venues are judged by their source's counts for that month
+    'min_papers': 3,
+
+    # Sources whose dates are always exact (arXiv submission timestamps)
+    'exact_sources': ['arxiv'],
+
+    # Flagged papers kept per day, most cited first, in the date files and the annual trim
+    'cap_per_day': 100,
+}
+
+# ============================================
+# Static Output Settings
+# ============================================
+
+OUTPUT_CONFIG = {
+    # Write public/data JSON without indentation/whitespace
+    'minify': False,
+
+    # Also write maximum-compression .gz and .br siblings of each file
+    'precompress': False,
+
+    # Fail generation when a served JSON file is larger than this (KB, uncompressed)
+    'size_budget_kb': None,
+
+    # Incremental runs also regenerate dates with rows updated this long before the last
+    # watermark, so rows whose transaction committed after that run's scan aren't missed
+    'watermark_overlap_hours': 24,
+
+    # Optional outputs below are off by default: each one adds files per date (or per
+    # year and date) to public/data. Turn on only what the deployed frontend reads; the
+    # static search (lib/searchIndex.ts) is the one it uses today, enabled by
+    # weekly_update.sh with --search-index.
+
+    # Per-date MM-DD/ directory with summary.json, index.json and page-NNN.json files
+    'paged': False,
+    'page_size': 100,           # Papers per page file (sorted by citations)
+    'summary_top_n': 10,        # Most-cited papers included in summary.json
+    'summary_sample_size': 20,  # Pre-drawn random papers included in summary.json
+    'facets': False,            # MM-DD/facets.json: filter histograms with page offsets
+
+    # fields/<field>/MM-DD.json slices plus fields/index.json for the field pages
+    'field_slices': False,
+
+    # columnar/MM-DD.json in the dictionary-encoded format (docs/COLUMNAR_FORMAT.md)
+    'columnar': False,
+
+    # MM-DD.msgpack next to each MM-DD.json: same payload, MessagePack-encoded (msgpack package)
+    'msgpack': False,
+
+    # twins/YYYY/MM-DD.json per full publication date plus twins/bitmap.json of which exist
+    'birthday_twins': False,
+    'twins_top_n': 10,          # Most-cited papers per full-date file
+
+    # deltas/MM-DD.<from>.<to>.json row-level patches from the previous version of each date
+    'deltas': False,
+    'delta_max_ratio': 0.5,     # Skip the delta when it's over this fraction of the full file
+
+    # search/ sharded BM25 title index for the static search (scripts/build_search_index.py)
+    'search_index': False,
+
+    # sampling/MM-DD.json alias tables for O(1) weighted random paper picks
+    'sampling_tables': False,
+    'sampling_per_field': False,        # Also one table per field within each date
+    'sampling_citation_exponent': 0.5,  # weight = (citations + 1) ** exponent (0 = uniform)...
+    'sampling_age_half_life': None,     # ...* 0.5 ** (age in years / half-life); None = ignore age
+}
+
 # ============================================
 # Helper Functions
 # ============================================
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Enrich bulk-ingested papers from Semantic Scholar auxiliary datasets
+Streams the `abstracts` dataset shards and fills in abstract / pdf_url / is_open_access
+for the papers we keep. Only matching rows are parsed and written.
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import psycopg2
+import requests
+from typing import Dict, List, Optional, Set, Tuple
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+from config import SEMANTIC_SCHOLAR_CONFIG
+
+load_dotenv()
+
+# Matching corpusid on the raw bytes lets us skip json.loads for the
+# ~99.9% of lines that aren't ours
+CORPUSID_RE = re.compile(rb'"corpusid"\s*:\s*(\d+)')
+
+BATCH_SIZE = 1000
+
+
+def load_target_ids(db_connection) -> Set[int]:
+    """Corpus IDs of stored Semantic Scholar papers still missing an abstract or PDF link"""
+    cursor = db_connection.cursor()
+    cursor.execute("""
+        SELECT paper_id
+        FROM papers
+        WHERE source = 'semantic_scholar'
+          AND (abstract IS NULL OR pdf_url IS NULL)
+    """)
+    # Bulk rows are keyed by numeric corpusid; API rows use 40-char hashes and are skipped
+    ids = {int(row[0]) for row in cursor.fetchall() if row[0].isdigit()}
+    cursor.close()
+    return ids
+
+
+def fetch_dataset_urls(dataset: str, release: str = 'latest') -> List[str]:
+    """Get signed shard URLs for a dataset release"""
+    api_key = os.getenv('SEMANTIC_SCHOLAR_API_KEY')
+    if not api_key:
+        print("ERROR: SEMANTIC_SCHOLAR_API_KEY not set")
+        sys.exit(1)
+
+    url = f"{SEMANTIC_SCHOLAR_CONFIG['bulk_dataset_base']}/{release}/dataset/{dataset}"
+    response = requests.get(url, headers={'x-api-key': api_key}, timeout=60)
+    response.raise_for_status()
+    return response.json().get('files', [])
+
+
+def parse_abstract_record(record: Dict) -> Optional[Tuple[str, Optional[str], Optional[str], bool]]:
+    """Turn an `abstracts` record into (paper_id, abstract, pdf_url, is_open_access)"""
+    abstract = record.get('abstract')
+    open_access = record.get('openaccessinfo') or {}
+    pdf_url = open_access.get('url')
+    status = (open_access.get('status') or '').upper()
+    is_open_access = bool(pdf_url) or status in ('GOLD', 'GREEN', 'HYBRID', 'BRONZE')
+
+    if not abstract and not pdf_url:
+        return None
+    return str(record['corpusid']), abstract, pdf_url, is_open_access
+
+
+def apply_updates(db_connection, rows: List[Tuple]) -> int:
+    """Write one batch of enrichment rows, never overwriting existing values"""
+    if not rows:
+        return 0
+
+    cursor = db_connection.cursor()
+    execute_values(cursor, """
+        UPDATE papers AS p SET
+            abstract = COALESCE(p.abstract, v.abstract),
+            pdf_url = COALESCE(p.pdf_url, v.pdf_url),
+            is_open_access = p.is_open_access OR v.is_open_access,
+            updated_at = NOW()
+        FROM (VALUES %s) AS v(paper_id, abstract, pdf_url, is_open_access)
+        WHERE p.paper_id = v.paper_id
+    """, rows, template="(%s, %s, %s, %s::boolean)", page_size=BATCH_SIZE)
+    updated = cursor.rowcount
+    db_connection.commit()
+    cursor.close()
+    return updated
+
+
+def process_shard(url: str, target_ids: Set[int], db_connection, file_num: int, total_files: int) -> int:
+    """Stream one gzip shard, keeping only records whose corpusid we store"""
+    print(f"\n[{file_num}/{total_files}] Streaming shard...")
+
+    max_retries = 3
+    for attempt in range(max_retries):
+        scanned = 0
+        matched = 0
+        updated = 0
+        batch = []
+        shard_ids = []
+
+        try:
+            response = requests.get(url, stream=True, timeout=60)
+            response.raise_for_status()
+
+            for line in gzip.open(response.raw, 'rb'):
+                scanned += 1
+
+                match = CORPUSID_RE.search(line)
+                if not match:
+                    continue
+                corpus_id = int(match.group(1))
+                if corpus_id not in target_ids:
+                    continue
+
+                try:
+                    row = parse_abstract_record(json.loads(line))
+                except (json.JSONDecodeError, KeyError):
+                    continue
+                if row is None:
+                    continue
+
+                matched += 1
+                shard_ids.append(corpus_id)
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    updated += apply_updates(db_connection, batch)
+                    batch = []
+                    print(f"  Scanned: {scanned:,} | Matched: {matched:,} | Updated: {updated:,}", end='\r')
+
+            updated += apply_updates(db_connection, batch)
+
+            # Papers enriched here don't need to be matched again in later shards
+            target_ids.difference_update(shard_ids)
+            print(f"\n  ✓ Shard complete - Scanned: {scanned:,} | Matched: {matched:,} | Updated: {updated:,}")
+            return updated
+
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, EOFError, OSError) as e:
+            db_connection.rollback()
+            if attempt < max_retries - 1:
+                wait_time = (attempt + 1) * 30
+                print(f"\n  ⚠️  Stream interrupted ({e}). Retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})")
+                time.sleep(wait_time)
+            else:
+                print(f"\n  ❌ Failed after {max_retries} attempts: {e}")
+
+    return 0
+
+
+def main():
+    """Main entry point"""
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("ERROR: DATABASE_URL not set")
+        sys.exit(1)
+
+    try:
+        db = psycopg2.connect(database_url)
+        print("✓ Connected to database")
+    except Exception as e:
+        print(f"✗ Database connection failed: {e}")
+        sys.exit(1)
+
+    release = sys.argv[1] if len(sys.argv) > 1 else 'latest'
+    file_num = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    target_ids = load_target_ids(db)
+    print(f"✓ Loaded {len(target_ids):,} papers missing an abstract or PDF link")
+    if not target_ids:
+        print("Nothing to enrich")
+        return
+
+    urls = fetch_dataset_urls('abstracts', release)
+    max_files = int(sys.argv[3]) if len(sys.argv) > 3 else len(urls)
+
+    print(f"\n🚀 Streaming {len(urls)} abstracts shards (release: {release})")
+    print("=" * 70)
+
+    total_updated = 0
+    for i in range(file_num - 1, min(file_num - 1 + max_files, len(urls))):
+        total_updated += process_shard(urls[i], target_ids, db, i + 1, len(urls))
+
+    db.close()
+
+    print("\n" + "=" * 70)
+    print(f"✓ COMPLETE! Papers enriched: {total_updated:,}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Paper Birthdays - Placeholder Date Detection
+Sets papers.date_placeholder (database/migrations/009_placeholder_dates.sql) on day-1
+papers whose date is probably a month-only date stored as the 1st.
+
+The stored dates don't say how precise the source was, so precision is inferred from
+the counts: for each venue and (year, month), a day-1 count far above the average of
+the month's other days (PLACEHOLDER_CONFIG['day1_ratio']) means the venue records
+months, not days, and its day-1 papers are flagged. A venue with papers on other days
+of that month evidently has real days and is left alone. Venues too small to judge
+(and papers without a venue) follow their source's counts for the same year and month.
+January 1st catches year-only dates the same way.
+
+Flag changes bump updated_at, so the next generate_json.py run rewrites the dates.
+
+Usage:
+    python scripts/flag_placeholder_dates.py            # Detect and store flags
+    python scripts/flag_placeholder_dates.py --dry-run  # Report only
+"""
+
+import os
+import sys
+import time
+import argparse
+import psycopg2
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+from config import PLACEHOLDER_CONFIG
+from generate_json import DAYS_IN_MONTH
+from ingestion_engine import table_columns
+
+load_dotenv()
+
+
+# ============================================
+# Detection
+# ============================================
+
+def is_skewed(day1: int, other: int, month: str) -> bool:
+    """Does a month's day-1 count stand far above the average of its other days?"""
+    other_days = DAYS_IN_MONTH[int(month) - 1] - 1
+    return (day1 >= PLACEHOLDER_CONFIG['min_papers']
+            and day1 > PLACEHOLDER_CONFIG['day1_ratio'] * other / other_days)
+
+
+def detect_placeholders(rows: Iterable[Tuple[str, str, Optional[str], int, str]]) -> Set[str]:
+    """
+    paper_ids of likely placeholder dates among (paper_id, source, venue, year, month_day)
+    rows. Counts are taken over every row; only day-1 rows can be flagged.
+    """
+    exact_sources = set(PLACEHOLDER_CONFIG['exact_sources'])
+    # key -> [day-1 count, other days count]
+    by_venue: Dict[Tuple, List[int]] = defaultdict(lambda: [0, 0])
+    by_source: Dict[Tuple, List[int]] = defaultdict(lambda: [0, 0])
+    day1_rows = []
+
+    for paper_id, source, venue, year, month_day in rows:
+        if source in exact_sources:
+            continue
+        month, day = month_day.split('-')
+        venue = venue if venue and venue.strip() and venue != 'Unknown Venue' else None
+        slot = 0 if day == '01' else 1
+        by_source[(source, year, month)][slot] += 1
+        if venue:
+            by_venue[(source, venue, year, month)][slot] += 1
+        if slot == 0:
+            day1_rows.append((paper_id, source, venue, year, month))
+
+    flagged = set()
+    for paper_id, source, venue, year, month in day1_rows:
+        day1, other = by_venue[(source, venue, year, month)] if venue else (0, 0)
+        if day1 >= PLACEHOLDER_CONFIG['min_papers']:
+            skewed = is_skewed(day1, other, month)
+        elif other:
+            skewed = False
+        else:
+            skewed = is_skewed(*by_source[(source, year, month)], month)
+        if skewed:
+            flagged.add(paper_id)
+    return flagged
+
+
+# ============================================
+# Database
+# ============================================
+
+def load_rows(db_connection) -> Tuple[List[Tuple], Set[str], Counter]:
+    """Canonical rows for detection, the currently flagged paper_ids and papers per day"""
+    cursor = db_connection.cursor(name='flag_placeholder_dates')
+    cursor.itersize = 10000
+    cursor.execute("""
+        SELECT paper_id, source, venue, year, publication_month_day, date_placeholder
+        FROM papers
+        WHERE merged_into IS NULL
+    """)
+    rows, current, per_day = [], set(), Counter()
+    for paper_id, source, venue, year, month_day, placeholder in cursor:
+        rows.append((paper_id, source, venue, year, month_day))
+        per_day[month_day] += 1
+        if placeholder:
+            current.add(paper_id)
+    cursor.close()
+    return rows, current, per_day
+
+
+def store_flags(db_connection, flag: Set[str], clear: Set[str]) -> None:
+    """Set/clear date_placeholder and bump updated_at on the rows that change"""
+    cursor = db_connection.cursor()
+    try:
+        execute_values(cursor, """
+            UPDATE papers p
+            SET date_placeholder = v.placeholder, updated_at = NOW()
+            FROM (VALUES %s) AS v(paper_id, placeholder)
+            WHERE p.paper_id = v.paper_id
+        """, [(paper_id, True) for paper_id in flag] + [(paper_id, False) for paper_id in clear],
+            page_size=5000)
+        db_connection.commit()
+    except Exception:
+        db_connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def flag_placeholder_dates(db_connection, dry_run: bool = False) -> Tuple[int, int, Dict[str, Tuple[int, int]]]:
+    """
+    Detect placeholder dates and store the flags.
+
+    Returns:
+        (newly flagged, cleared, {month_day: (papers, flagged papers)})
+    """
+    rows, current, per_day = load_rows(db_connection)
+    flagged = detect_placeholders(rows)
+    flag, clear = flagged - current, current - flagged
+    if not dry_run and (flag or clear):
+        store_flags(db_connection, flag, clear)
+
+    flagged_per_day = Counter(month_day for paper_id, _, _, _, month_day in rows if paper_id in flagged)
+    return len(flag), len(clear), {md: (count, flagged_per_day[md]) for md, count in per_day.items()}
+
+
+# ============================================
+# Main
+# ============================================
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Flag papers whose date is a month-only placeholder')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would be flagged without writing')
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("ERROR: DATABASE_URL not set")
+        sys.exit(1)
+
+    try:
+        db = psycopg2.connect(database_url)
+        print("✓ Connected to database")
+    except Exception as e:
+        print(f"✗ Database connection failed: {e}")
+        sys.exit(1)
+
+    cursor = db.cursor()
+    missing = {'merged_into', 'date_placeholder'} - table_columns(cursor)
+    cursor.close()
+    if missing:
+        print(f"⚠️  papers has no {', '.join(sorted(missing))} column - run migrations 006 and 009 first. Skipping.")
+        db.close()
+        return
+
+    start_time = time.time()
+    print("\n📅 Detecting placeholder dates...")
+    flag, clear, days = flag_placeholder_dates(db, args.dry_run)
+
+    cap = PLACEHOLDER_CONFIG['cap_per_day']
+    print(f"\n  Largest days (papers -> after capping flagged papers at {cap}):")
+    largest = sorted(days.items(), key=lambda item: item[1][0], reverse=True)[:8]
+    for month_day, (count, flagged) in largest:
+        print(f"    {month_day}: {count:,} -> {count - flagged + min(flagged, cap):,} ({flagged:,} flagged)")
+
+    sizes = sorted(count for count, _ in days.values())
+    if sizes:
+        print(f"  Median day: {sizes[len(sizes) // 2]:,} papers")
+
+    verb = 'Would flag' if args.dry_run else 'Flagged'
+    print(f"\n✓ {verb} {flag:,} papers, cleared {clear:,} in {time.time() - start_time:.1f}s")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
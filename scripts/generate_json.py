@@ -2,193 +2,1368 @@
 """
 Paper Birthdays - JSON Generation Script
 Queries database and generates static JSON files for each day of the year
+
+Day-1 papers flagged as month-only placeholder dates (scripts/flag_placeholder_dates.py)
+are capped at PLACEHOLDER_CONFIG['cap_per_day'] per date, most cited first, so the
+first of each month is about as large as any other date.
+
+data/generation_state/ (outside the served public/ tree) records each date file's
+content hash and the newest papers.updated_at seen, so later runs only regenerate dates
+whose rows changed and leave every other file byte-identical. A single-date run
+(generate_json.py MM-DD) without a saved state writes only MM-DD.json, no hashed copy,
+since there's no manifest to point at it or clean it up.
+
+Every file is written to a temp file and renamed into place, so readers never see a
+half-written file. Date files and metadata.json also get immutable content-hash-named
+copies (MM-DD.<hash>.json), and public/data/manifest.json maps each date to its
+current copy so clients and CDNs can cache those forever. With --flip a full
+regeneration is built into the inactive one of public/data-a and public/data-b and
+published by atomically repointing the public/data symlink. The buffer starts with the
+live manifest and the hashed copies it references, so clients holding the live
+manifest can still fetch its files after the flip.
+
+Deltas (OUTPUT_CONFIG['deltas']) patch a client's copy of a date from the previous
+version to the new one: deltas/MM-DD.<from hash>.<to hash>.json, keyed by paper id and
+listed under "deltas" in manifest.json. apply_delta is the reference applier.
+
+With --minify the files are written without whitespace, and --compress adds
+maximum-compression .gz and .br siblings (brotli package) for the CDN to serve.
+--msgpack also writes each date's payload as MM-DD.msgpack (msgpack package), which
+is cheaper to decode than JSON; scripts/benchmark_formats.py compares the two.
+
+Paged output (OUTPUT_CONFIG['paged']) also writes, per date, MM-DD/summary.json
+(count, top papers, field counts, a pre-drawn random sample) and fixed-size
+MM-DD/page-NNN.json files described by MM-DD/index.json, so first paint only
+needs the few-KB summary. MM-DD/facets.json (OUTPUT_CONFIG['facets']) holds decade,
+citation, field and author-count histograms, each bucket with the pages its papers
+are on, so the filter UI renders and narrows without scanning the whole day.
+
+Field slices (OUTPUT_CONFIG['field_slices']) split each date by field into
+fields/<field-slug>/MM-DD.json, with fields/index.json listing every field's
+slug and per-date counts, so field views only load the papers they show.
+
+Columnar output (OUTPUT_CONFIG['columnar']) writes columnar/MM-DD.json in the
+dictionary-encoded format described in docs/COLUMNAR_FORMAT.md.
+
+Birthday twins (OUTPUT_CONFIG['birthday_twins']) write twins/YYYY/MM-DD.json for every
+full publication date (count and most-cited papers) and twins/bitmap.json, one bit per
+(year, MM-DD), so an exact birthday is one small fetch, or none when its bit is clear.
+
+The search index (OUTPUT_CONFIG['search_index']) is rebuilt into search/ from the
+date files whenever any of them changed; see scripts/build_search_index.py.
+
+Sampling tables (OUTPUT_CONFIG['sampling_tables']) write sampling/MM-DD.json: a
+Walker alias table over the date's papers, weighted by citations and age, so a
+weighted random paper is drawn in O(1) from a few KB instead of the whole day.
 """
 
 import os
+import re
 import sys
+import random
+import shutil
+import tempfile
+import gzip
 import json
+import base64
+import hashlib
+import argparse
 import psycopg2
-from datetime import datetime
-from typing import List, Dict
+from datetime import datetime, timedelta
+from itertools import groupby
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from dotenv import load_dotenv
 
+from config import OUTPUT_CONFIG
+from build_search_index import build_search_index
+from ingestion_engine import normalize_field, published_filter, table_columns
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 # Load environment variables
 load_dotenv()
 
 
+# Every MM-DD the site has a page for (including 02-29)
+DAYS_IN_MONTH = [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+ALL_MONTH_DAYS = [
+    f"{month:02d}-{day:02d}"
+    for month in range(1, 13)
+    for day in range(1, DAYS_IN_MONTH[month - 1] + 1)
+]
+
+PAPER_COLUMNS = """
+    publication_month_day, paper_id, title, author_count, year, citation_count,
+    fields_of_study, subfield, venue, url
+"""
+
+STATE_FILE = 'generation_state.json'
+
+# Where each output directory's state lives; not under public/, so it's never served
+STATE_DIR = os.path.join('data', 'generation_state')
+
+# Maps each date to its content-hash-named copy; the one file clients must not cache long
+MANIFEST_FILE = 'manifest.json'
+
+# Served file types (size report, precompression)
+SERVED_EXTENSIONS = ('.json', '.msgpack')
+
+# Content-hash-named copies (and their compressed siblings)
+VERSIONED_NAME_RE = re.compile(r'^(\d{2}-\d{2}|metadata)\.[0-9a-f]{12}\.json(\.gz|\.br)?$')
+
+# Double buffers for --flip; public/data becomes a symlink to one of them
+FLIP_BUFFERS = ('data-a', 'data-b')
+
+
+def state_path(output_dir: str) -> str:
+    """data/generation_state/<dir>-<hash of its real path>.json for an output directory"""
+    real = os.path.realpath(output_dir)
+    key = hashlib.sha256(real.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(os.getcwd(), STATE_DIR, f"{os.path.basename(real)}-{key}.json")
+
+
+def atomic_write(path: str, payload: bytes):
+    """Write to a temp file in the same directory, then rename over the target"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def row_to_paper(row) -> Dict:
+    """Convert a PAPER_COLUMNS row (without publication_month_day) to its JSON form"""
+    return {
+        'id': row[0],
+        'title': row[1],
+        'author_count': row[2],
+        'year': row[3],
+        'citation_count': row[4],
+        # Calculate correct field from fields_of_study array
+        'field': normalize_field(row[5]),
+        'subfield': row[6],
+        'venue': row[7] or 'Unknown Venue',
+        'url': row[8] or 'https://example.com'
+    }
+
+
+def content_hash(papers: List[Dict]) -> str:
+    """Hash of a date's papers (not its last_updated stamp)"""
+    payload = json.dumps(papers, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class GenerationStats:
+    """Per-date summaries behind metadata.json and generation_state.json"""
+
+    def __init__(self, dates: Optional[Dict[str, Dict]] = None):
+        self.dates: Dict[str, Dict] = dict(dates or {})
+        self.written: Set[str] = set()
+
+    def add_date(self, month_day: str, papers: List[Dict], digest: str, written: bool = True,
+                 file: Optional[str] = None, delta: Optional[str] = None):
+        fields: Dict[str, int] = {}
+        for paper in papers:
+            fields[paper['field']] = fields.get(paper['field'], 0) + 1
+        years = [paper['year'] for paper in papers if paper['year']]
+
+        self.dates[month_day] = {
+            'hash': digest,
+            'papers': len(papers),
+            'fields': fields,
+            'year_min': min(years) if years else None,
+            'year_max': max(years) if years else None,
+            'years': sorted(set(years)),
+            'file': file,
+            'delta': delta,
+        }
+        if written:
+            self.written.add(month_day)
+
+    def merge(self, other: 'GenerationStats'):
+        """Fold in the stats of another worker"""
+        self.dates.update(other.dates)
+        self.written |= other.written
+
+    @property
+    def total_files(self) -> int:
+        return len(self.dates)
+
+    @property
+    def total_papers(self) -> int:
+        return sum(d['papers'] for d in self.dates.values())
+
+    @property
+    def fields(self) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for d in self.dates.values():
+            for field, count in d['fields'].items():
+                totals[field] = totals.get(field, 0) + count
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+    @property
+    def year_range(self) -> Tuple[Optional[int], Optional[int]]:
+        mins = [d['year_min'] for d in self.dates.values() if d['year_min']]
+        maxes = [d['year_max'] for d in self.dates.values() if d['year_max']]
+        return (min(mins) if mins else None, max(maxes) if maxes else None)
+
+
+def balance_month_days(counts: Dict[str, int], workers: int,
+                       month_days: Optional[List[str]] = None) -> List[List[str]]:
+    """
+    Split month-days into `workers` groups of roughly equal row counts
+    (largest first, each to the least-loaded group) so the big first-of-month
+    dates end up spread across workers instead of stacking on one
+    """
+    groups = [[] for _ in range(workers)]
+    loads = [0] * workers
+    for month_day in sorted(ALL_MONTH_DAYS if month_days is None else month_days, key=lambda md: counts.get(md, 0), reverse=True):
+        i = loads.index(min(loads))
+        groups[i].append(month_day)
+        loads[i] += counts.get(month_day, 0)
+    return [sorted(group) for group in groups if group]
+
+
+# ============================================
+# Paged Output
+# ============================================
+
+def build_pages(papers: List[Dict], page_size: int) -> List[List[Dict]]:
+    """Split a date's citation-sorted papers into fixed-size pages"""
+    return [papers[i:i + page_size] for i in range(0, len(papers), page_size)]
+
+
+def page_file_name(page: int) -> str:
+    return f"page-{page:03d}.json"
+
+
+def build_summary(month_day: str, papers: List[Dict], digest: str, page_count: int) -> Dict:
+    """
+    Small first-paint file for a date. The random sample is seeded by the content
+    hash, so it only changes when the date's papers do.
+    """
+    fields: Dict[str, int] = {}
+    for paper in papers:
+        fields[paper['field']] = fields.get(paper['field'], 0) + 1
+
+    sample_size = min(OUTPUT_CONFIG['summary_sample_size'], len(papers))
+    sample = random.Random(digest).sample(papers, sample_size)
+
+    return {
+        'date': month_day,
+        'total_papers': len(papers),
+        'top': papers[:OUTPUT_CONFIG['summary_top_n']],
+        'fields': dict(sorted(fields.items(), key=lambda item: item[1], reverse=True)),
+        'sample': sample,
+        'page_size': OUTPUT_CONFIG['page_size'],
+        'page_count': page_count,
+    }
+
+
+def build_page_index(month_day: str, pages: List[List[Dict]]) -> Dict:
+    """Describes each page file so clients can jump to a citation range"""
+    return {
+        'date': month_day,
+        'page_size': OUTPUT_CONFIG['page_size'],
+        'total_papers': sum(len(page) for page in pages),
+        'pages': [
+            {
+                'page': i,
+                'file': page_file_name(i),
+                'count': len(page),
+                'citation_max': page[0]['citation_count'],
+                'citation_min': page[-1]['citation_count'],
+            }
+            for i, page in enumerate(pages, 1)
+        ],
+    }
+
+
+# Lower bounds of the author-count buckets
+AUTHOR_BUCKETS = [1, 2, 3, 6, 11, 21, 51]
+
+
+def citation_bucket(citations: int) -> int:
+    """Log-scale bucket lower bound: 0, 1, 10, 100, ..."""
+    if citations <= 0:
+        return 0
+    return 10 ** (len(str(citations)) - 1)
+
+
+def author_bucket(author_count: int) -> int:
+    return max([bound for bound in AUTHOR_BUCKETS if bound <= author_count] or [AUTHOR_BUCKETS[0]])
+
+
+def build_facets(month_day: str, papers: List[Dict], page_size: int) -> Dict:
+    """
+    Histograms over a date's citation-sorted papers. Every bucket lists [page, count]
+    for the page files holding its papers; citation buckets are contiguous, so they
+    also carry the [start, end) positions they cover.
+    """
+    facets: Dict[str, Dict] = {'decade': {}, 'citations': {}, 'field': {}, 'authors': {}}
+    for i, paper in enumerate(papers):
+        keys = {
+            'decade': paper['year'] // 10 * 10 if paper['year'] else None,
+            'citations': citation_bucket(paper['citation_count'] or 0),
+            'field': paper['field'],
+            'authors': author_bucket(paper['author_count'] or 0),
+        }
+        page = i // page_size + 1
+        for facet, key in keys.items():
+            bucket = facets[facet].setdefault(key, {'bucket': key, 'count': 0, 'pages': {}})
+            bucket['count'] += 1
+            bucket['pages'][page] = bucket['pages'].get(page, 0) + 1
+            if facet == 'citations':
+                bucket.setdefault('start', i)
+                bucket['end'] = i + 1
+
+    def bucket_list(facet: str, key) -> List[Dict]:
+        buckets = sorted(facets[facet].values(), key=key)
+        for bucket in buckets:
+            bucket['pages'] = [[page, count] for page, count in sorted(bucket['pages'].items())]
+        return buckets
+
+    return {
+        'date': month_day,
+        'total_papers': len(papers),
+        'page_size': page_size,
+        'decade': bucket_list('decade', lambda b: (b['bucket'] is None, b['bucket'] or 0)),
+        'citations': bucket_list('citations', lambda b: -b['bucket']),
+        'field': bucket_list('field', lambda b: (-b['count'], b['bucket'])),
+        'authors': bucket_list('authors', lambda b: b['bucket']),
+    }
+
+
+def field_slug(field: str) -> str:
+    """'Computer Science' -> 'computer-science' (directory name under fields/)"""
+    return field.lower().replace(' ', '-')
+
+
+def build_field_index(stats: 'GenerationStats') -> Dict:
+    """Every field's slug, total and per-date counts, from the per-date summaries"""
+    fields: Dict[str, Dict] = {}
+    for month_day, entry in sorted(stats.dates.items()):
+        for field, count in entry['fields'].items():
+            info = fields.setdefault(field, {'slug': field_slug(field), 'total_papers': 0, 'dates': {}})
+            info['total_papers'] += count
+            info['dates'][month_day] = count
+    return {'fields': dict(sorted(fields.items()))}
+
+
+def build_twin_files(papers: List[Dict]) -> Dict[int, Dict]:
+    """year -> count and most-cited papers, for one MM-DD's citation-sorted papers"""
+    by_year: Dict[int, List[Dict]] = {}
+    for paper in papers:
+        if paper['year']:
+            by_year.setdefault(paper['year'], []).append(paper)
+    return {
+        year: {'total_papers': len(year_papers), 'top': year_papers[:OUTPUT_CONFIG['twins_top_n']]}
+        for year, year_papers in by_year.items()
+    }
+
+
+def build_twin_bitmap(stats: 'GenerationStats') -> Dict:
+    """
+    Bit (year - year_min) * 366 + index of MM-DD in ALL_MONTH_DAYS is set when
+    twins/YYYY/MM-DD.json exists. Bits are LSB-first within each byte, base64-encoded.
+    """
+    year_min, year_max = stats.year_range
+    if year_min is None:
+        return {'year_min': None, 'year_max': None, 'days_per_year': len(ALL_MONTH_DAYS), 'bits': ''}
+
+    day_index = {month_day: i for i, month_day in enumerate(ALL_MONTH_DAYS)}
+    bits = bytearray(((year_max - year_min + 1) * len(ALL_MONTH_DAYS) + 7) // 8)
+    for month_day, entry in stats.dates.items():
+        for year in entry.get('years', []):
+            i = (year - year_min) * len(ALL_MONTH_DAYS) + day_index[month_day]
+            bits[i >> 3] |= 1 << (i & 7)
+
+    return {
+        'year_min': year_min,
+        'year_max': year_max,
+        'days_per_year': len(ALL_MONTH_DAYS),
+        'bits': base64.b64encode(bytes(bits)).decode('ascii'),
+    }
+
+
+# ============================================
+# Deltas Between Versions
+# ============================================
+
+DELTA_FORMAT = 'paper-birthdays-delta/1'
+
+
+def build_delta(old: Dict, new: Dict) -> Dict:
+    """
+    Row-level patch from one version of a date file to the next. "order" rebuilds the
+    new papers list: [old_index, count] copies a run of old rows, a bare number takes
+    that many rows from "added". "changed" then overwrites fields, keyed by paper id.
+    Old rows not referenced by "order" are gone.
+    """
+    old_index = {paper['id']: i for i, paper in enumerate(old['papers'])}
+    order: List = []
+    added: List[Dict] = []
+    changed: Dict[str, Dict] = {}
+
+    for paper in new['papers']:
+        i = old_index.get(paper['id'])
+        if i is None:
+            added.append(paper)
+            if order and isinstance(order[-1], int):
+                order[-1] += 1
+            else:
+                order.append(1)
+            continue
+
+        old_paper = old['papers'][i]
+        diff = {key: value for key, value in paper.items() if old_paper.get(key) != value}
+        if diff:
+            changed[paper['id']] = diff
+        if order and isinstance(order[-1], list) and order[-1][0] + order[-1][1] == i:
+            order[-1][1] += 1
+        else:
+            order.append([i, 1])
+
+    return {
+        'format': DELTA_FORMAT,
+        'date': new['date'],
+        'total_papers': new['total_papers'],
+        'last_updated': new.get('last_updated'),
+        'order': order,
+        'added': added,
+        'changed': changed,
+    }
+
+
+def apply_delta(old: Dict, delta: Dict) -> Dict:
+    """Reference applier: old date file + delta -> new date file"""
+    papers = []
+    added = iter(delta['added'])
+    for step in delta['order']:
+        if isinstance(step, list):
+            papers.extend(dict(paper) for paper in old['papers'][step[0]:step[0] + step[1]])
+        else:
+            papers.extend(next(added) for _ in range(step))
+    for paper in papers:
+        paper.update(delta['changed'].get(paper['id'], {}))
+
+    return {
+        'date': delta['date'],
+        'total_papers': delta['total_papers'],
+        'papers': papers,
+        'last_updated': delta['last_updated'],
+    }
+
+
+# ============================================
+# Columnar Format (docs/COLUMNAR_FORMAT.md)
+# ============================================
+
+COLUMNAR_FORMAT = 'paper-birthdays-columnar/2'
+
+# Stored columns, in order; url is split into url_prefix and url (the rest)
+COLUMNAR_COLUMNS = ['id', 'title', 'author_count', 'year', 'citation_count', 'field', 'subfield', 'venue',
+                    'url_prefix', 'url']
+
+# Dictionary-encoded columns: values are indexes into data['dicts'][column]
+COLUMNAR_DICT_COLUMNS = ['field', 'subfield', 'venue', 'url_prefix']
+
+
+def url_key(paper_id: str) -> str:
+    return paper_id.split(':', 1)[-1]
+
+
+def split_url(url: str) -> Tuple[str, str]:
+    """'https://host/paper/abc' -> ('https://host/paper/', 'abc'); a trailing slash stays with the rest"""
+    cut = url.rstrip('/').rfind('/') + 1
+    return url[:cut], url[cut:]
+
+
+def encode_columnar(month_day: str, papers: List[Dict]) -> Dict:
+    """Date file in columnar form: one array per key, repeated strings dictionary-encoded"""
+    columns: Dict[str, List] = {column: [] for column in COLUMNAR_COLUMNS}
+    dicts: Dict[str, List] = {column: [] for column in COLUMNAR_DICT_COLUMNS}
+    lookups: Dict[str, Dict] = {column: {} for column in COLUMNAR_DICT_COLUMNS}
+
+    for paper in papers:
+        prefix, rest = split_url(paper['url'])
+        for column in COLUMNAR_COLUMNS:
+            if column == 'url_prefix':
+                value = prefix
+            elif column == 'url':
+                # Most URLs end in the paper id; those store null
+                value = None if rest == url_key(paper['id']) else rest
+            else:
+                value = paper[column]
+            if column in lookups:
+                if value not in lookups[column]:
+                    lookups[column][value] = len(dicts[column])
+                    dicts[column].append(value)
+                value = lookups[column][value]
+            columns[column].append(value)
+
+    return {
+        'format': COLUMNAR_FORMAT,
+        'date': month_day,
+        'total_papers': len(papers),
+        'dicts': dicts,
+        'columns': columns,
+    }
+
+
+def decode_columnar(data: Dict) -> List[Dict]:
+    """Reference decoder: columnar file back to the list of paper objects"""
+    columns, dicts = data['columns'], data['dicts']
+    papers = []
+    for i in range(data['total_papers']):
+        paper = {}
+        for column in COLUMNAR_COLUMNS:
+            value = columns[column][i]
+            if column in dicts:
+                value = dicts[column][value]
+            if column == 'url':
+                value = paper.pop('url_prefix') + (url_key(paper['id']) if value is None else value)
+            paper[column] = value
+        papers.append(paper)
+    return papers
+
+
+# ============================================
+# Weighted Sampling Tables
+# ============================================
+
+# Alias table probabilities are stored as integers out of this
+SAMPLING_PROB_SCALE = 65535
+
+
+def paper_weight(paper: Dict, current_year: int) -> float:
+    """Sampling weight from OUTPUT_CONFIG's citation exponent and age half-life"""
+    weight = (max(paper['citation_count'] or 0, 0) + 1) ** OUTPUT_CONFIG['sampling_citation_exponent']
+    half_life = OUTPUT_CONFIG['sampling_age_half_life']
+    if half_life and paper['year']:
+        weight *= 0.5 ** (max(current_year - paper['year'], 0) / half_life)
+    return weight
+
+
+def build_alias_table(weights: List[float]) -> Dict:
+    """
+    Vose's alias method: pick i uniformly, keep it if a uniform draw in
+    [0, SAMPLING_PROB_SCALE) is below prob[i], otherwise take alias[i]
+    """
+    n = len(weights)
+    total = sum(weights)
+    if not n or total <= 0:
+        return {'prob': [SAMPLING_PROB_SCALE] * n, 'alias': list(range(n))}
+
+    scaled = [w * n / total for w in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1]
+    large = [i for i, p in enumerate(scaled) if p >= 1]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] += scaled[s] - 1
+        (small if scaled[l] < 1 else large).append(l)
+
+    return {
+        'prob': [min(SAMPLING_PROB_SCALE, round(p * SAMPLING_PROB_SCALE)) for p in prob],
+        'alias': alias,
+    }
+
+
+def build_sampling_table(month_day: str, papers: List[Dict], per_field: bool) -> Dict:
+    """
+    Alias table over a date's papers. Entries are positions in the date's
+    citation-sorted list, i.e. MM-DD.json's papers array (or page position // page_size).
+    """
+    current_year = datetime.now().year
+    weights = [paper_weight(paper, current_year) for paper in papers]
+
+    table = {
+        'date': month_day,
+        'total_papers': len(papers),
+        'weight': {
+            'citation_exponent': OUTPUT_CONFIG['sampling_citation_exponent'],
+            'age_half_life': OUTPUT_CONFIG['sampling_age_half_life'],
+        },
+        'prob_scale': SAMPLING_PROB_SCALE,
+        **build_alias_table(weights),
+    }
+
+    if per_field:
+        positions: Dict[str, List[int]] = {}
+        for i, paper in enumerate(papers):
+            positions.setdefault(paper['field'], []).append(i)
+        table['fields'] = {
+            field: {'positions': members, **build_alias_table([weights[i] for i in members])}
+            for field, members in sorted(positions.items())
+        }
+    return table
+
+
+def draw_from_table(table: Dict, rng: random.Random) -> Optional[int]:
+    """Reference sampler (lib/paperUtils.ts has the client one): a position, or None if empty"""
+    n = len(table['prob'])
+    if not n:
+        return None
+    i = rng.randrange(n)
+    return i if rng.randrange(table['prob_scale']) < table['prob'][i] else table['alias'][i]
+
+
+# ============================================
+# Precompression & Size Report
+# ============================================
+
+def compress_file(path: str) -> Tuple[str, int, int, Optional[int]]:
+    """
+    Write .gz and .br siblings at maximum compression if they're missing or older than
+    the file. gzip mtime is fixed so unchanged input gives byte-identical output.
+    Returns (path, raw size, gzip size, brotli size).
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    mtime = os.path.getmtime(path)
+
+    gz_path = path + '.gz'
+    if not os.path.exists(gz_path) or os.path.getmtime(gz_path) < mtime:
+        atomic_write(gz_path, gzip.compress(data, compresslevel=9, mtime=0))
+
+    br_size = None
+    if brotli is not None:
+        br_path = path + '.br'
+        if not os.path.exists(br_path) or os.path.getmtime(br_path) < mtime:
+            atomic_write(br_path, brotli.compress(data, quality=11))
+        br_size = os.path.getsize(br_path)
+
+    return path, len(data), os.path.getsize(gz_path), br_size
+
+
+def public_json_files(output_dir: str) -> List[str]:
+    paths = []
+    for root, _, names in os.walk(output_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            if name.endswith(SERVED_EXTENSIONS):
+                paths.append(path)
+    return sorted(paths)
+
+
+def size_report(sizes: List[Tuple[str, int, Optional[int], Optional[int]]], budget_kb: Optional[int],
+                output_dir: str) -> bool:
+    """Print the largest files, anything over budget and totals. False if a file is over budget."""
+    # Hashed copies duplicate the files they were made from
+    sizes = [entry for entry in sizes if not VERSIONED_NAME_RE.match(os.path.basename(entry[0]))]
+    budget = budget_kb * 1024 if budget_kb else None
+    over = [entry for entry in sizes if budget and entry[1] > budget]
+    largest = sorted(sizes, key=lambda entry: entry[1], reverse=True)[:10]
+
+    def kb(size):
+        return f"{size / 1024:>9.1f}" if size is not None else f"{'-':>9}"
+
+    print(f"\n📦 Output sizes (KB){f', budget {budget_kb} KB per file' if budget_kb else ''}")
+    print(f"  {'file':<20}{'json':>9}{'gzip':>9}{'brotli':>9}")
+    for path, raw, gz, br in largest + [entry for entry in over if entry not in largest]:
+        flag = '  ❌ over budget' if budget and raw > budget else ''
+        print(f"  {os.path.relpath(path, output_dir):<20}{kb(raw)}{kb(gz)}{kb(br)}{flag}")
+
+    def total(i):
+        values = [entry[i] for entry in sizes if entry[i] is not None]
+        return sum(values) if values else None
+
+    print(f"  {f'total ({len(sizes)} files)':<20}{kb(total(1))}{kb(total(2))}{kb(total(3))}")
+
+    if over:
+        print(f"\n❌ {len(over)} files exceed the {budget_kb} KB budget")
+    return not over
+
+
 class JSONGenerator:
     """Generates static JSON files from database"""
 
-    def __init__(self, db_connection):
+    def __init__(self, db_connection, minify: bool = False, paged: bool = False, field_slices: bool = False,
+                 columnar: bool = False, sampling_tables: bool = False, msgpack_output: bool = False,
+                 search_index: bool = False, birthday_twins: bool = False, deltas: bool = False,
+                 output_dir: Optional[str] = None):
         self.db = db_connection
-        self.output_dir = os.path.join(os.getcwd(), 'public', 'data')
+        self.minify = minify
+        self.paged = paged
+        self.field_slices = field_slices
+        self.columnar = columnar
+        self.sampling_tables = sampling_tables
+        self.msgpack_output = msgpack_output
+        self.search_index = search_index
+        self.birthday_twins = birthday_twins
+        self.deltas = deltas
+        self.sampling_per_field = OUTPUT_CONFIG['sampling_per_field']
+        self.output_dir = output_dir or os.path.join(os.getcwd(), 'public', 'data')
+
+        cursor = self.db.cursor()
+        self.published_filter = published_filter(table_columns(cursor))
+        cursor.close()
 
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def normalize_field(self, fields_of_study):
-        """Map primary field to canonical category (uses FIRST field only)"""
-        if not fields_of_study or len(fields_of_study) == 0:
-            return 'Other'
-
-        field_mapping = {
-            'Medicine': ['Medicine'],
-            'Biology': ['Biology'],
-            'Computer Science': ['Computer Science'],
-            'Economics': ['Economics', 'Business'],
-            'Physics': ['Physics'],
-            'Mathematics': ['Mathematics'],
-            'Psychology': ['Psychology'],
-            'Engineering': ['Engineering'],
-            'Chemistry': ['Chemistry', 'Materials Science'],
-            'Environmental Science': ['Environmental Science', 'Geology', 'Geography'],
-            'Political Science': ['Political Science', 'Sociology'],
-            'Art': ['Art'],
-            'Philosophy': ['Philosophy'],
-            'History': ['History'],
-        }
+    def fetch_papers_for_date(self, month_day: str) -> List[Dict]:
+        """Query database for papers on a specific MM-DD"""
+        cursor = self.db.cursor()
 
-        # Use the FIRST field (primary field) to prevent misclassification
-        primary_field = fields_of_study[0]
-        field_name = str(primary_field)
+        cursor.execute(f"""
+            SELECT {PAPER_COLUMNS}
+            FROM papers
+            WHERE publication_month_day = %s
+              AND {self.published_filter}
+            ORDER BY citation_count DESC, paper_id
+        """, (month_day,))
 
-        for category, keywords in field_mapping.items():
-            for keyword in keywords:
-                if keyword.lower() in field_name.lower():
-                    return category
+        papers = [row_to_paper(row[1:]) for row in cursor.fetchall()]
+        cursor.close()
+        return papers
 
-        return 'Other'
+    def count_papers_by_date(self) -> Dict[str, int]:
+        """Row count per month-day, used to balance workers and to spot deletions"""
+        cursor = self.db.cursor()
+        cursor.execute(f"""
+            SELECT publication_month_day, COUNT(*)
+            FROM papers
+            WHERE {self.published_filter}
+            GROUP BY publication_month_day
+        """)
+        counts = dict(cursor.fetchall())
+        cursor.close()
+        return counts
 
-    def fetch_papers_for_date(self, month_day: str) -> List[Dict]:
-        """Query database for papers on a specific MM-DD"""
+    def max_updated_at(self) -> Optional[datetime]:
         cursor = self.db.cursor()
+        cursor.execute("SELECT MAX(updated_at) FROM papers")
+        value = cursor.fetchone()[0]
+        cursor.close()
+        return value
 
+    def changed_month_days(self, since: datetime, counts: Dict[str, int], state_dates: Dict[str, Dict]) -> List[str]:
+        """
+        Month-days with rows updated since the last run, plus any whose row count no
+        longer matches the saved state (rows deleted, or moved away to another date)
+        """
+        cursor = self.db.cursor()
         cursor.execute("""
-            SELECT
-                paper_id, title, author_count, year, citation_count,
-                fields_of_study, subfield, venue, url
+            SELECT DISTINCT publication_month_day
             FROM papers
-            WHERE publication_month_day = %s
-            ORDER BY citation_count DESC
-        """, (month_day,))
+            WHERE updated_at > %s
+        """, (since,))
+        changed = {row[0] for row in cursor.fetchall()}
+        cursor.close()
+
+        for month_day in ALL_MONTH_DAYS:
+            entry = state_dates.get(month_day)
+            if entry is None or entry['papers'] != counts.get(month_day, 0):
+                changed.add(month_day)
+
+        return sorted(changed & set(ALL_MONTH_DAYS))
 
-        papers = []
-        for row in cursor.fetchall():
-            # Calculate correct field from fields_of_study array
-            correct_field = self.normalize_field(row[5])
-
-            papers.append({
-                'id': row[0],
-                'title': row[1],
-                'author_count': row[2],
-                'year': row[3],
-                'citation_count': row[4],
-                'field': correct_field,
-                'subfield': row[6],
-                'venue': row[7] or 'Unknown Venue',
-                'url': row[8] or 'https://example.com'
+    def stream_papers_by_date(self, month_days: Optional[List[str]] = None) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        One sequential scan of papers in (month_day, citations) order, yielding each
+        date's papers as soon as the next date starts. Only one date is held in memory.
+        """
+        cursor = self.db.cursor(name='generate_json_all')
+        cursor.itersize = 10000
+        date_filter = "AND publication_month_day = ANY(%s)" if month_days is not None else ""
+        cursor.execute(f"""
+            SELECT {PAPER_COLUMNS}
+            FROM papers
+            WHERE {self.published_filter} {date_filter}
+            ORDER BY publication_month_day, citation_count DESC, paper_id
+        """, (month_days,) if month_days is not None else None)
+
+        for month_day, rows in groupby(cursor, key=lambda row: row[0]):
+            yield month_day, [row_to_paper(row[1:]) for row in rows]
+
+        cursor.close()
+
+    def write_date_file(self, month_day: str, papers: List[Dict], previous: Optional[Dict] = None,
+                        versioned: bool = True) -> Tuple[str, bool, Optional[str], Optional[str]]:
+        """
+        Write one MM-DD.json file (and its hashed copy unless versioned=False), unless its
+        papers hash the same as in the previous state entry and both files are already there.
+        Returns (content hash, whether the file was written, hashed copy name, delta path).
+        """
+        previous = previous or {}
+        digest = content_hash(papers)
+        output_path = os.path.join(self.output_dir, f"{month_day}.json")
+        if (digest == previous.get('hash') and os.path.exists(output_path) and previous.get('file')
+                and os.path.exists(os.path.join(self.output_dir, previous['file']))):
+            return digest, False, previous['file'], previous.get('delta')
+
+        if self.paged:
+            self.write_date_pages(month_day, papers, digest)
+        if self.field_slices:
+            self.write_field_slices(month_day, papers)
+        if self.columnar:
+            self.write_columnar_file(month_day, papers)
+        if self.sampling_tables:
+            self.write_sampling_table(month_day, papers)
+        if self.birthday_twins:
+            self.write_twin_files(month_day, papers)
+
+        output_data = {
+            'date': month_day,
+            'total_papers': len(papers),
+            'papers': papers,
+            'last_updated': datetime.now().isoformat()
+        }
+
+        if self.msgpack_output:
+            atomic_write(os.path.join(self.output_dir, f"{month_day}.msgpack"),
+                         msgpack.packb(output_data, use_bin_type=True))
+        file = self.write_json(output_path, output_data, versioned=versioned)
+        delta = self.write_delta(month_day, previous.get('file'), file, output_data) if self.deltas and file else None
+        return digest, True, file, delta
+
+    def write_delta(self, month_day: str, old_file: Optional[str], new_file: str, new: Dict) -> Optional[str]:
+        """
+        Write deltas/MM-DD.<from hash>.<to hash>.json from the previous hashed copy, replacing
+        the date's older deltas. None when there's no previous copy or the delta isn't small.
+        """
+        deltas_dir = os.path.join(self.output_dir, 'deltas')
+        if os.path.isdir(deltas_dir):
+            for name in os.listdir(deltas_dir):
+                if name.startswith(f"{month_day}."):
+                    os.remove(os.path.join(deltas_dir, name))
+
+        old_path = os.path.join(self.output_dir, old_file) if old_file else None
+        if not old_path or old_file == new_file or not os.path.exists(old_path):
+            return None
+        with open(old_path, encoding='utf-8') as f:
+            old = json.load(f)
+
+        delta = build_delta(old, new)
+        delta['from'], delta['to'] = old_file, new_file
+        delta_size = len(json.dumps(delta, ensure_ascii=False, separators=(',', ':')))
+        full_size = len(json.dumps(new, ensure_ascii=False, separators=(',', ':')))
+        if delta_size > full_size * OUTPUT_CONFIG['delta_max_ratio'] or apply_delta(old, delta) != new:
+            return None
+
+        os.makedirs(deltas_dir, exist_ok=True)
+        name = f"{month_day}.{old_file.split('.')[1]}.{new_file.split('.')[1]}.json"
+        self.write_json(os.path.join(deltas_dir, name), delta)
+        return f"deltas/{name}"
+
+    def write_date_pages(self, month_day: str, papers: List[Dict], digest: str):
+        """Write MM-DD/summary.json, MM-DD/index.json and the MM-DD/page-NNN.json files"""
+        date_dir = os.path.join(self.output_dir, month_day)
+        os.makedirs(date_dir, exist_ok=True)
+        last_updated = datetime.now().isoformat()
+
+        pages = build_pages(papers, OUTPUT_CONFIG['page_size'])
+        for i, page in enumerate(pages, 1):
+            self.write_json(os.path.join(date_dir, page_file_name(i)), {
+                'date': month_day,
+                'page': i,
+                'page_count': len(pages),
+                'papers': page,
+                'last_updated': last_updated,
             })
 
-        return papers
+        # Drop pages (and their compressed siblings) left over from when the date had more papers
+        for name in os.listdir(date_dir):
+            if name.startswith('page-') and int(name[len('page-'):].split('.')[0]) > len(pages):
+                os.remove(os.path.join(date_dir, name))
+
+        summary = build_summary(month_day, papers, digest, len(pages))
+        summary['last_updated'] = last_updated
+        self.write_json(os.path.join(date_dir, 'summary.json'), summary)
+
+        index = build_page_index(month_day, pages)
+        index['last_updated'] = last_updated
+        self.write_json(os.path.join(date_dir, 'index.json'), index)
+
+        if OUTPUT_CONFIG['facets']:
+            facets = build_facets(month_day, papers, OUTPUT_CONFIG['page_size'])
+            facets['last_updated'] = last_updated
+            self.write_json(os.path.join(date_dir, 'facets.json'), facets)
+
+    def write_field_slices(self, month_day: str, papers: List[Dict]):
+        """Write fields/<slug>/MM-DD.json for each field present on the date"""
+        by_field: Dict[str, List[Dict]] = {}
+        for paper in papers:
+            by_field.setdefault(paper['field'], []).append(paper)
+
+        fields_dir = os.path.join(self.output_dir, 'fields')
+        last_updated = datetime.now().isoformat()
+        for field, field_papers in by_field.items():
+            slice_dir = os.path.join(fields_dir, field_slug(field))
+            os.makedirs(slice_dir, exist_ok=True)
+            self.write_json(os.path.join(slice_dir, f"{month_day}.json"), {
+                'date': month_day,
+                'field': field,
+                'total_papers': len(field_papers),
+                'papers': field_papers,
+                'last_updated': last_updated,
+            })
+
+        # Remove slices for fields the date no longer has
+        if not os.path.isdir(fields_dir):
+            return
+        present = {field_slug(field) for field in by_field}
+        for slug in os.listdir(fields_dir):
+            slice_dir = os.path.join(fields_dir, slug)
+            if slug in present or not os.path.isdir(slice_dir):
+                continue
+            for name in os.listdir(slice_dir):
+                if name.startswith(f"{month_day}.json"):
+                    os.remove(os.path.join(slice_dir, name))
+            if not os.listdir(slice_dir):
+                os.rmdir(slice_dir)
+
+    def write_columnar_file(self, month_day: str, papers: List[Dict]):
+        """Write columnar/MM-DD.json"""
+        columnar_dir = os.path.join(self.output_dir, 'columnar')
+        os.makedirs(columnar_dir, exist_ok=True)
+        data = encode_columnar(month_day, papers)
+        data['last_updated'] = datetime.now().isoformat()
+        self.write_json(os.path.join(columnar_dir, f"{month_day}.json"), data)
+
+    def write_sampling_table(self, month_day: str, papers: List[Dict]):
+        """Write sampling/MM-DD.json"""
+        sampling_dir = os.path.join(self.output_dir, 'sampling')
+        os.makedirs(sampling_dir, exist_ok=True)
+        table = build_sampling_table(month_day, papers, self.sampling_per_field)
+        self.write_json(os.path.join(sampling_dir, f"{month_day}.json"), table)
+
+    def write_twin_files(self, month_day: str, papers: List[Dict]):
+        """Write twins/YYYY/MM-DD.json for each year with papers on this MM-DD"""
+        twins_dir = os.path.join(self.output_dir, 'twins')
+        last_updated = datetime.now().isoformat()
+        files = build_twin_files(papers)
+        for year, data in files.items():
+            year_dir = os.path.join(twins_dir, str(year))
+            os.makedirs(year_dir, exist_ok=True)
+            self.write_json(os.path.join(year_dir, f"{month_day}.json"), {
+                'date': f"{year}-{month_day}",
+                **data,
+                'last_updated': last_updated,
+            })
+
+        # Remove files for years the date no longer has
+        if not os.path.isdir(twins_dir):
+            return
+        for year in os.listdir(twins_dir):
+            year_dir = os.path.join(twins_dir, year)
+            if not year.isdigit() or int(year) in files or not os.path.isdir(year_dir):
+                continue
+            for name in os.listdir(year_dir):
+                if name.startswith(f"{month_day}.json"):
+                    os.remove(os.path.join(year_dir, name))
+            if not os.listdir(year_dir):
+                os.rmdir(year_dir)
+
+    def write_twin_bitmap(self, stats: 'GenerationStats'):
+        twins_dir = os.path.join(self.output_dir, 'twins')
+        os.makedirs(twins_dir, exist_ok=True)
+        self.write_json(os.path.join(twins_dir, 'bitmap.json'), build_twin_bitmap(stats))
+
+    def write_field_index(self, stats: 'GenerationStats'):
+        fields_dir = os.path.join(self.output_dir, 'fields')
+        os.makedirs(fields_dir, exist_ok=True)
+        self.write_json(os.path.join(fields_dir, 'index.json'), build_field_index(stats))
+
+    @property
+    def output_format(self) -> str:
+        paged = ('+paged+facets' if OUTPUT_CONFIG['facets'] else '+paged') if self.paged else ''
+        return (('minified' if self.minify else 'indented') + paged
+                + ('+fields' if self.field_slices else '') + ('+columnar' if self.columnar else '')
+                + (('+sampling-fields' if self.sampling_per_field else '+sampling') if self.sampling_tables else '')
+                + ('+msgpack' if self.msgpack_output else '') + ('+twins' if self.birthday_twins else ''))
+
+    @property
+    def options(self) -> Dict:
+        """Constructor options, for building identical generators in worker processes"""
+        return {'minify': self.minify, 'paged': self.paged, 'field_slices': self.field_slices,
+                'columnar': self.columnar, 'sampling_tables': self.sampling_tables,
+                'msgpack_output': self.msgpack_output, 'search_index': self.search_index,
+                'birthday_twins': self.birthday_twins, 'deltas': self.deltas, 'output_dir': self.output_dir}
+
+    def write_json(self, path: str, data, versioned: bool = False) -> Optional[str]:
+        """
+        Atomically write a public JSON file in the configured format. With versioned=True
+        also write an immutable <name>.<content hash>.json copy and return its name.
+        """
+        if self.minify:
+            text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        else:
+            text = json.dumps(data, indent=2, ensure_ascii=False)
+        payload = text.encode('utf-8')
+        atomic_write(path, payload)
+
+        if not versioned:
+            return None
+        stem = os.path.basename(path)[:-len('.json')]
+        name = f"{stem}.{hashlib.sha256(payload).hexdigest()[:12]}.json"
+        versioned_path = os.path.join(os.path.dirname(path), name)
+        if not os.path.exists(versioned_path):
+            atomic_write(versioned_path, payload)
+        return name
 
     def generate_file_for_date(self, month: int, day: int) -> bool:
         """Generate JSON file for a specific date"""
         month_day = f"{month:02d}-{day:02d}"
 
         try:
-            # Fetch papers
-            papers = self.fetch_papers_for_date(month_day)
+            state = self.load_state()
+            same_format = state.get('format', 'indented') == self.output_format
+            previous = state['dates'].get(month_day) if same_format else None
 
-            # Create output data
-            output_data = {
-                'date': month_day,
-                'total_papers': len(papers),
-                'papers': papers,
-                'last_updated': datetime.now().isoformat()
-            }
+            # Without a state there's no manifest to reference a hashed copy or delete the
+            # one it replaces, so only MM-DD.json is written
+            tracked = bool(state['dates']) and same_format
 
-            # Write to file
-            output_path = os.path.join(self.output_dir, f"{month_day}.json")
+            papers = self.fetch_papers_for_date(month_day)
+            digest, written, file, delta = self.write_date_file(month_day, papers, previous, versioned=tracked)
 
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, indent=2, ensure_ascii=False)
+            # Keep the state and manifest in step (the manifest drops superseded hashed
+            # copies), but leave the watermark to full runs
+            if tracked:
+                stats = GenerationStats(state['dates'])
+                stats.add_date(month_day, papers, digest, written, file, delta)
+                self.save_state(stats, state.get('max_updated_at'), state.get('metadata_file'))
+                if written:
+                    self.write_manifest(stats, state.get('metadata_file'))
+                if self.field_slices and written:
+                    self.write_field_index(stats)
+                if self.birthday_twins and written:
+                    self.write_twin_bitmap(stats)
 
-            print(f"  {month_day}.json: {len(papers)} papers")
+            status = '' if written else ' (unchanged)'
+            print(f"  {month_day}.json: {len(papers)} papers{status}")
             return True
 
         except Exception as e:
             print(f"  Error generating {month_day}.json: {e}")
             return False
 
-    def generate_all_files(self):
-        """Generate JSON files for all 366 days"""
-        print("Generating JSON files for all dates...\n")
+    def generate_dates(self, month_days: Optional[List[str]] = None, previous: Optional[Dict[str, Dict]] = None,
+                       verbose: bool = True) -> GenerationStats:
+        """Write the files for the given month-days (default: all) in one streaming pass"""
+        previous = previous or {}
+        stats = GenerationStats()
+        remaining = set(ALL_MONTH_DAYS if month_days is None else month_days)
+        if not remaining:
+            return stats
 
-        days_in_month = [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
-        total_files = 0
-        total_papers = 0
+        for month_day, papers in self.stream_papers_by_date(month_days):
+            if month_day not in remaining:
+                continue  # Malformed month_day values have no page
+            digest, written, file, delta = self.write_date_file(month_day, papers, previous.get(month_day))
+            stats.add_date(month_day, papers, digest, written, file, delta)
+            remaining.discard(month_day)
+            if verbose:
+                status = '' if written else ' (unchanged)'
+                print(f"  {month_day}.json: {len(papers)} papers{status}")
 
-        for month in range(1, 13):
-            for day in range(1, days_in_month[month - 1] + 1):
-                if self.generate_file_for_date(month, day):
-                    total_files += 1
+        # Dates with no papers still get a (empty) file
+        for month_day in sorted(remaining):
+            digest, written, file, delta = self.write_date_file(month_day, [], previous.get(month_day))
+            stats.add_date(month_day, [], digest, written, file, delta)
+            if verbose:
+                status = '' if written else ' (unchanged)'
+                print(f"  {month_day}.json: 0 papers{status}")
 
-                    # Count papers for stats
-                    month_day = f"{month:02d}-{day:02d}"
-                    papers = self.fetch_papers_for_date(month_day)
-                    total_papers += len(papers)
+        return stats
 
-        print(f"\n✓ Generated {total_files} JSON files")
-        print(f"✓ Total papers across all dates: {total_papers}")
+    def generate_all_files(self, workers: int = 1, database_url: Optional[str] = None, full: bool = False):
+        """
+        Regenerate the date files whose rows changed since the last run (every date
+        with full=True or no saved state), optionally across a process pool
+        """
+        state = self.load_state()
+        previous = dict(state['dates'])
 
-        # Generate metadata file
-        self.generate_metadata(total_papers)
+        # Switching output options rewrites everything
+        if state.get('format', 'indented') != self.output_format:
+            full = True
+            previous = {}
+        # State from before hashed copies existed: every date needs one
+        if any(not entry.get('file') for entry in previous.values()):
+            full = True
 
-    def generate_metadata(self, total_papers: int):
-        """Generate metadata.json with global stats"""
-        cursor = self.db.cursor()
+        # Read the watermark before scanning so rows updated mid-run are picked up next time
+        watermark = self.max_updated_at()
+        counts = self.count_papers_by_date() if workers > 1 or not full else {}
 
-        # Get field distribution
-        cursor.execute("""
-            SELECT field, COUNT(*) as count
-            FROM papers
-            GROUP BY field
-            ORDER BY count DESC
-        """)
+        if full or not state.get('max_updated_at'):
+            month_days = None
+            print("Generating JSON files for all dates...\n")
+        else:
+            since = (datetime.fromisoformat(state['max_updated_at'])
+                     - timedelta(hours=OUTPUT_CONFIG['watermark_overlap_hours']))
+            month_days = self.changed_month_days(since, counts, state['dates'])
+            print(f"Regenerating {len(month_days)} dates changed since {since.isoformat()}...\n")
 
-        fields = {}
-        for row in cursor.fetchall():
-            if row[0]:
-                fields[row[0]] = row[1]
+        if workers <= 1 or month_days == []:
+            stats = self.generate_dates(month_days, previous)
+        else:
+            groups = balance_month_days(counts, workers, month_days)
+            print(f"Using {len(groups)} workers\n")
 
-        # Get year range
-        cursor.execute("""
-            SELECT MIN(year), MAX(year)
-            FROM papers
-            WHERE year IS NOT NULL
-        """)
-        year_min, year_max = cursor.fetchone()
+            stats = GenerationStats()
+            tasks = [(group, {md: previous[md] for md in group if md in previous}) for group in groups]
+            with Pool(len(groups), initializer=init_worker, initargs=(database_url, self.options)) as pool:
+                for worker_stats in pool.imap_unordered(generate_dates_worker, tasks):
+                    stats.merge(worker_stats)
+                    print(f"  Worker done: {worker_stats.total_files} dates, "
+                          f"{len(worker_stats.written)} rewritten, {worker_stats.total_papers} papers")
+
+        # Dates not regenerated keep their previous summaries
+        merged = GenerationStats({md: entry for md, entry in previous.items() if md in ALL_MONTH_DAYS})
+        merged.merge(stats)
+
+        print(f"\n✓ Rewrote {len(stats.written)} of {merged.total_files} JSON files")
+        print(f"✓ Total papers across all dates: {merged.total_papers}")
+
+        metadata_file = state.get('metadata_file')
+        if (stats.written or not metadata_file
+                or not os.path.exists(os.path.join(self.output_dir, metadata_file))):
+            metadata_file = self.generate_metadata(merged)
+            if self.field_slices:
+                self.write_field_index(merged)
+            if self.birthday_twins:
+                self.write_twin_bitmap(merged)
+            self.write_manifest(merged, metadata_file)
+
+        if self.search_index and (stats.written or not os.path.exists(
+                os.path.join(self.output_dir, 'search', 'index.json'))):
+            index = build_search_index(self.output_dir, self.write_json)
+            print(f"✓ Search index: {index['total_docs']:,} papers, {index['total_terms']:,} terms, "
+                  f"{len(index['term_shards'])} term shards")
+
+        self.save_state(merged, watermark.isoformat() if watermark else state.get('max_updated_at'), metadata_file)
+
+    def generate_metadata(self, stats: GenerationStats) -> Optional[str]:
+        """Generate metadata.json with global stats, returning its hashed copy's name"""
+        year_min, year_max = stats.year_range
 
         # Create metadata
         metadata = {
-            'total_papers': total_papers,
+            'total_papers': stats.total_papers,
             'date_range': f"{year_min}-{year_max}" if year_min and year_max else "Unknown",
             'last_full_update': datetime.now().isoformat(),
             'sources': ['Semantic Scholar'],
-            'fields': fields,
-            'total_files': 366
+            'fields': stats.fields,
+            'total_files': stats.total_files
         }
 
         # Write metadata file
-        output_path = os.path.join(self.output_dir, 'metadata.json')
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2)
+        name = self.write_json(os.path.join(self.output_dir, 'metadata.json'), metadata, versioned=True)
 
         print(f"✓ Generated metadata.json")
+        return name
+
+    def write_manifest(self, stats: GenerationStats, metadata_file: Optional[str]):
+        """
+        Publish manifest.json (date -> hashed copy), then delete hashed copies referenced
+        by neither it nor the previous manifest. The previous generation is kept so
+        clients holding the old manifest can still fetch what it points to.
+        """
+        path = os.path.join(self.output_dir, MANIFEST_FILE)
+        keep = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                old = json.load(f)
+            keep.update(old.get('dates', {}).values())
+            keep.add(old.get('metadata'))
+
+        manifest = {
+            'generated_at': datetime.now().isoformat(),
+            'metadata': metadata_file,
+            'dates': {md: entry['file'] for md, entry in sorted(stats.dates.items())},
+            'deltas': {md: entry['delta'] for md, entry in sorted(stats.dates.items()) if entry.get('delta')},
+        }
+        self.write_json(path, manifest)
+        keep.update(manifest['dates'].values())
+        keep.add(metadata_file)
+
+        for name in os.listdir(self.output_dir):
+            match = VERSIONED_NAME_RE.match(name)
+            if match and name[:len(name) - len(match.group(2) or '')] not in keep:
+                os.remove(os.path.join(self.output_dir, name))
+
+    def compress_outputs(self, workers: int = 1) -> List[Tuple[str, int, int, Optional[int]]]:
+        """Bring the .gz/.br siblings of every served file up to date, in parallel"""
+        if brotli is None:
+            print("⚠️  brotli not installed, writing .gz only. Run: pip install brotli")
+
+        paths = public_json_files(self.output_dir)
+        with Pool(max(workers, os.cpu_count() or 1)) as pool:
+            return pool.map(compress_file, paths)
+
+    def file_sizes(self) -> List[Tuple[str, int, Optional[int], Optional[int]]]:
+        """(path, raw, gzip, brotli) sizes of the served files, from whatever siblings exist"""
+        sizes = []
+        for path in public_json_files(self.output_dir):
+            siblings = [path + '.gz', path + '.br']
+            sizes.append((path, os.path.getsize(path), *[
+                os.path.getsize(sibling) if os.path.exists(sibling) else None for sibling in siblings
+            ]))
+        return sizes
+
+    def load_state(self) -> Dict:
+        """Previous run's per-date hashes/summaries and updated_at watermark"""
+        path = state_path(self.output_dir)
+        if not os.path.exists(path):
+            # Older runs kept the state inside the output directory
+            path = os.path.join(self.output_dir, STATE_FILE)
+        if not os.path.exists(path):
+            return {'max_updated_at': None, 'dates': {}}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_state(self, stats: GenerationStats, max_updated_at: Optional[str], metadata_file: Optional[str]):
+        state = {
+            'max_updated_at': max_updated_at,
+            'format': self.output_format,
+            'metadata_file': metadata_file,
+            'dates': dict(sorted(stats.dates.items())),
+        }
+        payload = json.dumps(state, indent=2, ensure_ascii=False).encode('utf-8')
+        path = state_path(self.output_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write(path, payload)
+
+        legacy = os.path.join(self.output_dir, STATE_FILE)
+        if os.path.exists(legacy):
+            os.remove(legacy)
+
+
+# ============================================
+# Double-Buffered Publishing
+# ============================================
+
+def flip_buffers(public_dir: str) -> Tuple[str, str]:
+    """(inactive buffer to build into, buffer public/data points at now)"""
+    link = os.path.join(public_dir, 'data')
+    active = os.path.basename(os.path.realpath(link)) if os.path.islink(link) else None
+    inactive = FLIP_BUFFERS[1] if active == FLIP_BUFFERS[0] else FLIP_BUFFERS[0]
+    return os.path.join(public_dir, inactive), os.path.join(public_dir, active or 'data')
+
+
+def publish_buffer(public_dir: str, buffer_dir: str):
+    """
+    Atomically repoint the public/data symlink at a freshly built buffer. The first
+    time, the real public/data directory is moved aside into the other buffer.
+    """
+    link = os.path.join(public_dir, 'data')
+    tmp_link = os.path.join(public_dir, '.data-next')
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(os.path.basename(buffer_dir), tmp_link)
+
+    if os.path.isdir(link) and not os.path.islink(link):
+        other = [name for name in FLIP_BUFFERS if name != os.path.basename(buffer_dir)][0]
+        other_dir = os.path.join(public_dir, other)
+        if os.path.exists(other_dir):
+            shutil.rmtree(other_dir)
+        os.rename(link, other_dir)
+
+    os.replace(tmp_link, link)
+
+
+def seed_previous_generation(active_dir: str, buffer_dir: str):
+    """
+    Copy the live manifest and the hashed copies it references (with their .gz/.br
+    siblings) into the buffer, so write_manifest keeps them as the previous generation
+    """
+    manifest_path = os.path.join(active_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return
+    with open(manifest_path, encoding='utf-8') as f:
+        live = json.load(f)
+    referenced = set(live.get('dates', {}).values())
+    referenced.add(live.get('metadata'))
+
+    shutil.copy2(manifest_path, buffer_dir)
+    for name in os.listdir(active_dir):
+        match = VERSIONED_NAME_RE.match(name)
+        if match and name[:len(name) - len(match.group(2) or '')] in referenced:
+            shutil.copy2(os.path.join(active_dir, name), buffer_dir)
+
+
+# ============================================
+# Parallel Workers
+# ============================================
+
+_worker_generator = None
+
+
+def init_worker(database_url: str, options: Dict):
+    """Give each worker process its own connection"""
+    global _worker_generator
+    _worker_generator = JSONGenerator(psycopg2.connect(database_url), **options)
+
+
+def generate_dates_worker(task: Tuple[List[str], Dict[str, Dict]]) -> GenerationStats:
+    month_days, previous = task
+    return _worker_generator.generate_dates(month_days, previous, verbose=False)
 
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description='Generate static JSON files from the database')
+    parser.add_argument('target', nargs='?', default='all', help="'all' (default) or a single MM-DD date")
+    parser.add_argument('--workers', type=int, default=1, help='Parallel worker processes for all dates')
+    parser.add_argument('--full', action='store_true', help='Rescan every date instead of only changed ones')
+    parser.add_argument('--minify', action='store_true', default=OUTPUT_CONFIG['minify'],
+                        help='Write JSON without whitespace')
+    parser.add_argument('--compress', action='store_true', default=OUTPUT_CONFIG['precompress'],
+                        help='Write .gz and .br siblings at maximum compression')
+    parser.add_argument('--paged', action=argparse.BooleanOptionalAction, default=OUTPUT_CONFIG['paged'],
+                        help='Also write per-date summary, index and page files')
+    parser.add_argument('--field-slices', action=argparse.BooleanOptionalAction, default=OUTPUT_CONFIG['field_slices'],
+                        help='Also write per-(date, field) slices and fields/index.json')
+    parser.add_argument('--columnar', action=argparse.BooleanOptionalAction, default=OUTPUT_CONFIG['columnar'],
+                        help='Also write columnar/MM-DD.json (docs/COLUMNAR_FORMAT.md)')
+    parser.add_argument('--sampling-tables', action=argparse.BooleanOptionalAction,
+                        default=OUTPUT_CONFIG['sampling_tables'],
+                        help='Also write sampling/MM-DD.json weighted alias tables')
+    parser.add_argument('--birthday-twins', action=argparse.BooleanOptionalAction,
+                        default=OUTPUT_CONFIG['birthday_twins'],
+                        help='Also write twins/YYYY/MM-DD.json and twins/bitmap.json')
+    parser.add_argument('--deltas', action=argparse.BooleanOptionalAction, default=OUTPUT_CONFIG['deltas'],
+                        help='Also write deltas/ patches from the previous version of each rewritten date')
+    parser.add_argument('--search-index', action=argparse.BooleanOptionalAction,
+                        default=OUTPUT_CONFIG['search_index'],
+                        help='Rebuild the static search index in search/ after changes')
+    parser.add_argument('--msgpack', action=argparse.BooleanOptionalAction, default=OUTPUT_CONFIG['msgpack'],
+                        help='Also write MM-DD.msgpack (same payload as MM-DD.json)')
+    parser.add_argument('--budget-kb', type=int, default=OUTPUT_CONFIG['size_budget_kb'],
+                        help='Fail if any served JSON file is larger than this many KB')
+    parser.add_argument('--flip', action='store_true',
+                        help='Fully regenerate into the inactive buffer and swap public/data over to it')
+    args = parser.parse_args()
+
+    if args.msgpack and msgpack is None:
+        print("Error: --msgpack needs the msgpack package. Run: pip install msgpack")
+        sys.exit(1)
+
+    if args.flip and args.target != 'all':
+        print("Error: --flip regenerates every date, use it with 'all'")
+        sys.exit(1)
+
     # Connect to database
     database_url = os.getenv('DATABASE_URL')
     if not database_url:
@@ -203,29 +1378,54 @@ def main():
         print(f"✗ Database connection failed: {e}")
         sys.exit(1)
 
-    generator = JSONGenerator(db)
+    output_dir = None
+    if args.flip:
+        public_dir = os.path.join(os.getcwd(), 'public')
+        output_dir, active_dir = flip_buffers(public_dir)
+        if os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+        os.makedirs(output_dir)
+        # Carry the state over so the new buffer's watermark continues from the live one
+        if os.path.exists(state_path(active_dir)):
+            os.makedirs(os.path.dirname(state_path(output_dir)), exist_ok=True)
+            shutil.copy2(state_path(active_dir), state_path(output_dir))
+        elif os.path.exists(os.path.join(active_dir, STATE_FILE)):
+            shutil.copy2(os.path.join(active_dir, STATE_FILE), output_dir)
+        seed_previous_generation(active_dir, output_dir)
+        print(f"Building into {output_dir} (live: {active_dir})\n")
+
+    generator = JSONGenerator(db, minify=args.minify, paged=args.paged, field_slices=args.field_slices,
+                              columnar=args.columnar, sampling_tables=args.sampling_tables,
+                              msgpack_output=args.msgpack, search_index=args.search_index,
+                              birthday_twins=args.birthday_twins, deltas=args.deltas, output_dir=output_dir)
 
     # Determine what to generate
-    if len(sys.argv) > 1:
-        if sys.argv[1] == 'all':
-            # Generate all 366 files
-            generator.generate_all_files()
+    if args.target == 'all':
+        # Generate all 366 files (only the changed ones once a saved state exists)
+        generator.generate_all_files(args.workers, database_url, args.full or args.flip)
 
-        elif '-' in sys.argv[1]:
-            # Generate specific date (MM-DD format)
-            month, day = map(int, sys.argv[1].split('-'))
-            generator.generate_file_for_date(month, day)
-            print("\n✓ Done!")
+    elif '-' in args.target:
+        # Generate specific date (MM-DD format)
+        month, day = map(int, args.target.split('-'))
+        generator.generate_file_for_date(month, day)
+        print("\n✓ Done!")
 
-        else:
-            print("Usage: python generate_json.py [all|MM-DD]")
-            sys.exit(1)
     else:
-        # Default: generate all
-        generator.generate_all_files()
+        print("Usage: python generate_json.py [all|MM-DD] [options]  (see --help)")
+        sys.exit(1)
 
     db.close()
 
+    sizes = generator.compress_outputs(args.workers) if args.compress else generator.file_sizes()
+    if not size_report(sizes, args.budget_kb, generator.output_dir):
+        if args.flip:
+            print("Not publishing the new buffer")
+        sys.exit(1)
+
+    if args.flip:
+        publish_buffer(public_dir, output_dir)
+        print(f"\n✓ public/data now points at {os.path.basename(output_dir)}")
+
 
 if __name__ == "__main__":
     main()
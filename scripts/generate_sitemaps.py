@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Paper Birthdays - Sitemap Generation
+Writes public/sitemap.xml (a sitemap index) and gzip shards under public/sitemaps/
+covering the date pages (/jan-1) and every paper page (/jan-1/<slug>).
+
+Papers are streamed through a server-side cursor in (date, citations) order, so only
+the shard being built is held in memory. Slugs come from papers.slug (the computed
+slug the page falls back to while it's NULL) and lastmod from papers.updated_at. Paper shards follow the calendar: one per month, split into
+runs of consecutive days when a month has more than MAX_URLS papers, so a change only
+rewrites the shards of the dates it touches. Shards whose content hash matches the
+last run (public/sitemaps/state.json) aren't rewritten.
+
+Usage:
+    python scripts/generate_sitemaps.py           # Rewrite changed shards
+    python scripts/generate_sitemaps.py --full    # Rewrite every shard
+"""
+
+import os
+import sys
+import gzip
+import json
+import hashlib
+import argparse
+import psycopg2
+from datetime import datetime
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape
+from dotenv import load_dotenv
+
+from generate_json import ALL_MONTH_DAYS, atomic_write
+from ingestion_engine import paper_slug, table_columns
+
+load_dotenv()
+
+SITE_URL = os.getenv('NEXT_PUBLIC_SITE_URL', 'https://happybdaypaper.com').rstrip('/')
+
+# Protocol limit is 50,000 URLs per sitemap file
+MAX_URLS = 50000
+
+MONTH_ABBR = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+
+STATE_FILE = 'state.json'
+
+
+def page_filter(columns: Set[str]) -> str:
+    """
+    Pages only exist for papers getPapersForDate returns (lib/database.ts): canonical
+    papers (once migration 006 adds merged_into) with a venue
+    """
+    canonical = "merged_into IS NULL" if 'merged_into' in columns else "TRUE"
+    return f"""
+    {canonical}
+    AND venue IS NOT NULL
+    AND venue != 'Unknown Venue'
+    AND TRIM(venue) != ''
+"""
+
+
+# ============================================
+# URLs
+# ============================================
+
+def date_path(month_day: str) -> str:
+    """'08-08' -> 'aug-8', the format ShareModal and the birthday emails link to"""
+    month, day = month_day.split('-')
+    return f"{MONTH_ABBR[int(month) - 1]}-{int(day)}"
+
+
+# ============================================
+# Shard Planning
+# ============================================
+
+def plan_shards(counts: Dict[str, int]) -> List[Tuple[str, List[str]]]:
+    """(shard name, month-days) covering every date, each shard at most MAX_URLS papers"""
+    shards = []
+    for month in range(1, 13):
+        days = [md for md in ALL_MONTH_DAYS if md.startswith(f"{month:02d}-")]
+        parts: List[List[str]] = [[]]
+        size = 0
+        for month_day in days:
+            count = counts.get(month_day, 0)
+            if parts[-1] and count and size + count > MAX_URLS:
+                parts.append([])
+                size = 0
+            parts[-1].append(month_day)
+            size += count
+        for i, part in enumerate(parts):
+            suffix = f"-{i + 1}" if len(parts) > 1 else ''
+            shards.append((f"sitemap-{month:02d}{suffix}.xml.gz", part))
+    return shards
+
+
+def render_urlset(urls: List[Tuple[str, Optional[datetime]]]) -> bytes:
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for loc, lastmod in urls:
+        entry = f"<url><loc>{escape(loc)}</loc>"
+        if lastmod:
+            entry += f"<lastmod>{lastmod.date().isoformat()}</lastmod>"
+        lines.append(entry + "</url>")
+    lines.append('</urlset>')
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def render_index(shards: List[Tuple[str, Optional[datetime]]]) -> bytes:
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for name, lastmod in shards:
+        entry = f"<sitemap><loc>{SITE_URL}/sitemaps/{name}</loc>"
+        if lastmod:
+            entry += f"<lastmod>{lastmod.date().isoformat()}</lastmod>"
+        lines.append(entry + "</sitemap>")
+    lines.append('</sitemapindex>')
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def read_bytes(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+# ============================================
+# Generator
+# ============================================
+
+class SitemapGenerator:
+    """Streams papers into calendar-ordered sitemap shards"""
+
+    def __init__(self, db_connection, public_dir: str):
+        self.db = db_connection
+        self.public_dir = public_dir
+
+        cursor = self.db.cursor()
+        self.columns = table_columns(cursor)
+        cursor.close()
+        self.page_filter = page_filter(self.columns)
+        self.sitemap_dir = os.path.join(public_dir, 'sitemaps')
+        os.makedirs(self.sitemap_dir, exist_ok=True)
+        self.state = self.load_state()
+        self.new_state: Dict[str, Dict] = {}
+        self.written = 0
+
+    def date_stats(self) -> Dict[str, Tuple[int, Optional[datetime]]]:
+        """Papers with a page and the newest updated_at, per month-day"""
+        cursor = self.db.cursor()
+        cursor.execute(f"""
+            SELECT publication_month_day, COUNT(*), MAX(updated_at)
+            FROM papers
+            WHERE {self.page_filter}
+            GROUP BY publication_month_day
+        """)
+        stats = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        cursor.close()
+        return stats
+
+    def stream_paper_urls(self) -> Iterator[Tuple[str, List[Tuple[str, Optional[datetime]]]]]:
+        """(month_day, [(url, lastmod)]) in calendar order"""
+        slug = 'slug' if 'slug' in self.columns else 'NULL'
+        cursor = self.db.cursor(name='generate_sitemaps')
+        cursor.itersize = 10000
+        cursor.execute(f"""
+            SELECT publication_month_day, {slug}, title, year, updated_at
+            FROM papers
+            WHERE {self.page_filter}
+            ORDER BY publication_month_day, citation_count DESC
+        """)
+
+        for month_day, rows in groupby(cursor, key=lambda row: row[0]):
+            urls = []
+            prefix = f"{SITE_URL}/{date_path(month_day)}/" if month_day in ALL_MONTH_DAYS else None
+            for _, slug, title, year, updated_at in rows:
+                # Slugs are assigned on write (or by scripts/backfill_slugs.py); until then the
+                # page resolves the computed one
+                if prefix:
+                    urls.append((prefix + (slug or paper_slug(title, year)), updated_at))
+            yield month_day, urls
+
+        cursor.close()
+
+    def write_shard(self, name: str, urls: List[Tuple[str, Optional[datetime]]], full: bool) -> Optional[datetime]:
+        """Write one gzip shard unless its content is unchanged. Returns its lastmod."""
+        payload = render_urlset(urls)
+        digest = hashlib.sha256(payload).hexdigest()[:16]
+        lastmod = max((m for _, m in urls if m), default=None)
+        path = os.path.join(self.sitemap_dir, name)
+
+        previous = self.state.get('shards', {}).get(name, {})
+        if full or previous.get('hash') != digest or not os.path.exists(path):
+            atomic_write(path, gzip.compress(payload, compresslevel=9, mtime=0))
+            self.written += 1
+            print(f"  {name}: {len(urls):,} URLs")
+        self.new_state[name] = {'hash': digest, 'urls': len(urls),
+                                'lastmod': lastmod.isoformat() if lastmod else None}
+        return lastmod
+
+    def generate(self, full: bool = False):
+        stats = self.date_stats()
+        counts = {md: count for md, (count, _) in stats.items()}
+        plan = plan_shards(counts)
+        shard_of = {md: name for name, days in plan for md in days}
+        index: List[Tuple[str, Optional[datetime]]] = []
+
+        # Date pages, plus the home page
+        date_urls = [(f"{SITE_URL}/", None)] + [
+            (f"{SITE_URL}/{date_path(md)}", stats.get(md, (0, None))[1]) for md in ALL_MONTH_DAYS
+        ]
+        index.append(('sitemap-dates.xml.gz', self.write_shard('sitemap-dates.xml.gz', date_urls, full)))
+
+        # Paper pages: the stream and the plan are both in calendar order
+        stream = self.stream_paper_urls()
+        pending = next(stream, None)
+        for name, days in plan:
+            urls = []
+            while pending and (pending[0] in days or pending[0] not in shard_of):
+                if pending[0] in days:
+                    urls.extend(pending[1])
+                pending = next(stream, None)
+            if urls:
+                index.append((name, self.write_shard(name, urls, full)))
+
+        # Shards from an earlier plan (a month that was split, or no longer is)
+        for name in os.listdir(self.sitemap_dir):
+            if name.endswith('.xml.gz') and name not in self.new_state:
+                os.remove(os.path.join(self.sitemap_dir, name))
+                print(f"  {name}: removed")
+
+        index_payload = render_index(index)
+        index_path = os.path.join(self.public_dir, 'sitemap.xml')
+        if full or not os.path.exists(index_path) or read_bytes(index_path) != index_payload:
+            atomic_write(index_path, index_payload)
+
+        self.save_state()
+        total = sum(shard['urls'] for shard in self.new_state.values())
+        print(f"\n✓ {total:,} URLs in {len(self.new_state)} shards ({self.written} rewritten)")
+
+    def load_state(self) -> Dict:
+        path = os.path.join(self.sitemap_dir, STATE_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_state(self):
+        state = {'generated_at': datetime.now().isoformat(), 'shards': dict(sorted(self.new_state.items()))}
+        atomic_write(os.path.join(self.sitemap_dir, STATE_FILE), json.dumps(state, indent=2).encode('utf-8'))
+
+
+# ============================================
+# Main
+# ============================================
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Generate the sitemap index and shards')
+    parser.add_argument('--full', action='store_true', help='Rewrite every shard, changed or not')
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("ERROR: DATABASE_URL not set")
+        sys.exit(1)
+
+    try:
+        db = psycopg2.connect(database_url)
+        print("✓ Connected to database")
+    except Exception as e:
+        print(f"✗ Database connection failed: {e}")
+        sys.exit(1)
+
+    print(f"\n🗺️  Generating sitemaps for {SITE_URL}...\n")
+    generator = SitemapGenerator(db, os.path.join(os.getcwd(), 'public'))
+    generator.generate(args.full)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Paper Birthdays - Incremental arXiv OAI-PMH Harvester
+Follows resumptionTokens through ListRecords for each configured arXiv set, parsing the
+XML stream record by record (constant memory). The last `from` datestamp is kept in
+source_metadata so each run only pulls new or changed records.
+
+Records are written in batches keyed on arxiv_id: papers we already store get the arXiv
+PDF link, abstract and arxiv_id. arXiv has no citation counts, so arXiv-only papers are
+only inserted with --insert-new, and only with at least --min-citations citations
+(ARXIV_CONFIG['min_citations_to_insert']); uncited ones are held back rather than
+competing for each day's top 1000 with 0 citations.
+
+Usage:
+    python scripts/ingest_arxiv.py                        # Incremental from last run
+    python scripts/ingest_arxiv.py --from 2024-01-01      # Explicit start datestamp
+    python scripts/ingest_arxiv.py --oai-base http://localhost:8000/oai2  # Local stand-in
+    python scripts/ingest_arxiv.py --insert-new --min-citations 0         # Insert uncited papers too
+"""
+
+import os
+import sys
+import time
+import argparse
+import psycopg2
+import requests
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+from config import ARXIV_CONFIG, UPDATE_CONFIG
+from ingestion_engine import (
+    AdmissionThresholds, BatchWriter, FieldNormalizer, PaperRecord,
+    get_last_incremental_update, load_field_mappings, record_incremental_update,
+    split_publication_date
+)
+
+load_dotenv()
+
+OAI_NS = '{http://www.openarchives.org/OAI/2.0/}'
+ARXIV_NS = '{http://arxiv.org/OAI/arXiv/}'
+
+# arXiv archive -> field name understood by FieldNormalizer
+ARCHIVE_FIELDS = {
+    'cs': 'Computer Science',
+    'math': 'Mathematics',
+    'stat': 'Statistics',
+    'q-bio': 'Biology',
+    'q-fin': 'Finance',
+    'econ': 'Economics',
+    'eess': 'Electrical Engineering',
+}
+PHYSICS_ARCHIVES = {
+    'physics', 'astro-ph', 'cond-mat', 'gr-qc', 'hep-ex', 'hep-lat', 'hep-ph',
+    'hep-th', 'math-ph', 'nlin', 'nucl-ex', 'nucl-th', 'quant-ph',
+}
+
+
+def archive_of(category: str) -> str:
+    """'cs.AI' -> 'cs', 'astro-ph.GA' -> 'astro-ph', 'hep-th' -> 'hep-th'"""
+    return category.split('.', 1)[0]
+
+
+def oai_set_for(category: str) -> str:
+    """OAI setSpec that contains a category ('cs.AI' -> 'cs', 'hep-th' -> 'physics:hep-th')"""
+    archive = archive_of(category)
+    if archive in PHYSICS_ARCHIVES and archive != 'physics':
+        return f"physics:{archive}"
+    return archive
+
+
+def oai_sets(categories: List[str]) -> List[str]:
+    """
+    OAI sets to harvest for the categories, dropping any set whose parent is also
+    harvested ('physics' already contains 'physics:hep-th'), so no record is fetched twice
+    """
+    sets = {oai_set_for(c) for c in categories}
+    return sorted(s for s in sets if s.split(':', 1)[0] == s or s.split(':', 1)[0] not in sets)
+
+
+def category_matches(record_categories: List[str], wanted: List[str]) -> bool:
+    """True if any record category is, or falls under, a configured category"""
+    for category in record_categories:
+        for want in wanted:
+            if category == want or category.startswith(want + '.') or archive_of(category) == want:
+                return True
+    return False
+
+
+# ============================================
+# OAI-PMH Streaming
+# ============================================
+
+def _text(elem, path: str) -> Optional[str]:
+    """Whitespace-normalized text of a child element"""
+    child = elem.find(path)
+    if child is None or child.text is None:
+        return None
+    return ' '.join(child.text.split())
+
+
+def parse_record(record) -> Optional[Dict]:
+    """Turn an OAI <record> with arXiv metadata into a dict (None for deleted records)"""
+    header = record.find(f'{OAI_NS}header')
+    if header is None or header.get('status') == 'deleted':
+        return None
+
+    meta = record.find(f'{OAI_NS}metadata/{ARXIV_NS}arXiv')
+    if meta is None:
+        return None
+
+    authors = []
+    for author in meta.iterfind(f'{ARXIV_NS}authors/{ARXIV_NS}author'):
+        name = ' '.join(filter(None, [_text(author, f'{ARXIV_NS}forenames'), _text(author, f'{ARXIV_NS}keyname')]))
+        if name:
+            authors.append(name)
+
+    return {
+        'arxiv_id': _text(meta, f'{ARXIV_NS}id'),
+        'datestamp': _text(header, f'{OAI_NS}datestamp'),
+        'created': _text(meta, f'{ARXIV_NS}created'),
+        'title': _text(meta, f'{ARXIV_NS}title'),
+        'abstract': _text(meta, f'{ARXIV_NS}abstract'),
+        'authors': authors,
+        'categories': (_text(meta, f'{ARXIV_NS}categories') or '').split(),
+        'doi': _text(meta, f'{ARXIV_NS}doi'),
+    }
+
+
+def fetch_page(oai_base: str, params: Dict, max_retries: int = 5):
+    """GET one ListRecords page as a raw stream, honouring 503 Retry-After"""
+    for attempt in range(max_retries):
+        response = requests.get(oai_base, params=params, stream=True, timeout=120)
+        if response.status_code == 503:
+            wait_time = int(response.headers.get('Retry-After', 30))
+            print(f"  Server busy, retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})")
+            response.close()
+            time.sleep(wait_time)
+            continue
+        response.raise_for_status()
+        response.raw.decode_content = True
+        return response.raw
+    raise RuntimeError(f"OAI server unavailable after {max_retries} attempts")
+
+
+def harvest(oai_base: str, set_spec: str, from_date: Optional[str] = None,
+            delay: float = 3.0) -> Iterator[Dict]:
+    """
+    Yield parsed records for a set, following resumptionTokens until the list is complete.
+
+    Each page is parsed with iterparse and every <record> is cleared from the tree as
+    soon as it has been yielded, so memory stays flat regardless of page size.
+    """
+    params = {'verb': 'ListRecords', 'metadataPrefix': 'arXiv', 'set': set_spec}
+    if from_date:
+        params['from'] = from_date
+
+    while True:
+        token = None
+        container = None
+
+        for event, elem in ET.iterparse(fetch_page(oai_base, params), events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == f'{OAI_NS}ListRecords':
+                    container = elem
+                continue
+
+            if elem.tag == f'{OAI_NS}record':
+                parsed = parse_record(elem)
+                if parsed:
+                    yield parsed
+                if container is not None:
+                    container.clear()
+            elif elem.tag == f'{OAI_NS}resumptionToken':
+                token = (elem.text or '').strip() or None
+            elif elem.tag == f'{OAI_NS}error':
+                if elem.get('code') == 'noRecordsMatch':
+                    return
+                raise RuntimeError(f"OAI error {elem.get('code')}: {elem.text}")
+
+        if not token:
+            return
+
+        params = {'verb': 'ListRecords', 'resumptionToken': token}
+        time.sleep(delay)  # arXiv asks harvesters to pause between requests
+
+
+# ============================================
+# Writing
+# ============================================
+
+def record_from_arxiv(entry: Dict, normalizer: FieldNormalizer) -> Optional[PaperRecord]:
+    """Build a record from a harvested entry (None if incomplete)"""
+    arxiv_id = entry.get('arxiv_id')
+    parsed = split_publication_date(entry.get('created'))
+    if not arxiv_id or not entry.get('title') or not parsed:
+        return None
+    month_day, year = parsed
+
+    fields = []
+    for category in entry['categories']:
+        archive = archive_of(category)
+        name = 'Physics' if archive in PHYSICS_ARCHIVES else ARCHIVE_FIELDS.get(archive)
+        if name and name not in fields:
+            fields.append(name)
+
+    return PaperRecord(
+        paper_id=f"arxiv:{arxiv_id}",
+        source='arxiv',
+        title=entry['title'],
+        abstract=entry.get('abstract'),
+        authors=entry['authors'],
+        author_count=len(entry['authors']),
+        publication_date=entry['created'],
+        publication_month_day=month_day,
+        year=year,
+        venue='arXiv',
+        field=normalizer.normalize(fields),
+        fields_of_study=fields,
+        doi=entry.get('doi'),
+        url=f"https://arxiv.org/abs/{arxiv_id}",
+        pdf_url=f"{ARXIV_CONFIG['pdf_base']}/{arxiv_id}",
+        is_open_access=True,
+        arxiv_id=arxiv_id,
+    )
+
+
+def update_existing(db_connection, records: List[PaperRecord]) -> set:
+    """Apply arXiv fields to stored papers with the same arxiv_id; return the ids matched"""
+    if not records:
+        return set()
+
+    cursor = db_connection.cursor()
+    rows = execute_values(cursor, """
+        UPDATE papers AS p SET
+            pdf_url = v.pdf_url,
+            abstract = COALESCE(p.abstract, v.abstract),
+            is_open_access = TRUE,
+            updated_at = NOW()
+        FROM (VALUES %s) AS v(arxiv_id, pdf_url, abstract)
+        WHERE p.arxiv_id = v.arxiv_id
+        RETURNING v.arxiv_id
+    """, [(r.arxiv_id, r.pdf_url, r.abstract) for r in records], fetch=True)
+    db_connection.commit()
+    cursor.close()
+    return {row[0] for row in rows}
+
+
+class ArxivBatchWriter:
+    """Buffers harvested records and writes them keyed on arxiv_id"""
+
+    def __init__(self, db_connection, insert_new: bool, batch_size: int, min_citations: int = 1):
+        self.db = db_connection
+        self.batch_size = batch_size
+        self.min_citations = min_citations
+        self.buffer: List[PaperRecord] = []
+        self.updated = 0
+        self.held_back = 0
+        self.new_writer = None
+        if insert_new:
+            self.new_writer = BatchWriter(db_connection, batch_size, AdmissionThresholds.load(db_connection))
+
+    def add(self, record: Optional[PaperRecord]) -> None:
+        if record is None:
+            return
+        self.buffer.append(record)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        batch, self.buffer = self.buffer, []
+        matched = update_existing(self.db, batch)
+        self.updated += len(matched)
+        if self.new_writer is not None:
+            new = [r for r in batch if r.arxiv_id not in matched]
+            cited = [r for r in new if r.citation_count >= self.min_citations]
+            self.held_back += len(new) - len(cited)
+            self.new_writer.add_many(cited)
+            self.new_writer.flush()
+
+    def close(self) -> None:
+        """Flush and refresh the admission thresholds of the days inserted into"""
+        self.flush()
+        if self.new_writer is not None:
+            self.new_writer.close()
+
+    def discard(self) -> None:
+        """Drop the partial batch of a set that failed (it's harvested again next run)"""
+        self.buffer = []
+        if self.new_writer is not None:
+            self.new_writer.discard()
+
+    @property
+    def inserted(self) -> int:
+        return self.new_writer.written if self.new_writer else 0
+
+    @property
+    def failed(self) -> int:
+        return self.new_writer.failed if self.new_writer else 0
+
+
+# ============================================
+# Main
+# ============================================
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Harvest arXiv metadata over OAI-PMH')
+    parser.add_argument('--from', dest='from_date', help='Start datestamp YYYY-MM-DD (default: last run)')
+    parser.add_argument('--oai-base', default=ARXIV_CONFIG['oai_base'], help='OAI-PMH endpoint')
+    parser.add_argument('--insert-new', action='store_true', help='Also insert papers we do not store yet')
+    parser.add_argument('--min-citations', type=int, default=ARXIV_CONFIG['min_citations_to_insert'],
+                        help='With --insert-new, hold back papers with fewer citations')
+    parser.add_argument('--delay', type=float, default=3.0, help='Seconds between OAI requests')
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("ERROR: DATABASE_URL not set")
+        sys.exit(1)
+
+    try:
+        db = psycopg2.connect(database_url)
+        print("✓ Connected to database")
+    except Exception as e:
+        print(f"✗ Database connection failed: {e}")
+        sys.exit(1)
+
+    from_date = args.from_date
+    if not from_date:
+        last_update = get_last_incremental_update(db, 'arxiv')
+        from_date = last_update.strftime('%Y-%m-%d') if last_update else None
+    # Naive UTC, like the TIMESTAMP watermark column and OAI datestamps
+    harvest_started = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    categories = ARXIV_CONFIG['categories']
+    sets = oai_sets(categories)
+    print(f"\n🚀 Harvesting {len(sets)} sets from {args.oai_base} (from: {from_date or 'the beginning'})")
+    print("=" * 70)
+
+    normalizer = FieldNormalizer(load_field_mappings(db))
+    writer = ArxivBatchWriter(db, args.insert_new, UPDATE_CONFIG['batch_size_arxiv'], args.min_citations)
+    seen = 0
+    failed_sets = []
+
+    for set_spec in sets:
+        print(f"\n📚 Set {set_spec}")
+        try:
+            for entry in harvest(args.oai_base, set_spec, from_date, args.delay):
+                seen += 1
+                if category_matches(entry['categories'], categories):
+                    writer.add(record_from_arxiv(entry, normalizer))
+                if seen % 10000 == 0:
+                    print(f"  Harvested: {seen:,} | Updated: {writer.updated:,} | Inserted: {writer.inserted:,}", end='\r')
+            writer.flush()
+        except Exception as e:
+            db.rollback()
+            writer.discard()
+            failed_sets.append(set_spec)
+            print(f"\n  ❌ Harvest of {set_spec} failed: {e}")
+
+    writer.close()
+
+    # Only move the watermark if every set was harvested completely
+    if failed_sets:
+        print(f"\n⚠️  {len(failed_sets)} sets failed; keeping the previous `from` datestamp")
+    else:
+        record_incremental_update(db, 'arxiv', 'arXiv', harvest_started)
+        print(f"\n✓ Next run will harvest from {harvest_started.strftime('%Y-%m-%d')}")
+
+    db.close()
+
+    print("\n" + "=" * 70)
+    print(f"✓ COMPLETE! Harvested {seen:,} records | Updated: {writer.updated:,} | Inserted: {writer.inserted:,} | Failed: {writer.failed:,}")
+    if writer.held_back:
+        print(f"  Held back (fewer than {args.min_citations} citations): {writer.held_back:,}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
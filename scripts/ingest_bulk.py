@@ -13,61 +13,27 @@ from datetime import datetime
 from dotenv import load_dotenv
 import time
 
-load_dotenv()
-
+from ingestion_engine import (
+    AdmissionThresholds, BatchWriter, FieldNormalizer, load_field_mappings, record_from_bulk
+)
 
-def normalize_field(fields_of_study):
-    """Map diverse field names to canonical categories"""
-    if not fields_of_study:
-        return 'Other'
-
-    field_mapping = {
-        'Medicine': ['Medicine'],
-        'Biology': ['Biology'],
-        'Computer Science': ['Computer Science'],
-        'Economics': ['Economics', 'Business'],
-        'Physics': ['Physics'],
-        'Mathematics': ['Mathematics'],
-        'Psychology': ['Psychology'],
-        'Engineering': ['Engineering'],
-        'Chemistry': ['Chemistry', 'Materials Science'],
-        'Environmental Science': ['Environmental Science', 'Geology', 'Geography'],
-        'Political Science': ['Political Science', 'Sociology'],
-        'Art': ['Art'],
-        'Philosophy': ['Philosophy'],
-        'History': ['History'],
-    }
-
-    # Use the FIRST field (primary field) instead of all fields
-    # This prevents misclassification when Medicine is a secondary field
-    primary_field = fields_of_study[0]
-    if isinstance(primary_field, dict):
-        field_name = primary_field.get('category', '')
-    else:
-        field_name = str(primary_field)
-
-    for category, keywords in field_mapping.items():
-        for keyword in keywords:
-            if keyword.lower() in field_name.lower():
-                return category
-
-    return 'Other'
+load_dotenv()
 
 
 def process_file_streaming(url, db_connection, file_num, total_files):
     """Download and process a single file, streaming line by line"""
 
-    cursor = db_connection.cursor()
+    normalizer = FieldNormalizer(load_field_mappings(db_connection))
 
     print(f"\n[{file_num}/{total_files}] Downloading and processing...")
 
     # Retry entire file processing if connection breaks
     max_file_retries = 5
     total_papers = 0
-    inserted_papers = 0
     papers_with_dates = 0
 
     for file_attempt in range(max_file_retries):
+        writer = BatchWriter(db_connection, admission=AdmissionThresholds.load(db_connection))
         try:
             # Stream download the gzipped file with retries
             max_retries = 3
@@ -102,92 +68,17 @@ def process_file_streaming(url, db_connection, file_num, total_files):
 
                     papers_with_dates += 1
 
-                    # Extract month-day
-                    try:
-                        parts = pub_date.split('-')
-                        if len(parts) != 3:
-                            continue
-                        month_day = f"{parts[1]}-{parts[2]}"
-                        year = int(parts[0])
-                    except:
-                        continue
-
                     # Filter by citation count
                     citation_count = paper.get('citationcount', 0) or 0
                     if citation_count <= 10:
                         continue
 
-                    # Get fields (handle None)
-                    fields = paper.get('s2fieldsofstudy') or []
+                    # Batched upsert (pdf_url is not in the bulk dataset)
+                    writer.add(record_from_bulk(paper, normalizer))
 
-                    # Extract paper ID
-                    paper_id = paper.get('corpusid')
-                    if not paper_id:
-                        continue
-
-                    # Get title
-                    title = paper.get('title')
-                    if not title:
-                        continue
-
-                    # Get venue
-                    venue = paper.get('venue') or (paper.get('journal', {}) or {}).get('name', 'Unknown Venue')
-
-                    # Get authors (handle None)
-                    authors = paper.get('authors') or []
-                    author_count = len(authors)
-
-                    # Get DOI
-                    external_ids = paper.get('externalids', {}) or {}
-                    doi = external_ids.get('DOI')
-
-                    # Get URL
-                    url_field = paper.get('url') or f"https://www.semanticscholar.org/paper/{paper_id}"
-
-                    # Insert into database
-                    try:
-                        cursor.execute("""
-                            INSERT INTO papers (
-                                paper_id, source, title, author_count,
-                                publication_date, publication_month_day, year,
-                                venue, field, fields_of_study, citation_count,
-                                doi, url, pdf_url, is_open_access
-                            ) VALUES (
-                                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                            )
-                            ON CONFLICT (paper_id) DO UPDATE SET
-                                citation_count = EXCLUDED.citation_count,
-                                updated_at = NOW()
-                        """, (
-                            str(paper_id),
-                            'semantic_scholar',
-                            title,
-                            author_count,
-                            pub_date,
-                            month_day,
-                            year,
-                            venue,
-                            normalize_field(fields),
-                            [f.get('category') if isinstance(f, dict) else str(f) for f in fields][:10],
-                            citation_count,
-                            doi,
-                            url_field,
-                            None,  # pdf_url not in bulk dataset
-                            False   # is_open_access
-                        ))
-                        inserted_papers += 1
-
-                        # Commit every 1000 papers
-                        if inserted_papers % 1000 == 0:
-                            db_connection.commit()
-                            print(f"  Processed: {total_papers:,} | With dates: {papers_with_dates:,} | Inserted: {inserted_papers:,}", end='\r')
-
-                    except Exception as e:
-                        # Rollback on error and continue
-                        db_connection.rollback()
-                        if 'duplicate key' not in str(e):
-                            print(f"\n  Error inserting paper {paper_id}: {e}")
-                        continue
+                    # Buffer is only empty right after a flush (every 1000 papers)
+                    if not writer.buffer and writer.written:
+                        print(f"  Processed: {total_papers:,} | With dates: {papers_with_dates:,} | Inserted: {writer.written:,}", end='\r')
 
                 except json.JSONDecodeError:
                     continue
@@ -196,9 +87,9 @@ def process_file_streaming(url, db_connection, file_num, total_files):
                     continue
 
             # Final commit for this attempt
-            db_connection.commit()
-            print(f"\n  ✓ File complete - Total: {total_papers:,} | With dates: {papers_with_dates:,} | Inserted: {inserted_papers:,}")
-            return inserted_papers
+            writer.close()
+            print(f"\n  ✓ File complete - Total: {total_papers:,} | With dates: {papers_with_dates:,} | Inserted: {writer.written:,} | Below threshold: {writer.rejected:,} | Failed: {writer.failed:,}")
+            return writer.written
 
         except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, Exception) as e:
             if file_attempt < max_file_retries - 1:
@@ -207,14 +98,13 @@ def process_file_streaming(url, db_connection, file_num, total_files):
                 time.sleep(wait_time)
                 # Reset counters for retry
                 total_papers = 0
-                inserted_papers = 0
                 papers_with_dates = 0
             else:
                 print(f"\n  ❌ Failed after {max_file_retries} attempts: {e}")
                 db_connection.commit()  # Commit what we have
-                return inserted_papers
+                return writer.written
 
-    return inserted_papers
+    return 0
 
 
 def main():
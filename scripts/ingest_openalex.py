@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Paper Birthdays - OpenAlex Snapshot Ingestion
+Processes the `updated_date=` partitioned works files of the OpenAlex snapshot in parallel.
+Partitions older than source_metadata.last_incremental_update are skipped, so after the
+first full run each run only reads what OpenAlex changed since the last one. Works whose
+DOI is already stored update that paper instead of adding a second row.
+
+Usage:
+    python scripts/ingest_openalex.py                         # Read from the public S3 snapshot
+    python scripts/ingest_openalex.py --snapshot-dir ~/openalex  # Read a local `aws s3 sync` copy
+    python scripts/ingest_openalex.py --workers 8 --full       # Ignore the watermark
+"""
+
+import os
+import re
+import sys
+import glob
+import gzip
+import json
+import argparse
+import psycopg2
+import requests
+from contextlib import contextmanager
+from datetime import datetime
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+from dotenv import load_dotenv
+
+from config import OPENALEX_CONFIG
+from ingestion_engine import (
+    AdmissionThresholds, BatchWriter, FieldNormalizer, PaperRecord,
+    get_last_incremental_update, load_field_mappings, record_incremental_update,
+    split_publication_date
+)
+
+load_dotenv()
+
+PARTITION_RE = re.compile(r'updated_date=(\d{4}-\d{2}-\d{2})/')
+
+
+# ============================================
+# Record Mapping
+# ============================================
+
+def short_id(url: Optional[str]) -> Optional[str]:
+    """'https://openalex.org/W123' -> 'W123'"""
+    return url.rsplit('/', 1)[-1] if url else None
+
+
+def strip_doi(doi: Optional[str]) -> Optional[str]:
+    """'https://doi.org/10.1/x' -> '10.1/x'"""
+    if not doi:
+        return None
+    return doi[len('https://doi.org/'):] if doi.startswith('https://doi.org/') else doi
+
+
+def rebuild_abstract(inverted_index: Optional[Dict[str, List[int]]]) -> Optional[str]:
+    """OpenAlex ships abstracts as {word: [positions]}; put the words back in order"""
+    if not inverted_index:
+        return None
+    positions = [(pos, word) for word, indexes in inverted_index.items() for pos in indexes]
+    positions.sort()
+    return ' '.join(word for _, word in positions)
+
+
+def fields_of_study(work: Dict) -> List[str]:
+    """Primary topic field first, then level-0 concepts by score"""
+    fields = []
+    field = ((work.get('primary_topic') or {}).get('field') or {}).get('display_name')
+    if field:
+        fields.append(field)
+
+    concepts = [c for c in (work.get('concepts') or []) if c.get('level') == 0]
+    concepts.sort(key=lambda c: c.get('score') or 0, reverse=True)
+    for concept in concepts:
+        name = concept.get('display_name')
+        if name and name not in fields:
+            fields.append(name)
+    return fields[:10]
+
+
+def record_from_openalex(work: Dict, normalizer: FieldNormalizer) -> Optional[PaperRecord]:
+    """Build a record from an OpenAlex work (None if incomplete)"""
+    openalex_id = short_id(work.get('id'))
+    title = work.get('title') or work.get('display_name')
+    pub_date = work.get('publication_date')
+    parsed = split_publication_date(pub_date)
+    if not openalex_id or not title or not parsed:
+        return None
+    month_day, year = parsed
+
+    authorships = work.get('authorships') or []
+    primary_location = work.get('primary_location') or {}
+    venue_source = primary_location.get('source') or {}
+    open_access = work.get('open_access') or {}
+    ids = work.get('ids') or {}
+    fields = fields_of_study(work)
+
+    return PaperRecord(
+        paper_id=openalex_id,
+        source='openalex',
+        title=title,
+        abstract=rebuild_abstract(work.get('abstract_inverted_index')),
+        authors=[
+            (a.get('author') or {}).get('display_name')
+            for a in authorships if (a.get('author') or {}).get('display_name')
+        ],
+        author_count=len(authorships),
+        publication_date=pub_date,
+        publication_month_day=month_day,
+        year=year,
+        venue=venue_source.get('display_name'),
+        field=normalizer.normalize(fields),
+        fields_of_study=fields,
+        citation_count=work.get('cited_by_count', 0) or 0,
+        reference_count=work.get('referenced_works_count', 0) or 0,
+        doi=strip_doi(work.get('doi')),
+        url=work.get('id'),
+        pdf_url=primary_location.get('pdf_url') or open_access.get('oa_url'),
+        is_open_access=bool(open_access.get('is_oa')),
+        pubmed_id=short_id(ids.get('pmid')),
+        openalex_id=openalex_id,
+    )
+
+
+# ============================================
+# Partition Discovery
+# ============================================
+
+def list_partition_files(snapshot_dir: Optional[str]) -> List[Tuple[str, str]]:
+    """All (updated_date, file) pairs in the snapshot, oldest partition first"""
+    if snapshot_dir:
+        pattern = os.path.join(snapshot_dir, 'data', 'works', 'updated_date=*', '*.gz')
+        files = glob.glob(pattern)
+    else:
+        manifest_url = f"{OPENALEX_CONFIG['snapshot_base']}/{OPENALEX_CONFIG['snapshot_manifest']}"
+        with requests.get(manifest_url, timeout=60) as response:
+            response.raise_for_status()
+            entries = response.json().get('entries', [])
+        files = [entry['url'].replace('s3://openalex', OPENALEX_CONFIG['snapshot_base']) for entry in entries]
+
+    partitions = []
+    for path in files:
+        match = PARTITION_RE.search(path.replace(os.sep, '/'))
+        if match:
+            partitions.append((match.group(1), path))
+    partitions.sort()
+    return partitions
+
+
+@contextmanager
+def open_partition_file(path: str) -> Iterator[TextIO]:
+    """Line iterator over a local or remote gzip works file, closed (with its HTTP response) on exit"""
+    if not path.startswith('http'):
+        with gzip.open(path, 'rt', encoding='utf-8') as lines:
+            yield lines
+        return
+    with requests.get(path, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        with gzip.open(response.raw, 'rt', encoding='utf-8') as lines:
+            yield lines
+
+
+# ============================================
+# Parallel Workers
+# ============================================
+
+_worker_db = None
+_worker_normalizer = None
+
+
+def init_worker(database_url: str):
+    """Give each worker process its own connection and normalizer"""
+    global _worker_db, _worker_normalizer
+    _worker_db = psycopg2.connect(database_url)
+    _worker_normalizer = FieldNormalizer(load_field_mappings(_worker_db))
+
+
+def process_partition_file(task: Tuple[str, str]) -> Dict:
+    """Stream one works file through the date/citation filters and the batched writer"""
+    updated_date, path = task
+    stats = {'updated_date': updated_date, 'path': path, 'scanned': 0, 'written': 0,
+             'rejected': 0, 'failed': 0, 'error': None}
+
+    writer = BatchWriter(_worker_db, admission=AdmissionThresholds.load(_worker_db))
+    try:
+        with open_partition_file(path) as lines:
+            for line in lines:
+                stats['scanned'] += 1
+                try:
+                    work = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                # Same filters as the Semantic Scholar ingesters
+                if (work.get('cited_by_count') or 0) <= 10:
+                    continue
+                if work.get('is_retracted') or work.get('is_paratext'):
+                    continue
+
+                # Works whose DOI we already store (e.g. from Semantic Scholar) update that
+                # row and fill in its openalex_id; see ingestion_engine.resolve_dois
+                writer.add(record_from_openalex(work, _worker_normalizer))
+
+        writer.close()
+    except Exception as e:
+        _worker_db.rollback()
+        stats['error'] = str(e)
+
+    stats['written'] = writer.written
+    stats['rejected'] = writer.rejected
+    stats['failed'] = writer.failed
+    return stats
+
+
+# ============================================
+# Main
+# ============================================
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Ingest the OpenAlex works snapshot')
+    parser.add_argument('--snapshot-dir', help='Local copy of s3://openalex (default: stream from S3)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help='Parallel worker processes')
+    parser.add_argument('--full', action='store_true', help='Ignore the last incremental update watermark')
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("ERROR: DATABASE_URL not set")
+        sys.exit(1)
+
+    try:
+        db = psycopg2.connect(database_url)
+        print("✓ Connected to database")
+    except Exception as e:
+        print(f"✗ Database connection failed: {e}")
+        sys.exit(1)
+
+    last_update = None if args.full else get_last_incremental_update(db, 'openalex')
+    partitions = list_partition_files(args.snapshot_dir)
+
+    # A partition dated on the watermark day may have been written after our last run, so keep it
+    if last_update:
+        cutoff = last_update.strftime('%Y-%m-%d')
+        partitions = [(d, path) for d, path in partitions if d >= cutoff]
+        print(f"✓ Last incremental update: {cutoff}")
+
+    if not partitions:
+        print("✓ Nothing new in the snapshot")
+        db.close()
+        return
+
+    dates = sorted({d for d, _ in partitions})
+    print(f"\n🚀 Processing {len(partitions)} files from {len(dates)} partitions "
+          f"({dates[0]} → {dates[-1]}) with {args.workers} workers")
+    print("=" * 70)
+
+    results = []
+    with Pool(args.workers, initializer=init_worker, initargs=(database_url,)) as pool:
+        for i, stats in enumerate(pool.imap_unordered(process_partition_file, partitions), 1):
+            results.append(stats)
+            status = f"❌ {stats['error']}" if stats['error'] else '✓'
+            print(f"  [{i}/{len(partitions)}] {stats['updated_date']} {os.path.basename(stats['path'])}: "
+                  f"scanned {stats['scanned']:,}, written {stats['written']:,}, "
+                  f"below threshold {stats['rejected']:,}, failed {stats['failed']:,} {status}")
+
+    # Advance the watermark only through the last partition with no failed files
+    failed_dates = {r['updated_date'] for r in results if r['error']}
+    completed = [d for d in dates if not failed_dates or d < min(failed_dates)]
+    if completed:
+        watermark = datetime.strptime(completed[-1], '%Y-%m-%d')
+        record_incremental_update(db, 'openalex', 'OpenAlex', watermark)
+        print(f"\n✓ Watermark advanced to {completed[-1]}")
+    if failed_dates:
+        print(f"⚠️  {len(failed_dates)} partitions had errors and will be retried next run")
+
+    db.close()
+
+    print("\n" + "=" * 70)
+    print(f"✓ COMPLETE! Papers written: {sum(r['written'] for r in results):,}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,10 @@ from datetime import datetime, date
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
 
+from ingestion_engine import (
+    AdmissionThresholds, BatchWriter, FieldNormalizer, load_field_mappings, record_from_api
+)
+
 # Load environment variables
 load_dotenv()
 
@@ -24,51 +28,13 @@ class SemanticScholarIngester:
         self.base_url = "https://api.semanticscholar.org/graph/v1"
         self.rate_limit_delay = 0.01  # 10ms between requests (100/sec limit)
         self.api_key = os.getenv('SEMANTIC_SCHOLAR_API_KEY')  # Optional
+        self.normalizer = FieldNormalizer(load_field_mappings(db_connection))
 
         # Prepare headers
         self.headers = {}
         if self.api_key:
             self.headers['x-api-key'] = self.api_key
 
-    def extract_month_day(self, date_str: str) -> Optional[str]:
-        """Extract MM-DD from date string"""
-        if not date_str:
-            return None
-        try:
-            parts = date_str.split('-')
-            if len(parts) >= 2:
-                return f"{parts[1]}-{parts[2]}"
-        except:
-            pass
-        return None
-
-    def normalize_field(self, fields_of_study: List[str]) -> str:
-        """Map diverse field names to canonical categories"""
-        if not fields_of_study:
-            return 'Other'
-
-        field_mapping = {
-            'Computer Science': ['Computer Science', 'CS'],
-            'Economics': ['Economics', 'Business'],
-            'Physics': ['Physics', 'Astronomy', 'Astrophysics'],
-            'Biology': ['Biology', 'Medicine', 'Biochemistry', 'Genetics'],
-            'Mathematics': ['Mathematics', 'Statistics'],
-            'Psychology': ['Psychology', 'Cognitive Science'],
-            'Engineering': ['Engineering'],
-            'Chemistry': ['Chemistry', 'Materials Science'],
-            'Environmental Science': ['Environmental Science', 'Geology', 'Geography'],
-            'Political Science': ['Political Science', 'Sociology'],
-            'Philosophy': ['Philosophy'],
-            'History': ['History'],
-            'Art': ['Art'],
-        }
-
-        for canonical, variants in field_mapping.items():
-            if any(f in fields_of_study for f in variants):
-                return canonical
-
-        return fields_of_study[0] if fields_of_study else 'Other'
-
     def fetch_papers_for_date(self, month: int, day: int, year_start: int = 1900, year_end: int = 2024, max_per_year: int = 100) -> List[Dict]:
         """Fetch papers published on MM-DD across multiple years"""
         all_papers = []
@@ -110,65 +76,16 @@ class SemanticScholarIngester:
 
         return all_papers
 
-    def normalize_paper(self, raw_paper: Dict) -> Dict:
-        """Convert API response to our schema"""
-        pub_date = raw_paper.get('publicationDate')
-        fields_of_study = raw_paper.get('fieldsOfStudy', [])
-
-        return {
-            'paper_id': raw_paper.get('paperId'),
-            'source': 'semantic_scholar',
-            'title': raw_paper.get('title'),
-            'abstract': raw_paper.get('abstract'),
-            'authors': [author.get('name') for author in raw_paper.get('authors', [])],
-            'author_count': len(raw_paper.get('authors', [])),
-            'publication_date': pub_date,
-            'publication_month_day': self.extract_month_day(pub_date),
-            'year': int(pub_date.split('-')[0]) if pub_date and '-' in pub_date else None,
-            'venue': raw_paper.get('venue'),
-            'field': self.normalize_field(fields_of_study),
-            'fields_of_study': fields_of_study,
-            'citation_count': raw_paper.get('citationCount', 0) or 0,
-            'influential_citation_count': raw_paper.get('influentialCitationCount', 0) or 0,
-            'reference_count': raw_paper.get('referenceCount', 0) or 0,
-            'doi': raw_paper.get('externalIds', {}).get('DOI'),
-            'url': f"https://www.semanticscholar.org/paper/{raw_paper.get('paperId')}" if raw_paper.get('paperId') else None,
-            'pdf_url': raw_paper.get('openAccessPdf', {}).get('url') if isinstance(raw_paper.get('openAccessPdf'), dict) else None,
-            'is_open_access': bool(raw_paper.get('openAccessPdf'))
-        }
-
-    def upsert_paper(self, paper: Dict) -> bool:
-        """Insert new paper or update citation count if exists"""
-        cursor = self.db.cursor()
-
-        try:
-            cursor.execute("""
-                INSERT INTO papers (
-                    paper_id, source, title, abstract, authors, author_count,
-                    publication_date, publication_month_day, year, venue,
-                    field, fields_of_study, citation_count, influential_citation_count,
-                    reference_count, doi, url, pdf_url, is_open_access
-                ) VALUES (
-                    %(paper_id)s, %(source)s, %(title)s, %(abstract)s, %(authors)s, %(author_count)s,
-                    %(publication_date)s, %(publication_month_day)s, %(year)s, %(venue)s,
-                    %(field)s, %(fields_of_study)s, %(citation_count)s, %(influential_citation_count)s,
-                    %(reference_count)s, %(doi)s, %(url)s, %(pdf_url)s, %(is_open_access)s
-                )
-                ON CONFLICT (paper_id) DO UPDATE SET
-                    citation_count = EXCLUDED.citation_count,
-                    influential_citation_count = EXCLUDED.influential_citation_count,
-                    reference_count = EXCLUDED.reference_count,
-                    updated_at = NOW(),
-                    last_citation_update = CURRENT_DATE
-            """, paper)
-
-            self.db.commit()
-            return True
-
-        except Exception as e:
-            self.db.rollback()
-            print(f"  Error upserting paper: {e}")
-            return False
+    def upsert_papers(self, raw_papers: List[Dict]) -> int:
+        """Normalize papers and write them in batches, returning how many were stored"""
+        writer = BatchWriter(self.db, admission=AdmissionThresholds.load(self.db))
+        writer.add_many(record_from_api(raw_paper, self.normalizer) for raw_paper in raw_papers)
+        writer.close()
+        if writer.rejected:
+            print(f"Skipped {writer.rejected} papers below the day's admission threshold")
+        if writer.failed:
+            print(f"⚠️  {writer.failed} papers failed to write (see failed_fetches)")
+        return writer.written
 
     def log_failed_fetch(self, identifier: str, error: str):
         """Log failed API calls for retry later"""
@@ -207,18 +124,8 @@ class SemanticScholarIngester:
         raw_papers = self.fetch_papers_for_date(month, day)
         print(f"Fetched {len(raw_papers)} total papers")
 
-        # Normalize and insert
-        new_count = 0
-
-        for raw_paper in raw_papers:
-            paper = self.normalize_paper(raw_paper)
-
-            # Skip incomplete records
-            if not paper['title'] or not paper['year'] or not paper['paper_id']:
-                continue
-
-            if self.upsert_paper(paper):
-                new_count += 1
+        # Normalize and insert (incomplete records are skipped)
+        new_count = self.upsert_papers(raw_papers)
 
         # Log results
         duration = int(time.time() - start_time)
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Paper Birthdays - PubMed Baseline / Update File Ingestion
+Stream-parses the annual baseline and daily update files (gzip XML, ~30k records each)
+with element clearing, so memory stays flat per file. Baseline files are processed in
+parallel across cores; update files are applied in order as incremental deltas.
+Files already applied are recorded in processed_source_files and skipped on re-runs;
+a file applied without --insert-new is picked up again by the next --insert-new run
+(database/migrations/011_processed_files_insert_new.sql).
+
+Only articles with a full PubDate (year, month and day) are kept. Writes are batched and
+keyed on pubmed_id / DOI: papers we already store get their PMID and any missing abstract.
+PubMed has no citation counts, so PubMed-only papers are only inserted with --insert-new,
+and only with at least --min-citations citations (PUBMED_CONFIG['min_citations_to_insert']).
+A row the database rejects (e.g. an over-long DOI) is logged to failed_fetches and
+skipped, so one bad record can't fail a file and hold up every later update file.
+Their field comes from the MeSH headings (major topics first) or the journal title,
+whichever FieldNormalizer recognizes first; papers with neither are left as Other.
+
+Usage:
+    python scripts/ingest_pubmed.py updates                 # New daily update files only
+    python scripts/ingest_pubmed.py baseline --workers 8    # Annual baseline
+    python scripts/ingest_pubmed.py baseline --dir ~/pubmed/baseline  # Local copy
+    python scripts/ingest_pubmed.py updates --insert-new --min-citations 0  # Insert uncited papers too
+"""
+
+import os
+import re
+import sys
+import glob
+import gzip
+import argparse
+import psycopg2
+import requests
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from multiprocessing import Pool
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+from config import PUBMED_CONFIG
+from ingestion_engine import (
+    AdmissionThresholds, BatchWriter, FieldNormalizer, PaperRecord,
+    load_field_mappings, log_failed_writes, record_incremental_update
+)
+
+load_dotenv()
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+BATCH_SIZE = 1000
+
+
+# ============================================
+# XML Parsing
+# ============================================
+
+def _text(elem) -> Optional[str]:
+    """All text inside an element (titles can contain <i>, <sup>, ...)"""
+    if elem is None:
+        return None
+    text = ' '.join(''.join(elem.itertext()).split())
+    return text or None
+
+
+def parse_pub_date(pub_date) -> Optional[str]:
+    """YYYY-MM-DD from a <PubDate>, or None unless year, month and day are all present"""
+    if pub_date is None:
+        return None
+    year = pub_date.findtext('Year')
+    month = (pub_date.findtext('Month') or '').strip()
+    day = (pub_date.findtext('Day') or '').strip()
+    if not year or not month or not day:
+        return None
+
+    month_num = MONTHS.get(month[:3].lower()) or (int(month) if month.isdigit() else None)
+    if not month_num or not day.isdigit():
+        return None
+    try:
+        return date(int(year), month_num, int(day)).isoformat()
+    except ValueError:
+        return None
+
+
+def parse_article(article) -> Optional[Dict]:
+    """Turn a <PubmedArticle> into a dict (None without a PMID, title or full PubDate)"""
+    citation = article.find('MedlineCitation')
+    if citation is None:
+        return None
+    info = citation.find('Article')
+    pmid = citation.findtext('PMID')
+    if info is None or not pmid:
+        return None
+
+    pub_date = parse_pub_date(info.find('Journal/JournalIssue/PubDate'))
+    title = _text(info.find('ArticleTitle'))
+    if not pub_date or not title:
+        return None
+
+    authors = []
+    for author in info.iterfind('AuthorList/Author'):
+        name = author.findtext('CollectiveName') or ' '.join(
+            filter(None, [author.findtext('ForeName'), author.findtext('LastName')])
+        )
+        if name:
+            authors.append(name)
+
+    # Major topics first: a heading is major if its descriptor or any qualifier is
+    major, other = [], []
+    for heading in citation.iterfind('MeshHeadingList/MeshHeading'):
+        descriptor = heading.find('DescriptorName')
+        name = _text(descriptor)
+        if not name:
+            continue
+        is_major = any(e.get('MajorTopicYN') == 'Y' for e in [descriptor] + heading.findall('QualifierName'))
+        (major if is_major else other).append(name)
+
+    abstract_parts = [_text(part) for part in info.iterfind('Abstract/AbstractText')]
+    doi = None
+    for article_id in article.iterfind('PubmedData/ArticleIdList/ArticleId'):
+        if article_id.get('IdType') == 'doi':
+            doi = (article_id.text or '').strip() or None
+    if not doi:
+        for location in info.iterfind('ELocationID'):
+            if location.get('EIdType') == 'doi':
+                doi = (location.text or '').strip() or None
+
+    return {
+        'pmid': pmid.strip(),
+        'title': title,
+        'abstract': ' '.join(p for p in abstract_parts if p) or None,
+        'authors': authors,
+        'venue': _text(info.find('Journal/Title')),
+        'publication_date': pub_date,
+        'doi': doi,
+        'mesh_major': major,
+        'mesh': other,
+    }
+
+
+def iter_pubmed_file(stream):
+    """
+    Yield ('article', dict) and ('delete', pmid) events from one PubMed XML file.
+
+    Each finished element is cleared and detached from the root, so a 30k-record
+    file is never held in memory at once.
+    """
+    root = None
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+
+        if elem.tag == 'PubmedArticle':
+            parsed = parse_article(elem)
+            if parsed:
+                yield 'article', parsed
+            elem.clear()
+            root.clear()
+        elif elem.tag == 'DeleteCitation':
+            for pmid in elem.iterfind('PMID'):
+                yield 'delete', (pmid.text or '').strip()
+            elem.clear()
+            root.clear()
+
+
+# ============================================
+# Writing
+# ============================================
+
+def pubmed_fields(entry: Dict, normalizer: FieldNormalizer) -> List[str]:
+    """
+    fields_of_study for an article: major MeSH topics, the journal title, then the other
+    MeSH headings, with the first one the normalizer maps to a category moved to the front
+    """
+    candidates = entry.get('mesh_major', []) + ([entry['venue']] if entry.get('venue') else [])
+    candidates += entry.get('mesh', [])
+    for i, name in enumerate(candidates):
+        if normalizer.normalize_name(name) != 'Other':
+            return [name] + candidates[:i] + candidates[i + 1:]
+    return entry.get('mesh_major', []) + entry.get('mesh', [])
+
+
+def record_from_pubmed(entry: Dict, normalizer: FieldNormalizer) -> PaperRecord:
+    """Build a record from a parsed article"""
+    year, month, day = entry['publication_date'].split('-')
+    fields = pubmed_fields(entry, normalizer)
+    return PaperRecord(
+        paper_id=f"pubmed:{entry['pmid']}",
+        source='pubmed',
+        title=entry['title'],
+        abstract=entry['abstract'],
+        authors=entry['authors'],
+        author_count=len(entry['authors']),
+        publication_date=entry['publication_date'],
+        publication_month_day=f"{month}-{day}",
+        year=int(year),
+        venue=entry['venue'],
+        field=normalizer.normalize(fields),
+        fields_of_study=fields,
+        doi=entry['doi'],
+        url=f"{PUBMED_CONFIG['article_url']}/{entry['pmid']}/",
+        pubmed_id=entry['pmid'],
+    )
+
+
+UPDATE_EXISTING_SQL = """
+    UPDATE papers AS p SET
+        pubmed_id = v.pubmed_id,
+        abstract = COALESCE(p.abstract, v.abstract),
+        updated_at = NOW()
+    FROM (VALUES %s) AS v(pubmed_id, doi, abstract)
+    WHERE p.pubmed_id = v.pubmed_id
+       OR (v.doi IS NOT NULL AND p.doi = v.doi)
+    RETURNING v.pubmed_id
+"""
+
+
+def update_existing(db_connection, records: List[PaperRecord]) -> Tuple[Set[str], int]:
+    """
+    Attach PMIDs / abstracts to stored papers matched on pubmed_id or DOI.
+    If the batch is rejected, rows are retried one by one and the bad ones are
+    logged to failed_fetches and skipped.
+
+    Returns:
+        (PMIDs matched, rows that failed)
+    """
+    if not records:
+        return set(), 0
+
+    values = [(r.pubmed_id, r.doi, r.abstract) for r in records]
+    failures: List[Tuple[str, str]] = []
+    cursor = db_connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT update_existing")
+        try:
+            rows = execute_values(cursor, UPDATE_EXISTING_SQL, values, page_size=BATCH_SIZE, fetch=True)
+        except (psycopg2.IntegrityError, psycopg2.DataError):
+            cursor.execute("ROLLBACK TO SAVEPOINT update_existing")
+            rows = []
+            for record, value in zip(records, values):
+                cursor.execute("SAVEPOINT update_row")
+                try:
+                    rows += execute_values(cursor, UPDATE_EXISTING_SQL, [value], fetch=True)
+                    cursor.execute("RELEASE SAVEPOINT update_row")
+                except (psycopg2.IntegrityError, psycopg2.DataError) as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT update_row")
+                    failures.append((record.paper_id, str(e).strip()))
+            log_failed_writes(cursor, failures, {paper_id: 'pubmed' for paper_id, _ in failures})
+        cursor.execute("RELEASE SAVEPOINT update_existing")
+        db_connection.commit()
+    except Exception:
+        db_connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    return {row[0] for row in rows}, len(failures)
+
+
+def delete_citations(db_connection, pmids: List[str]) -> int:
+    """Apply DeleteCitation entries to PubMed-sourced rows"""
+    if not pmids:
+        return 0
+    cursor = db_connection.cursor()
+    cursor.execute(
+        "DELETE FROM papers WHERE source = 'pubmed' AND pubmed_id = ANY(%s)",
+        (pmids,)
+    )
+    deleted = cursor.rowcount
+    db_connection.commit()
+    cursor.close()
+    return deleted
+
+
+@contextmanager
+def open_source_file(path: str) -> Iterator[BinaryIO]:
+    """Binary stream over a local or remote .xml.gz file, closed (with its HTTP response) on exit"""
+    if not path.startswith('http'):
+        with gzip.open(path, 'rb') as stream:
+            yield stream
+        return
+    with requests.get(path, stream=True, timeout=120) as response:
+        response.raise_for_status()
+        with gzip.open(response.raw, 'rb') as stream:
+            yield stream
+
+
+def process_file(db_connection, normalizer: FieldNormalizer, path: str, insert_new: bool,
+                 min_citations: int = 1) -> Dict:
+    """Stream one file into the database and mark it processed"""
+    stats = {'file': os.path.basename(path), 'seen': 0, 'updated': 0, 'inserted': 0,
+             'held_back': 0, 'deleted': 0, 'failed': 0, 'error': None}
+    new_writer = BatchWriter(db_connection, BATCH_SIZE, AdmissionThresholds.load(db_connection)) if insert_new else None
+    batch: List[PaperRecord] = []
+    deletes: List[str] = []
+
+    def flush():
+        nonlocal batch
+        matched, failed = update_existing(db_connection, batch)
+        stats['updated'] += len(matched)
+        stats['failed'] += failed
+        if new_writer is not None:
+            new = [r for r in batch if r.pubmed_id not in matched]
+            cited = [r for r in new if r.citation_count >= min_citations]
+            stats['held_back'] += len(new) - len(cited)
+            new_writer.add_many(cited)
+            new_writer.flush()
+        batch = []
+
+    try:
+        with open_source_file(path) as stream:
+            for kind, value in iter_pubmed_file(stream):
+                if kind == 'delete':
+                    deletes.append(value)
+                    continue
+                stats['seen'] += 1
+                batch.append(record_from_pubmed(value, normalizer))
+                if len(batch) >= BATCH_SIZE:
+                    flush()
+        flush()
+        if new_writer is not None:
+            new_writer.close()
+        stats['deleted'] = delete_citations(db_connection, deletes)
+        stats['inserted'] = new_writer.written if new_writer else 0
+        stats['failed'] += new_writer.failed if new_writer else 0
+
+        cursor = db_connection.cursor()
+        cursor.execute("""
+            INSERT INTO processed_source_files (source, file_name, records_seen, records_written, insert_new)
+            VALUES ('pubmed', %s, %s, %s, %s)
+            ON CONFLICT (source, file_name) DO UPDATE SET
+                records_seen = EXCLUDED.records_seen,
+                records_written = EXCLUDED.records_written,
+                insert_new = processed_source_files.insert_new OR EXCLUDED.insert_new,
+                processed_at = NOW()
+        """, (stats['file'], stats['seen'], stats['updated'] + stats['inserted'], insert_new))
+        db_connection.commit()
+        cursor.close()
+    except Exception as e:
+        db_connection.rollback()
+        stats['error'] = str(e)
+
+    return stats
+
+
+# ============================================
+# File Discovery / Workers
+# ============================================
+
+def list_files(base: str, local_dir: Optional[str]) -> List[str]:
+    """All baseline or update files, in file-number order"""
+    pattern = re.compile(PUBMED_CONFIG['file_pattern'])
+    if local_dir:
+        files = [f for f in glob.glob(os.path.join(local_dir, '*.xml.gz')) if pattern.search(os.path.basename(f))]
+    else:
+        response = requests.get(base + '/', timeout=60)
+        response.raise_for_status()
+        files = [f"{base}/{name}" for name in sorted(set(pattern.findall(response.text)))]
+    return sorted(files, key=os.path.basename)
+
+
+def get_processed_files(db_connection, insert_new: bool) -> Set[str]:
+    """Files this run can skip: any processed file, or with --insert-new only those applied with it"""
+    cursor = db_connection.cursor()
+    cursor.execute(
+        "SELECT file_name FROM processed_source_files WHERE source = 'pubmed' AND (insert_new OR NOT %s)",
+        (insert_new,)
+    )
+    processed = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return processed
+
+
+_worker_db = None
+_worker_normalizer = None
+
+
+def init_worker(database_url: str):
+    """Give each worker process its own connection and normalizer"""
+    global _worker_db, _worker_normalizer
+    _worker_db = psycopg2.connect(database_url)
+    _worker_normalizer = FieldNormalizer(load_field_mappings(_worker_db))
+
+
+def process_file_in_worker(task: Tuple[str, bool, int]) -> Dict:
+    path, insert_new, min_citations = task
+    return process_file(_worker_db, _worker_normalizer, path, insert_new, min_citations)
+
+
+def print_stats(i: int, total: int, stats: Dict):
+    status = f"❌ {stats['error']}" if stats['error'] else '✓'
+    print(f"  [{i}/{total}] {stats['file']}: {stats['seen']:,} articles, "
+          f"{stats['updated']:,} matched, {stats['inserted']:,} inserted, {stats['held_back']:,} held back, "
+          f"{stats['deleted']:,} deleted, {stats['failed']:,} failed {status}")
+
+
+# ============================================
+# Main
+# ============================================
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Ingest PubMed baseline / update files')
+    parser.add_argument('mode', choices=['baseline', 'updates'], help='Which file set to process')
+    parser.add_argument('--dir', help='Local directory with the .xml.gz files (default: NCBI FTP)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help='Parallel workers (baseline only)')
+    parser.add_argument('--insert-new', action='store_true', help='Also insert papers we do not store yet')
+    parser.add_argument('--min-citations', type=int, default=PUBMED_CONFIG['min_citations_to_insert'],
+                        help='With --insert-new, hold back papers with fewer citations')
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("ERROR: DATABASE_URL not set")
+        sys.exit(1)
+
+    try:
+        db = psycopg2.connect(database_url)
+        print("✓ Connected to database")
+    except Exception as e:
+        print(f"✗ Database connection failed: {e}")
+        sys.exit(1)
+
+    base = PUBMED_CONFIG['baseline_base'] if args.mode == 'baseline' else PUBMED_CONFIG['updates_base']
+    processed = get_processed_files(db, args.insert_new)
+    all_files = list_files(base, args.dir)
+    files = [f for f in all_files if os.path.basename(f) not in processed]
+    if args.mode == 'updates' and files:
+        # Re-apply everything after the first pending delta so later revisions and deletions still win
+        files = all_files[all_files.index(files[0]):]
+
+    if not files:
+        print(f"✓ No new {args.mode} files")
+        db.close()
+        return
+
+    print(f"\n🚀 Processing {len(files)} {args.mode} files")
+    print("=" * 70)
+
+    results = []
+    if args.mode == 'baseline':
+        # Each PMID appears once in the baseline, so files are independent
+        tasks = [(path, args.insert_new, args.min_citations) for path in files]
+        with Pool(args.workers, initializer=init_worker, initargs=(database_url,)) as pool:
+            for i, stats in enumerate(pool.imap_unordered(process_file_in_worker, tasks), 1):
+                results.append(stats)
+                print_stats(i, len(files), stats)
+    else:
+        # Update files revise and delete earlier records, so they must be applied in order
+        normalizer = FieldNormalizer(load_field_mappings(db))
+        for i, path in enumerate(files, 1):
+            stats = process_file(db, normalizer, path, args.insert_new, args.min_citations)
+            results.append(stats)
+            print_stats(i, len(files), stats)
+            if stats['error']:
+                print("  Stopping so later deltas aren't applied out of order")
+                break
+
+    if not any(r['error'] for r in results):
+        record_incremental_update(db, 'pubmed', 'PubMed', datetime.now(timezone.utc).replace(tzinfo=None))
+
+    db.close()
+
+    print("\n" + "=" * 70)
+    print(f"✓ COMPLETE! Matched: {sum(r['updated'] for r in results):,} | "
+          f"Inserted: {sum(r['inserted'] for r in results):,} | "
+          f"Deleted: {sum(r['deleted'] for r in results):,}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,26 +11,11 @@ import psycopg2
 from datetime import datetime
 from dotenv import load_dotenv
 
-load_dotenv()
+from ingestion_engine import (
+    AdmissionThresholds, BatchWriter, FieldNormalizer, load_field_mappings, record_from_api
+)
 
-def normalize_field(fields):
-    """Simple field normalization"""
-    if not fields:
-        return 'Other'
-
-    field_map = {
-        'Computer Science': ['Computer Science'],
-        'Economics': ['Economics', 'Business'],
-        'Physics': ['Physics'],
-        'Biology': ['Biology', 'Medicine'],
-        'Mathematics': ['Mathematics'],
-        'Psychology': ['Psychology'],
-    }
-
-    for canonical, variants in field_map.items():
-        if any(f in fields for f in variants):
-            return canonical
-    return fields[0] if fields else 'Other'
+load_dotenv()
 
 def ingest_papers(month, day, year_start=2018, year_end=2024):
     """Fetch and store papers for a specific date, recent years only"""
@@ -47,15 +32,14 @@ def ingest_papers(month, day, year_start=2018, year_end=2024):
         headers['x-api-key'] = api_key
 
     db = psycopg2.connect(database_url)
-    cursor = db.cursor()
+    normalizer = FieldNormalizer(load_field_mappings(db))
+    writer = BatchWriter(db, admission=AdmissionThresholds.load(db))
 
     month_day = f"{month:02d}-{day:02d}"
     print(f"\n{'='*60}")
     print(f"Ingesting papers for {month_day} ({year_start}-{year_end})")
     print(f"{'='*60}\n")
 
-    total_papers = 0
-
     for year in range(year_start, year_end + 1):
         date_str = f"{year}-{month:02d}-{day:02d}"
 
@@ -90,16 +74,8 @@ def ingest_papers(month, day, year_start=2018, year_end=2024):
                         break
 
                     for paper in papers:
-                        if not paper.get('paperId') or not paper.get('title'):
-                            continue
-
-                        # CRITICAL: Validate actual publication date matches what we queried for
-                        actual_pub_date = paper.get('publicationDate')
-                        if not actual_pub_date:
-                            continue
-
-                        # Only store if the ACTUAL publication date matches our query date
-                        if actual_pub_date != date_str:
+                        # CRITICAL: Only store if the ACTUAL publication date matches our query date
+                        if paper.get('publicationDate') != date_str:
                             continue  # Skip papers with wrong dates
 
                         # CRITICAL: Only keep papers with MORE than 10 citations
@@ -107,62 +83,18 @@ def ingest_papers(month, day, year_start=2018, year_end=2024):
                         if citation_count <= 10:
                             continue  # Skip papers with too few citations
 
-                        # Extract month-day from actual publication date
-                        try:
-                            parts = actual_pub_date.split('-')
-                            if len(parts) >= 3:
-                                actual_month_day = f"{parts[1]}-{parts[2]}"
-                                actual_year = int(parts[0])
-                            else:
-                                continue  # Skip if date format is incomplete
-                        except:
-                            continue
-
-                        fields = paper.get('fieldsOfStudy', [])
-
-                        # Extract author names
-                        authors_list = paper.get('authors', [])
-                        author_names = [author.get('name') for author in authors_list if author.get('name')]
-
-                        try:
-                            cursor.execute("""
-                                INSERT INTO papers (
-                                    paper_id, source, title, authors, author_count,
-                                    publication_date, publication_month_day, year,
-                                    venue, field, fields_of_study, citation_count,
-                                    doi, url, pdf_url, is_open_access
-                                ) VALUES (
-                                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                                )
-                                ON CONFLICT (paper_id) DO UPDATE SET
-                                    authors = EXCLUDED.authors,
-                                    citation_count = EXCLUDED.citation_count,
-                                    updated_at = NOW()
-                            """, (
-                                paper['paperId'],
-                                'semantic_scholar',
-                                paper.get('title'),
-                                author_names,  # Store author names array
-                                len(authors_list),
-                                actual_pub_date,  # Use ACTUAL date from API
-                                actual_month_day,  # Use ACTUAL month-day
-                                actual_year,  # Use ACTUAL year
-                                paper.get('venue'),
-                                normalize_field(fields),
-                                fields,
-                                paper.get('citationCount', 0) or 0,
-                                paper.get('externalIds', {}).get('DOI'),
-                                f"https://www.semanticscholar.org/paper/{paper['paperId']}",
-                                paper.get('openAccessPdf', {}).get('url') if isinstance(paper.get('openAccessPdf'), dict) else None,
-                                bool(paper.get('openAccessPdf'))
-                            ))
-                            year_papers += 1
-                            total_papers += 1
-                        except Exception as e:
-                            print(f"\n  Error inserting paper: {e}")
-                            continue
-
-                    db.commit()
+                        record = record_from_api(paper, normalizer)
+                        if record is None:
+                            continue  # Missing id, title or exact date
+
+                        writer.add(record)
+                        year_papers += 1
+
+                    # One batched upsert per page
+                    try:
+                        writer.flush()
+                    except Exception as e:
+                        print(f"\n  Error inserting papers: {e}")
 
                     # If we got less than limit, no need to paginate
                     if len(papers) < limit:
@@ -197,11 +129,16 @@ def ingest_papers(month, day, year_start=2018, year_end=2024):
             print(f"Error: {e}")
             continue
 
+    # Refresh the admission thresholds of the days written to
+    writer.close()
+
     print(f"\n{'='*60}")
-    print(f"✓ Completed! Inserted {total_papers} papers")
+    print(f"✓ Completed! Inserted {writer.written} papers")
+    print(f"  Skipped {writer.rejected} papers below the day's admission threshold")
+    if writer.failed:
+        print(f"  ⚠️  {writer.failed} papers failed to write (see failed_fetches)")
     print(f"{'='*60}\n")
 
-    cursor.close()
     db.close()
 
 if __name__ == "__main__":
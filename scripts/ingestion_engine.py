@@ -0,0 +1,809 @@
+#!/usr/bin/env python3
+"""
+Paper Birthdays - Shared Ingestion Engine
+One field normalizer, one record type and one batched upsert used by every ingester
+"""
+
+import re
+from datetime import date, datetime
+from dataclasses import dataclass, field as dataclass_field, replace
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from config import FIELD_MAPPING, PLACEHOLDER_CONFIG, RETENTION_CONFIG, SOURCE_PRIORITY
+
+SEMANTIC_SCHOLAR_PAPER_URL = "https://www.semanticscholar.org/paper/"
+
+# Columns written for every record, in INSERT order
+BASE_COLUMNS = [
+    'paper_id', 'source', 'title', 'abstract', 'authors', 'author_count',
+    'publication_date', 'publication_month_day', 'year', 'venue',
+    'field', 'fields_of_study', 'citation_count', 'influential_citation_count',
+    'reference_count', 'doi', 'url', 'pdf_url', 'is_open_access',
+]
+
+# Columns added by db/schema_updates.sql - only written when a batch carries them
+OPTIONAL_COLUMNS = ['arxiv_id', 'pubmed_id', 'openalex_id']
+
+# On conflict we refresh metrics and fill in metadata we did not have before. A record
+# from another source (matched by DOI) never lowers the stored citation count.
+UPSERT_UPDATE_SQL = """
+    citation_count = CASE WHEN EXCLUDED.source = papers.source THEN EXCLUDED.citation_count
+                          ELSE GREATEST(EXCLUDED.citation_count, papers.citation_count) END,
+    influential_citation_count = GREATEST(EXCLUDED.influential_citation_count, papers.influential_citation_count),
+    reference_count = GREATEST(EXCLUDED.reference_count, papers.reference_count),
+    authors = COALESCE(EXCLUDED.authors, papers.authors),
+    abstract = COALESCE(EXCLUDED.abstract, papers.abstract),
+    pdf_url = COALESCE(EXCLUDED.pdf_url, papers.pdf_url),
+    is_open_access = EXCLUDED.is_open_access OR papers.is_open_access,
+    updated_at = NOW(),
+    last_citation_update = CURRENT_DATE
+"""
+
+
+# ============================================
+# Field Normalization
+# ============================================
+
+class FieldNormalizer:
+    """
+    Maps raw fields of study to canonical categories.
+
+    The raw->canonical table is built once from config.FIELD_MAPPING (plus any
+    rows from the field_mappings table), so the common case is a single dict
+    lookup. Unseen names fall back to one precompiled word-boundary regex and
+    the answer is cached, so each distinct raw name is only scanned once.
+    Only the FIRST (primary) field is used, to prevent misclassification when
+    e.g. Medicine is a secondary field.
+    """
+
+    def __init__(self, extra_mappings: Optional[Dict[str, str]] = None):
+        self.lookup: Dict[str, str] = {}
+        for canonical, variations in FIELD_MAPPING.items():
+            for variation in variations:
+                self.lookup[variation.lower()] = canonical
+        for raw_field, canonical in (extra_mappings or {}).items():
+            self.lookup[raw_field.lower()] = canonical
+
+        # Longest variations first so "Materials Science" wins over "Science"-like prefixes
+        variations = sorted(self.lookup, key=len, reverse=True)
+        self._fallback = re.compile(
+            r'\b(' + '|'.join(re.escape(v) for v in variations) + r')\b'
+        )
+
+    @staticmethod
+    def field_name(raw) -> str:
+        """Get the category name from a string or an s2fieldsofstudy dict"""
+        if isinstance(raw, dict):
+            return raw.get('category') or ''
+        return str(raw) if raw is not None else ''
+
+    def normalize_name(self, name: str) -> str:
+        """Normalize a single raw field name"""
+        if not name:
+            return 'Other'
+
+        key = name.lower()
+        canonical = self.lookup.get(key)
+        if canonical is None:
+            match = self._fallback.search(key)
+            canonical = self.lookup[match.group(1)] if match else 'Other'
+            self.lookup[key] = canonical
+        return canonical
+
+    def normalize(self, fields_of_study: Optional[Sequence]) -> str:
+        """Normalize a fields_of_study list using its primary field"""
+        if not fields_of_study:
+            return 'Other'
+        return self.normalize_name(self.field_name(fields_of_study[0]))
+
+    def normalize_batch(self, batch: Iterable[Optional[Sequence]]) -> List[str]:
+        """Normalize many fields_of_study lists at once"""
+        normalize = self.normalize
+        return [normalize(fields) for fields in batch]
+
+
+def load_field_mappings(db_connection) -> Dict[str, str]:
+    """Load extra raw->canonical mappings from the field_mappings table (if it exists)"""
+    cursor = db_connection.cursor()
+    try:
+        cursor.execute("SELECT raw_field, normalized_field FROM field_mappings")
+        return {raw: canonical for raw, canonical in cursor.fetchall()}
+    except psycopg2.Error:
+        # Table is created by schema_updates.sql and may not be there yet
+        db_connection.rollback()
+        return {}
+    finally:
+        cursor.close()
+
+
+_default_normalizer: Optional[FieldNormalizer] = None
+
+
+def get_normalizer() -> FieldNormalizer:
+    """Shared normalizer built from config.FIELD_MAPPING"""
+    global _default_normalizer
+    if _default_normalizer is None:
+        _default_normalizer = FieldNormalizer()
+    return _default_normalizer
+
+
+def normalize_field(fields_of_study: Optional[Sequence]) -> str:
+    """Normalize a fields_of_study list with the shared normalizer"""
+    return get_normalizer().normalize(fields_of_study)
+
+
+# ============================================
+# Record Type
+# ============================================
+
+def split_publication_date(pub_date: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Return (MM-DD, year) for an exact, valid YYYY-MM-DD date (not 2020-02-30), else None"""
+    if not pub_date or [len(part) for part in pub_date.split('-')] != [4, 2, 2] or not pub_date.replace('-', '').isdigit():
+        return None
+    try:
+        parsed = date.fromisoformat(pub_date)
+    except ValueError:
+        return None
+    return f"{parsed.month:02d}-{parsed.day:02d}", parsed.year
+
+
+@dataclass
+class PaperRecord:
+    """A paper ready to be written to the papers table"""
+    paper_id: str
+    source: str
+    title: str
+    publication_date: str
+    publication_month_day: str
+    year: int
+    author_count: int = 0
+    authors: Optional[List[str]] = None
+    abstract: Optional[str] = None
+    venue: Optional[str] = None
+    field: str = 'Other'
+    fields_of_study: List[str] = dataclass_field(default_factory=list)
+    citation_count: int = 0
+    influential_citation_count: int = 0
+    reference_count: int = 0
+    doi: Optional[str] = None
+    url: Optional[str] = None
+    pdf_url: Optional[str] = None
+    is_open_access: bool = False
+    arxiv_id: Optional[str] = None
+    pubmed_id: Optional[str] = None
+    openalex_id: Optional[str] = None
+
+    def row(self, columns: Sequence[str]) -> tuple:
+        """Values for the given columns, in order"""
+        return tuple(getattr(self, column) for column in columns)
+
+
+def record_from_api(paper: Dict, normalizer: Optional[FieldNormalizer] = None) -> Optional[PaperRecord]:
+    """Build a record from a Semantic Scholar Graph API paper (None if incomplete)"""
+    paper_id = paper.get('paperId')
+    title = paper.get('title')
+    pub_date = paper.get('publicationDate')
+    parsed = split_publication_date(pub_date)
+    if not paper_id or not title or not parsed:
+        return None
+    month_day, year = parsed
+
+    normalizer = normalizer or get_normalizer()
+    fields = paper.get('fieldsOfStudy') or []
+    authors_list = paper.get('authors') or []
+    open_access_pdf = paper.get('openAccessPdf')
+
+    return PaperRecord(
+        paper_id=paper_id,
+        source='semantic_scholar',
+        title=title,
+        abstract=paper.get('abstract'),
+        authors=[author.get('name') for author in authors_list if author.get('name')],
+        author_count=len(authors_list),
+        publication_date=pub_date,
+        publication_month_day=month_day,
+        year=year,
+        venue=paper.get('venue'),
+        field=normalizer.normalize(fields),
+        fields_of_study=fields,
+        citation_count=paper.get('citationCount', 0) or 0,
+        influential_citation_count=paper.get('influentialCitationCount', 0) or 0,
+        reference_count=paper.get('referenceCount', 0) or 0,
+        doi=(paper.get('externalIds') or {}).get('DOI'),
+        url=f"{SEMANTIC_SCHOLAR_PAPER_URL}{paper_id}",
+        pdf_url=open_access_pdf.get('url') if isinstance(open_access_pdf, dict) else None,
+        is_open_access=bool(open_access_pdf),
+        arxiv_id=(paper.get('externalIds') or {}).get('ArXiv'),
+        pubmed_id=(paper.get('externalIds') or {}).get('PubMed'),
+    )
+
+
+def record_from_bulk(paper: Dict, normalizer: Optional[FieldNormalizer] = None) -> Optional[PaperRecord]:
+    """Build a record from a Semantic Scholar bulk `papers` dataset line (None if incomplete)"""
+    paper_id = paper.get('corpusid')
+    title = paper.get('title')
+    pub_date = paper.get('publicationdate')
+    parsed = split_publication_date(pub_date)
+    if not paper_id or not title or not parsed:
+        return None
+    month_day, year = parsed
+
+    normalizer = normalizer or get_normalizer()
+    fields = paper.get('s2fieldsofstudy') or []
+    external_ids = paper.get('externalids') or {}
+    venue = paper.get('venue') or (paper.get('journal') or {}).get('name', 'Unknown Venue')
+
+    return PaperRecord(
+        paper_id=str(paper_id),
+        source='semantic_scholar',
+        title=title,
+        author_count=len(paper.get('authors') or []),
+        publication_date=pub_date,
+        publication_month_day=month_day,
+        year=year,
+        venue=venue,
+        field=normalizer.normalize(fields),
+        fields_of_study=[normalizer.field_name(f) for f in fields][:10],
+        citation_count=paper.get('citationcount', 0) or 0,
+        influential_citation_count=paper.get('influentialcitationcount', 0) or 0,
+        reference_count=paper.get('referencecount', 0) or 0,
+        doi=external_ids.get('DOI'),
+        url=paper.get('url') or f"{SEMANTIC_SCHOLAR_PAPER_URL}{paper_id}",
+        is_open_access=bool(paper.get('isopenaccess')),
+        arxiv_id=external_ids.get('ArXiv'),
+        pubmed_id=external_ids.get('PubMed'),
+    )
+
+
+# ============================================
+# Admission Thresholds
+# ============================================
+
+class AdmissionThresholds:
+    """
+    In-memory copy of the day_admission_threshold table.
+
+    A day that already holds `papers_per_day` rows only admits papers cited
+    more than its current K-th paper; anything else would be deleted at the
+    next annual trim, so it is dropped before it touches the database. Papers
+    we already store are always admitted (see stored()), so their updates land.
+    Thresholds are computed over the rows the trim ranks (published_filter), so
+    merged duplicates and capped placeholder dates don't raise them.
+    """
+
+    REFRESH_SQL = """
+        INSERT INTO day_admission_threshold (month_day, kth_citation_count, row_count, updated_at)
+        SELECT
+            d.month_day,
+            COALESCE((
+                SELECT p.citation_count FROM papers p
+                WHERE p.publication_month_day = d.month_day AND {retained}
+                ORDER BY p.citation_count DESC
+                OFFSET %(k)s - 1 LIMIT 1
+            ), 0),
+            (SELECT COUNT(*) FROM papers p WHERE p.publication_month_day = d.month_day AND {retained}),
+            NOW()
+        FROM unnest(%(days)s::varchar[]) AS d(month_day)
+        ON CONFLICT (month_day) DO UPDATE SET
+            kth_citation_count = EXCLUDED.kth_citation_count,
+            row_count = EXCLUDED.row_count,
+            updated_at = NOW()
+        RETURNING month_day, kth_citation_count, row_count
+    """
+
+    def __init__(self, thresholds: Optional[Dict[str, Tuple[int, int]]] = None,
+                 papers_per_day: int = RETENTION_CONFIG['papers_per_day'], enabled: bool = True):
+        self.thresholds = thresholds or {}
+        self.papers_per_day = papers_per_day
+        self.enabled = enabled
+        self.retained: Optional[str] = None  # published_filter, built on the first refresh
+
+    @classmethod
+    def load(cls, db_connection) -> 'AdmissionThresholds':
+        """Load all thresholds (admits everything if the table doesn't exist yet)"""
+        cursor = db_connection.cursor()
+        try:
+            cursor.execute("SELECT month_day, kth_citation_count, row_count FROM day_admission_threshold")
+            return cls({month_day: (kth, count) for month_day, kth, count in cursor.fetchall()})
+        except psycopg2.Error:
+            # Created by database/migrations/003_day_admission_threshold.sql
+            db_connection.rollback()
+            return cls(enabled=False)
+        finally:
+            cursor.close()
+
+    def admits(self, record: PaperRecord) -> bool:
+        """Would this paper survive the top-K trim for its day?"""
+        kth, count = self.thresholds.get(record.publication_month_day, (0, 0))
+        if count < self.papers_per_day:
+            return True
+        return record.citation_count > kth
+
+    def stored(self, cursor, records: Sequence[PaperRecord]) -> List[PaperRecord]:
+        """The records among these that update a stored paper (by paper_id, or DOI via resolve_dois)"""
+        if not records:
+            return []
+        records = resolve_dois(cursor, records)
+        cursor.execute("SELECT paper_id FROM papers WHERE paper_id = ANY(%s)",
+                       ([record.paper_id for record in records],))
+        existing = {row[0] for row in cursor.fetchall()}
+        return [record for record in records if record.paper_id in existing]
+
+    def refresh(self, cursor, month_days: Iterable[str]) -> None:
+        """Recompute thresholds for the given days after writing to them"""
+        if not self.enabled:
+            return
+        days = sorted(set(month_days))
+        if not days:
+            return
+        if self.retained is None:
+            self.retained = published_filter(table_columns(cursor))
+        cursor.execute(self.REFRESH_SQL.format(retained=self.retained), {'k': self.papers_per_day, 'days': days})
+        for month_day, kth, count in cursor.fetchall():
+            self.thresholds[month_day] = (kth, count)
+
+
+def refresh_all_thresholds(db_connection) -> bool:
+    """Rebuild every day's threshold (e.g. after the annual trim)"""
+    admission = AdmissionThresholds()
+    cursor = db_connection.cursor()
+    try:
+        cursor.execute("SELECT DISTINCT publication_month_day FROM papers")
+        admission.refresh(cursor, [row[0] for row in cursor.fetchall()])
+        db_connection.commit()
+        return True
+    except psycopg2.Error:
+        # Table not migrated yet - ingesters will simply admit everything
+        db_connection.rollback()
+        return False
+    finally:
+        cursor.close()
+
+
+# ============================================
+# Slugs (lib/slugUtils.ts)
+# ============================================
+
+# Characters JavaScript's \s matches; its \w is ASCII-only without the u flag
+JS_WHITESPACE = r'\t\n\v\f\r \u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff'
+
+# Papers that have a page (lib/database.ts getPapersForDate) claim the plain slug first
+SLUG_PRIORITY_ORDER = """
+    (merged_into IS NULL AND venue IS NOT NULL AND venue != 'Unknown Venue' AND TRIM(venue) != '') DESC,
+    citation_count DESC, paper_id
+"""
+
+
+def slugify(text: str) -> str:
+    """Same steps as slugify() in lib/slugUtils.ts"""
+    text = text.lower()
+    text = re.sub(f'[^A-Za-z0-9_{JS_WHITESPACE}-]', '', text)
+    text = re.sub(f'[{JS_WHITESPACE}]+', '-', text)
+    text = re.sub(r'--+', '-', text)
+    return re.sub(r'^-+|-+$', '', text)
+
+
+def paper_slug(title: str, year: Optional[int], max_words: int = 5) -> str:
+    """generatePaperSlug: first words of the title (split on single spaces) plus the year"""
+    words = (title or '').split(' ')[:max_words]
+    return f"{slugify(' '.join(words))}-{year if year is not None else 'null'}"
+
+
+def slug_candidates(base: str, start: int, count: int) -> List[str]:
+    """base, base-2, base-3, ... (the n-th candidate, counting from 1)"""
+    return [base if n == 1 else f"{base}-{n}" for n in range(start, start + count)]
+
+
+def assign_slugs(cursor, month_days: Iterable[str], limit: Optional[int] = None) -> int:
+    """
+    Fill papers.slug for rows on the given days that don't have one yet.
+
+    Rows are taken in SLUG_PRIORITY_ORDER, so the paper the page used to resolve a
+    slug to keeps it; later papers with the same slug get -2, -3, ... Assigned slugs
+    never change, even if the title does. Runs in a savepoint: if the column isn't
+    migrated yet, or another writer claims a slug first, the error is printed and
+    the rows stay NULL for the next call (or scripts/backfill_slugs.py); the page
+    finds those by their computed slug meanwhile.
+
+    Returns:
+        Number of rows that needed a slug (at most `limit`)
+    """
+    days = sorted(set(month_days))
+    if not days:
+        return 0
+
+    cursor.execute("SAVEPOINT assign_slugs")
+    try:
+        cursor.execute(f"""
+            SELECT paper_id, publication_month_day, title, year
+            FROM papers
+            WHERE publication_month_day = ANY(%s) AND slug IS NULL
+            ORDER BY publication_month_day, {SLUG_PRIORITY_ORDER}
+            {'LIMIT %s' if limit else ''}
+        """, (days, limit) if limit else (days,))
+        rows = cursor.fetchall()
+
+        # (month_day, base slug) -> paper_ids waiting for a slug, in priority order
+        pending: Dict[Tuple[str, str], List[str]] = {}
+        for paper_id, month_day, title, year in rows:
+            pending.setdefault((month_day, paper_slug(title, year)), []).append(paper_id)
+
+        # Probe the unique index for a window of candidates per slug until all are placed
+        assigned: List[Tuple[str, str]] = []
+        next_n = {key: 1 for key in pending}
+        while pending:
+            probes = [
+                (month_day, candidate)
+                for (month_day, base), ids in pending.items()
+                for candidate in slug_candidates(base, next_n[(month_day, base)], len(ids) + 4)
+            ]
+            taken = set(execute_values(cursor, """
+                SELECT p.publication_month_day, p.slug
+                FROM papers p
+                JOIN (VALUES %s) AS c(month_day, slug)
+                  ON p.publication_month_day = c.month_day AND p.slug = c.slug
+            """, probes, fetch=True))
+
+            for (month_day, base), ids in list(pending.items()):
+                window = slug_candidates(base, next_n[(month_day, base)], len(ids) + 4)
+                free = [candidate for candidate in window if (month_day, candidate) not in taken]
+                placed = min(len(free), len(ids))
+                assigned.extend(zip(ids[:placed], free[:placed]))
+                next_n[(month_day, base)] += len(window)
+                if placed == len(ids):
+                    del pending[(month_day, base)]
+                else:
+                    pending[(month_day, base)] = ids[placed:]
+
+        if assigned:
+            execute_values(cursor, """
+                UPDATE papers p SET slug = v.slug
+                FROM (VALUES %s) AS v(paper_id, slug)
+                WHERE p.paper_id = v.paper_id
+            """, assigned, page_size=1000)
+        cursor.execute("RELEASE SAVEPOINT assign_slugs")
+        return len(rows)
+    except psycopg2.Error as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT assign_slugs")
+        print(f"\n  ⚠️  Slugs not assigned for {len(days)} days, left NULL: {str(e).splitlines()[0]}")
+        return 0
+
+
+# ============================================
+# Batched Upsert
+# ============================================
+
+def _dedupe(records: Sequence[PaperRecord]) -> List[PaperRecord]:
+    """
+    Drop repeated paper_ids / DOIs inside one batch.
+
+    ON CONFLICT cannot touch the same row twice in one statement, so the
+    last occurrence of a paper_id wins and later repeats of a DOI are dropped.
+    """
+    by_id: Dict[str, PaperRecord] = {}
+    for record in records:
+        by_id[record.paper_id] = record
+
+    seen_dois = set()
+    unique = []
+    for record in by_id.values():
+        if record.doi:
+            if record.doi in seen_dois:
+                continue
+            seen_dois.add(record.doi)
+        unique.append(record)
+    return unique
+
+
+def resolve_dois(cursor, records: Sequence[PaperRecord]) -> List[PaperRecord]:
+    """
+    Point records at the row already holding their DOI.
+
+    A record with a new paper_id whose DOI is stored under another paper_id (the
+    same paper from another source, e.g. an OpenAlex W-id for a Semantic Scholar
+    paper) would violate idx_unique_doi. It takes over that row's paper_id instead,
+    so the upsert updates the stored paper and fills in its external ids.
+    """
+    dois = [record.doi for record in records if record.doi]
+    if not dois:
+        return list(records)
+
+    cursor.execute("SELECT doi, paper_id FROM papers WHERE doi = ANY(%s)", (dois,))
+    owner = dict(cursor.fetchall())
+    candidates = [record.paper_id for record in records
+                  if record.doi in owner and owner[record.doi] != record.paper_id]
+    if not candidates:
+        return list(records)
+
+    # Records whose own paper_id is stored update that row; the DOI isn't rewritten then
+    cursor.execute("SELECT paper_id FROM papers WHERE paper_id = ANY(%s)", (candidates,))
+    stored = {row[0] for row in cursor.fetchall()}
+
+    resolved = []
+    for record in records:
+        existing = owner.get(record.doi) if record.doi else None
+        if existing and existing != record.paper_id and record.paper_id not in stored:
+            record = replace(record, paper_id=existing)
+        resolved.append(record)
+    return resolved
+
+
+def upsert_papers(cursor, records: Sequence[PaperRecord], page_size: int = 1000) -> Tuple[int, int, List[Tuple[str, str]]]:
+    """
+    Insert or update a batch of papers with execute_values.
+
+    DOIs already stored under another paper_id are resolved to that row first
+    (resolve_dois). Runs inside a savepoint; if the batch still hits a unique
+    violation or a value the column can't hold (e.g. an over-long DOI) it is
+    retried row by row so one bad record doesn't lose the rest of the batch.
+
+    Returns:
+        (inserted, updated, [(paper_id, error) for each record that failed])
+    """
+    records = _dedupe(resolve_dois(cursor, _dedupe(records)))
+    if not records:
+        return 0, 0, []
+
+    carried = [column for column in OPTIONAL_COLUMNS if any(getattr(record, column) for record in records)]
+    if carried:
+        # The external id columns come from db/schema_updates.sql, which may not be applied
+        existing = table_columns(cursor)
+        carried = [column for column in carried if column in existing]
+    columns = BASE_COLUMNS + carried
+    # External ids carried by this batch fill the stored row's gaps
+    update_sql = UPSERT_UPDATE_SQL + ''.join(
+        f",\n    {column} = COALESCE(papers.{column}, EXCLUDED.{column})"
+        for column in columns if column in OPTIONAL_COLUMNS
+    )
+    sql = f"""
+        INSERT INTO papers ({', '.join(columns)})
+        VALUES %s
+        ON CONFLICT (paper_id) DO UPDATE SET {update_sql}
+        RETURNING (xmax = 0) AS inserted
+    """
+    rows = [record.row(columns) for record in records]
+
+    cursor.execute("SAVEPOINT upsert_batch")
+    try:
+        results = execute_values(cursor, sql, rows, page_size=page_size, fetch=True)
+        cursor.execute("RELEASE SAVEPOINT upsert_batch")
+        inserted = sum(1 for (was_inserted,) in results if was_inserted)
+        return inserted, len(results) - inserted, []
+    except (psycopg2.IntegrityError, psycopg2.DataError):
+        cursor.execute("ROLLBACK TO SAVEPOINT upsert_batch")
+
+    # Slow path: isolate the offending rows
+    inserted = updated = 0
+    failures: List[Tuple[str, str]] = []
+    for record, row in zip(records, rows):
+        cursor.execute("SAVEPOINT upsert_row")
+        try:
+            execute_values(cursor, sql, [row])
+            was_inserted = cursor.fetchone()[0]
+            cursor.execute("RELEASE SAVEPOINT upsert_row")
+            if was_inserted:
+                inserted += 1
+            else:
+                updated += 1
+        except (psycopg2.IntegrityError, psycopg2.DataError) as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT upsert_row")
+            failures.append((record.paper_id, str(e).strip()))
+    cursor.execute("RELEASE SAVEPOINT upsert_batch")
+    return inserted, updated, failures
+
+
+def log_failed_writes(cursor, failures: Sequence[Tuple[str, str]], sources: Dict[str, str]) -> None:
+    """Record papers the upsert couldn't write in failed_fetches, for a later retry"""
+    cursor.execute("SAVEPOINT log_failed_writes")
+    try:
+        execute_values(cursor, """
+            INSERT INTO failed_fetches (paper_id, source, error_message) VALUES %s
+        """, [(paper_id, sources.get(paper_id), error) for paper_id, error in failures])
+        cursor.execute("RELEASE SAVEPOINT log_failed_writes")
+    except psycopg2.Error:
+        # failed_fetches comes from db/schema.sql; the count is still reported
+        cursor.execute("ROLLBACK TO SAVEPOINT log_failed_writes")
+
+
+class BatchWriter:
+    """
+    Buffers PaperRecords and writes them with one upsert per batch.
+
+    When given AdmissionThresholds, papers that can't make their day's
+    top-K are held back in add() and rejected at flush unless they update a
+    stored paper. The thresholds of the days written to are refreshed every
+    RETENTION_CONFIG['threshold_refresh_batches'] flushes and in close(), not
+    on every batch. Records the upsert can't write are counted in `failed`
+    and logged to failed_fetches.
+
+    Usage:
+        writer = BatchWriter(db, admission=AdmissionThresholds.load(db))
+        for raw in papers:
+            writer.add(record_from_api(raw))
+        writer.close()
+    """
+
+    def __init__(self, db_connection, batch_size: int = 1000,
+                 admission: Optional[AdmissionThresholds] = None):
+        self.db = db_connection
+        self.batch_size = batch_size
+        self.admission = admission
+        self.buffer: List[PaperRecord] = []
+        self.below_threshold: List[PaperRecord] = []  # Admitted at flush only if already stored
+        self.touched: Set[str] = set()
+        self.flushes = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.updated
+
+    def add(self, record: Optional[PaperRecord]) -> None:
+        """Queue a record (None is ignored) and flush when the batch is full"""
+        if record is None:
+            return
+        if self.admission is not None and not self.admission.admits(record):
+            self.below_threshold.append(record)
+        else:
+            self.buffer.append(record)
+        if len(self.buffer) + len(self.below_threshold) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, records: Iterable[Optional[PaperRecord]]) -> None:
+        for record in records:
+            self.add(record)
+
+    def discard(self) -> None:
+        """Drop everything buffered, e.g. the partial batch of a source that failed"""
+        self.buffer = []
+        self.below_threshold = []
+
+    def flush(self) -> None:
+        """Write and commit everything buffered so far"""
+        if not self.buffer and not self.below_threshold:
+            return
+
+        # A batch that errors out is dropped rather than retried on the next flush
+        batch, self.buffer = self.buffer, []
+        held, self.below_threshold = self.below_threshold, []
+        cursor = self.db.cursor()
+        try:
+            updates = self.admission.stored(cursor, held) if held else []
+            rejected = len(held) - len(updates)
+            batch += updates
+            inserted, updated, failures = upsert_papers(cursor, batch, self.batch_size)
+            if failures:
+                log_failed_writes(cursor, failures, {record.paper_id: record.source for record in batch})
+            assign_slugs(cursor, (record.publication_month_day for record in batch))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        self.inserted += inserted
+        self.updated += updated
+        self.failed += len(failures)
+        self.rejected += rejected
+        self.touched.update(record.publication_month_day for record in batch)
+        if failures:
+            print(f"\n  ⚠️  {len(failures)} papers failed to write (logged to failed_fetches), "
+                  f"e.g. {failures[0][0]}: {failures[0][1].splitlines()[0]}")
+
+        self.flushes += 1
+        if self.flushes % RETENTION_CONFIG['threshold_refresh_batches'] == 0:
+            self.refresh_thresholds()
+
+    def close(self) -> None:
+        """Flush, then refresh the thresholds of the days written to since the last refresh"""
+        self.flush()
+        self.refresh_thresholds()
+
+    def refresh_thresholds(self) -> None:
+        """Recompute the admission thresholds of every day written to, in one statement"""
+        if self.admission is None or not self.touched:
+            return
+
+        cursor = self.db.cursor()
+        try:
+            self.admission.refresh(cursor, self.touched)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            cursor.close()
+        self.touched = set()
+
+
+# ============================================
+# Schema
+# ============================================
+
+def table_columns(cursor, table: str = 'papers') -> Set[str]:
+    """Columns a table has, for code that must run before later migrations are applied"""
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = %s",
+        (table,)
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def published_filter(columns: Set[str]) -> str:
+    """
+    WHERE clause for the rows the annual trim ranks and generate_json.py publishes:
+    canonical papers, with only each day's top PLACEHOLDER_CONFIG['cap_per_day'] of the
+    ones flagged date_placeholder. Each part is left out while its migration
+    (006_merged_into, 009_placeholder_dates) isn't applied.
+    """
+    canonical = "merged_into IS NULL" if 'merged_into' in columns else "TRUE"
+    if 'date_placeholder' not in columns:
+        return canonical
+    return f"""
+    {canonical}
+    AND (NOT date_placeholder OR paper_id IN (
+        SELECT paper_id FROM (
+            SELECT paper_id, ROW_NUMBER() OVER (
+                PARTITION BY publication_month_day ORDER BY citation_count DESC, paper_id
+            ) AS day_rank
+            FROM papers
+            WHERE date_placeholder AND {canonical}
+        ) ranked
+        WHERE day_rank <= {int(PLACEHOLDER_CONFIG['cap_per_day'])}
+    ))
+"""
+
+
+# ============================================
+# Source Metadata
+# ============================================
+
+def get_last_incremental_update(db_connection, source: str) -> Optional[datetime]:
+    """Watermark of the last successful incremental run for a source (None if never run)"""
+    cursor = db_connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT last_incremental_update FROM source_metadata WHERE source = %s",
+            (source,)
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+    finally:
+        cursor.close()
+
+
+def record_incremental_update(db_connection, source: str, display_name: str, watermark: datetime) -> None:
+    """Advance a source's watermark and refresh its paper count"""
+    cursor = db_connection.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO source_metadata (
+                source, display_name, last_incremental_update, total_papers, status, priority
+            ) VALUES (
+                %(source)s, %(display_name)s, %(watermark)s,
+                (SELECT COUNT(*) FROM papers WHERE source = %(source)s),
+                'active', %(priority)s
+            )
+            ON CONFLICT (source) DO UPDATE SET
+                last_incremental_update = GREATEST(
+                    source_metadata.last_incremental_update, EXCLUDED.last_incremental_update
+                ),
+                total_papers = EXCLUDED.total_papers,
+                status = 'active',
+                updated_at = NOW()
+        """, {
+            'source': source,
+            'display_name': display_name,
+            'watermark': watermark,
+            'priority': SOURCE_PRIORITY.get(source),
+        })
+        db_connection.commit()
+    finally:
+        cursor.close()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Paper Birthdays - Multi-Source Merge
+Merges the duplicate clusters found by deduplicate.py ('merged' rows of deduplication_log).
+
+For each cluster the best record (SOURCE_PRIORITY, then citations) becomes canonical and
+every field takes its value from the source FIELD_PRIORITY trusts for it. The winning
+values for a whole batch of clusters are computed in one set-based SQL statement; the
+canonical row is overwritten with them and the other members get merged_into set.
+is_open_access is TRUE when any member's is. A duplicate's DOI moves to merged_doi
+(database/migrations/010_merged_doi.sql) since only one row can hold it.
+
+Usage:
+    python scripts/merge_duplicates.py          # Clusters with unmerged log entries
+    python scripts/merge_duplicates.py --full   # Re-merge every cluster
+"""
+
+import os
+import sys
+import time
+import argparse
+import psycopg2
+from typing import Dict, List, Tuple
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+from config import FIELD_PRIORITY, SOURCE_PRIORITY
+from ingestion_engine import assign_slugs
+
+load_dotenv()
+
+# Clusters merged per transaction
+BATCH_CLUSTERS = 5000
+
+# Columns that must come from the same record as the FIELD_PRIORITY column they depend on
+DERIVED_COLUMNS = {
+    'fields_of_study': ['field', 'subfield'],
+    'publication_date': ['publication_month_day', 'year'],
+}
+
+# Flags that are TRUE for the cluster when any member's is. They're NOT NULL, so a
+# trusted source's FALSE would otherwise always win over another source's TRUE.
+ANY_COLUMNS = ['is_open_access']
+
+# Columns with no trusted source: keep the canonical value, fill gaps from the others
+FILL_COLUMNS = {
+    'authors': ['author_count'],
+    'arxiv_id': [],
+    'pubmed_id': [],
+    'openalex_id': [],
+}
+
+
+# ============================================
+# Clusters
+# ============================================
+
+class UnionFind:
+    """Connected components over paper_ids"""
+
+    def __init__(self):
+        self.parent: Dict[str, str] = {}
+
+    def find(self, x: str) -> str:
+        root = x
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while x != root:
+            self.parent[x], x = root, self.parent.get(x, x)
+        return root
+
+    def union(self, a: str, b: str) -> None:
+        self.parent.setdefault(a, a)
+        self.parent.setdefault(b, b)
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[rb] = ra
+
+
+def load_clusters(db_connection, full: bool) -> List[List[str]]:
+    """Group 'merged' log pairs into clusters, keeping those with pending pairs unless full"""
+    uf = UnionFind()
+    pending = set()
+
+    cursor = db_connection.cursor(name='merge_pairs')
+    cursor.itersize = 50000
+    cursor.execute("""
+        SELECT primary_paper_id, duplicate_paper_id, merged_at IS NULL
+        FROM deduplication_log
+        WHERE action = 'merged'
+    """)
+    for primary, duplicate, is_pending in cursor:
+        uf.union(primary, duplicate)
+        if is_pending or full:
+            pending.add(primary)
+    cursor.close()
+
+    clusters: Dict[str, List[str]] = {}
+    for paper_id in list(uf.parent):
+        clusters.setdefault(uf.find(paper_id), []).append(paper_id)
+
+    pending_roots = {uf.find(p) for p in pending}
+    return [members for root, members in clusters.items() if root in pending_roots]
+
+
+# ============================================
+# Set-Based Merge SQL
+# ============================================
+
+def source_rank_values() -> str:
+    return ', '.join(f"('{source}', {rank})" for source, rank in SOURCE_PRIORITY.items())
+
+
+def donor_expression(column: str, trusted_source: str = None) -> str:
+    """paper_id of the member whose value wins for this column"""
+    order = ["m.is_canonical DESC", "m.source_rank", "m.paper_id"]
+    if trusted_source:
+        order.insert(0, f"(m.source = '{trusted_source}') DESC")
+    return (f"(ARRAY_AGG(m.paper_id ORDER BY {', '.join(order)}) "
+            f"FILTER (WHERE m.{column} IS NOT NULL))[1] AS {column}_from")
+
+
+def build_merge_sql() -> Tuple[str, List[str]]:
+    """Single statement computing the merged values of every cluster in merge_batch"""
+    groups = [(column, source) for column, source in FIELD_PRIORITY.items() if column not in ANY_COLUMNS]
+    groups += [(column, None) for column in FILL_COLUMNS]
+
+    donors = [donor_expression(column, source) for column, source in groups]
+    donors += [f"BOOL_OR(m.{column}) AS {column}" for column in ANY_COLUMNS]
+    joins, selects, columns = [], [], []
+    for i, (column, _) in enumerate(groups):
+        alias = f"d{i}"
+        joins.append(f"LEFT JOIN papers {alias} ON {alias}.paper_id = donors.{column}_from")
+        for target in [column] + DERIVED_COLUMNS.get(column, []) + FILL_COLUMNS.get(column, []):
+            selects.append(f"COALESCE({alias}.{target}, c.{target}) AS {target}")
+            columns.append(target)
+    for column in ANY_COLUMNS:
+        selects.append(f"COALESCE(donors.{column}, c.{column}) AS {column}")
+        columns.append(column)
+
+    sql = f"""
+        CREATE TEMP TABLE merge_values ON COMMIT DROP AS
+        WITH members AS (
+            SELECT p.*, b.canonical_id,
+                   p.paper_id = b.canonical_id AS is_canonical,
+                   COALESCE(sp.rank, 999) AS source_rank
+            FROM merge_batch b
+            JOIN papers p ON p.paper_id = b.paper_id
+            LEFT JOIN (VALUES {source_rank_values()}) AS sp(source, rank) ON sp.source = p.source
+        ),
+        donors AS (
+            SELECT m.canonical_id,
+                   {(',' + chr(10) + '                   ').join(donors)}
+            FROM members m
+            GROUP BY m.canonical_id
+        )
+        SELECT donors.canonical_id,
+               {(',' + chr(10) + '               ').join(selects)}
+        FROM donors
+        JOIN papers c ON c.paper_id = donors.canonical_id
+        {(chr(10) + '        ').join(joins)}
+    """
+    return sql, columns
+
+
+def merge_batch(db_connection, clusters: List[Tuple[str, List[str]]], merge_sql: str, columns: List[str]) -> None:
+    """Merge one batch of (canonical_id, members) clusters in a single transaction"""
+    cursor = db_connection.cursor()
+
+    execute_values(cursor, "INSERT INTO merge_batch (paper_id, canonical_id) VALUES %s", [
+        (member, canonical) for canonical, members in clusters for member in members
+    ], page_size=5000)
+
+    # Winning values are materialized first: the DOI may come from a duplicate whose copy
+    # has to be cleared before the canonical row takes it (unique index on doi)
+    cursor.execute(merge_sql)
+
+    cursor.execute("""
+        UPDATE papers p
+        SET merged_into = b.canonical_id, merged_doi = COALESCE(p.doi, p.merged_doi), doi = NULL,
+            updated_at = NOW()
+        FROM merge_batch b
+        WHERE p.paper_id = b.paper_id AND b.paper_id != b.canonical_id
+    """)
+
+    assignments = ', '.join(f"{column} = v.{column}" for column in columns)
+    if 'publication_month_day' in columns:
+        # A canonical row that moves to another day gives up its slug and gets one there
+        assignments += (", slug = CASE WHEN v.publication_month_day = p.publication_month_day"
+                        " THEN p.slug END")
+    cursor.execute(f"""
+        UPDATE papers p
+        SET {assignments}, merged_into = NULL, updated_at = NOW()
+        FROM merge_values v
+        WHERE p.paper_id = v.canonical_id
+        RETURNING p.publication_month_day
+    """)
+    assign_slugs(cursor, (month_day for (month_day,) in cursor.fetchall()))
+
+    cursor.execute("""
+        UPDATE deduplication_log l
+        SET merged_at = NOW()
+        FROM merge_batch b
+        WHERE l.duplicate_paper_id = b.paper_id AND l.action = 'merged' AND l.merged_at IS NULL
+    """)
+
+    db_connection.commit()
+    cursor.close()
+
+
+def choose_canonicals(db_connection, clusters: List[List[str]]) -> List[Tuple[str, List[str]]]:
+    """Best SOURCE_PRIORITY, then most citations, becomes each cluster's canonical record"""
+    cursor = db_connection.cursor()
+    cursor.execute("""
+        SELECT paper_id, source, COALESCE(citation_count, 0)
+        FROM papers
+        WHERE paper_id = ANY(%s)
+    """, ([p for members in clusters for p in members],))
+    ranks = {
+        paper_id: (SOURCE_PRIORITY.get(source, 999), -citations, paper_id)
+        for paper_id, source, citations in cursor.fetchall()
+    }
+    cursor.close()
+
+    resolved = []
+    for members in clusters:
+        members = [p for p in members if p in ranks]  # Drop papers deleted since dedup ran
+        if len(members) > 1:
+            resolved.append((min(members, key=ranks.get), members))
+    return resolved
+
+
+# ============================================
+# Main
+# ============================================
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Merge duplicate paper clusters')
+    parser.add_argument('--full', action='store_true', help='Re-merge every cluster, not just pending ones')
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("ERROR: DATABASE_URL not set")
+        sys.exit(1)
+
+    try:
+        db = psycopg2.connect(database_url)
+        print("✓ Connected to database")
+    except Exception as e:
+        print(f"✗ Database connection failed: {e}")
+        sys.exit(1)
+
+    start_time = time.time()
+    clusters = load_clusters(db, args.full)
+    print(f"\n🔗 {len(clusters):,} clusters to merge")
+
+    cursor = db.cursor()
+    cursor.execute("""
+        CREATE TEMP TABLE merge_batch (
+            paper_id VARCHAR(255) PRIMARY KEY,
+            canonical_id VARCHAR(255) NOT NULL
+        ) ON COMMIT DELETE ROWS
+    """)
+    db.commit()
+    cursor.close()
+
+    merge_sql, columns = build_merge_sql()
+    merged = failed = duplicates = 0
+
+    for i in range(0, len(clusters), BATCH_CLUSTERS):
+        batch = choose_canonicals(db, clusters[i:i + BATCH_CLUSTERS])
+        try:
+            merge_batch(db, batch, merge_sql, columns)
+            merged += len(batch)
+            duplicates += sum(len(members) - 1 for _, members in batch)
+        except psycopg2.Error as e:
+            db.rollback()
+            failed += len(batch)
+            print(f"\n  ⚠️  Batch {i // BATCH_CLUSTERS + 1} failed: {e}")
+        print(f"   Merged: {merged:,} clusters ({duplicates:,} duplicates)", end='\r')
+
+    db.close()
+
+    print("\n" + "=" * 70)
+    print(f"✓ COMPLETE! Merged {merged:,} clusters in {int(time.time() - start_time)}s")
+    print(f"  Duplicates pointed at canonical records: {duplicates:,}")
+    if failed:
+        print(f"  ⚠️  Clusters in failed batches (retried next run): {failed:,}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
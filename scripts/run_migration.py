@@ -1,20 +1,20 @@
 #!/usr/bin/env python3
-"""Run database migration for subscriptions table"""
+"""Run a database migration (defaults to the subscriptions table)"""
 
 import os
+import sys
 import psycopg2
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def run_migration():
-    """Run the subscriptions table migration"""
+def run_migration(migration_file='database/migrations/002_create_subscriptions_table.sql'):
+    """Run a migration file (the subscriptions table migration by default)"""
     database_url = os.getenv('DATABASE_URL')
     if not database_url:
         raise ValueError("DATABASE_URL environment variable not set")
 
     # Read migration SQL
-    migration_file = 'database/migrations/002_create_subscriptions_table.sql'
     with open(migration_file, 'r') as f:
         sql = f.read()
 
@@ -29,6 +29,11 @@ def run_migration():
 
     print("✓ Migration completed successfully!")
 
+    if 'subscriptions' not in migration_file:
+        cursor.close()
+        conn.close()
+        return
+
     # Verify table exists
     cursor.execute("""
         SELECT table_name FROM information_schema.tables
@@ -55,7 +60,10 @@ def run_migration():
 
 if __name__ == '__main__':
     try:
-        run_migration()
+        if len(sys.argv) > 1:
+            run_migration(sys.argv[1])
+        else:
+            run_migration()
     except Exception as e:
         print(f"Error running migration: {e}")
         import traceback
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Test the arXiv OAI-PMH harvester against a local OAI stand-in (no network or database needed)"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from ingest_arxiv import harvest, record_from_arxiv, category_matches, oai_set_for, oai_sets
+from ingestion_engine import get_normalizer
+
+RECORD = """
+<record>
+  <header{status}><identifier>oai:arXiv.org:{id}</identifier><datestamp>2024-05-0{n}</datestamp></header>
+  <metadata>
+    <arXiv xmlns="http://arxiv.org/OAI/arXiv/">
+      <id>{id}</id><created>2024-05-0{n}</created>
+      <authors><author><keyname>Doe</keyname><forenames>Jane</forenames></author></authors>
+      <title>Paper
+        number {n}</title>
+      <categories>cs.LG stat.ML</categories>
+      <abstract>  Abstract {n}.  </abstract>
+    </arXiv>
+  </metadata>
+</record>"""
+
+PAGE = """<?xml version="1.0" encoding="UTF-8"?>
+<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">
+  <responseDate>2024-05-10T00:00:00Z</responseDate>
+  <ListRecords>{records}{token}</ListRecords>
+</OAI-PMH>"""
+
+# Page 1 ends with a resumptionToken, page 2 ends with an empty one (list complete)
+PAGES = {
+    None: PAGE.format(
+        records=RECORD.format(id='2405.00001', n=1, status='') + RECORD.format(id='2405.00002', n=2, status=' status="deleted"'),
+        token='<resumptionToken completeListSize="3" cursor="0">token-1</resumptionToken>'),
+    'token-1': PAGE.format(
+        records=RECORD.format(id='2405.00003', n=3, status=''),
+        token='<resumptionToken completeListSize="3" cursor="2"/>'),
+}
+
+requests_seen = []
+
+
+class StandIn(BaseHTTPRequestHandler):
+    def do_GET(self):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        requests_seen.append(params)
+        body = PAGES[params.get('resumptionToken')].encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+server = HTTPServer(('127.0.0.1', 0), StandIn)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+oai_base = f"http://127.0.0.1:{server.server_port}/oai2"
+
+print(f"Harvesting from local stand-in at {oai_base}...")
+entries = list(harvest(oai_base, 'cs', from_date='2024-05-01', delay=0))
+server.shutdown()
+
+# Resumption token was followed and the incremental `from` was sent on the first request only
+assert len(requests_seen) == 2, requests_seen
+assert requests_seen[0] == {'verb': 'ListRecords', 'metadataPrefix': 'arXiv', 'set': 'cs', 'from': '2024-05-01'}
+assert requests_seen[1] == {'verb': 'ListRecords', 'resumptionToken': 'token-1'}
+print("✓ Followed resumptionToken")
+
+# Deleted records are skipped, whitespace is normalized
+assert [e['arxiv_id'] for e in entries] == ['2405.00001', '2405.00003'], entries
+assert entries[0]['title'] == 'Paper number 1'
+assert entries[0]['abstract'] == 'Abstract 1.'
+assert entries[0]['authors'] == ['Jane Doe']
+print(f"✓ Parsed {len(entries)} records (deleted record skipped)")
+
+record = record_from_arxiv(entries[0], get_normalizer())
+assert record.paper_id == 'arxiv:2405.00001'
+assert record.publication_month_day == '05-01' and record.year == 2024
+assert record.field == 'Computer Science'
+assert record.pdf_url.endswith('/2405.00001')
+print(f"✓ Record: {record.paper_id} {record.publication_date} {record.field}")
+
+assert category_matches(['cs.LG'], ['cs.AI', 'cs.LG'])
+assert not category_matches(['cs.CV'], ['cs.AI', 'cs.LG'])
+assert category_matches(['astro-ph.GA'], ['astro-ph'])
+assert oai_set_for('hep-th') == 'physics:hep-th' and oai_set_for('cs.AI') == 'cs'
+assert oai_sets(['physics', 'hep-th', 'astro-ph.GA', 'cs.AI']) == ['cs', 'physics']
+assert oai_sets(['hep-th', 'astro-ph']) == ['physics:astro-ph', 'physics:hep-th']
+print("✓ Category and set mapping")
+
+print("\nAll arXiv harvester checks passed")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Round-trip the columnar date format against the regular one (no database needed)"""
+
+import json
+import random
+
+from generate_json import encode_columnar, decode_columnar, row_to_paper
+
+rng = random.Random(7)
+FIELDS = [['Computer Science'], ['Medicine'], ['Physics'], ['Biology'], None]
+VENUES = ['Nature', 'Science', 'Physical Review Letters', None]
+
+
+def make_row(i):
+    kind = i % 5
+    if kind == 4:
+        # Bulk rows: corpusid as the id, but the URL carries the paper's sha
+        paper_id = str(rng.randint(10**6, 3 * 10**8))
+        url = f"https://www.semanticscholar.org/paper/{rng.getrandbits(160):040x}"
+    elif kind == 0:
+        paper_id = f"{rng.getrandbits(160):040x}"
+        url = f"https://www.semanticscholar.org/paper/{paper_id}"
+    elif kind == 1:
+        paper_id = f"W{rng.randint(10**8, 10**10)}"
+        url = f"https://openalex.org/{paper_id}"
+    elif kind == 2:
+        paper_id = f"arxiv:24{rng.randint(1, 12):02d}.{rng.randint(1, 99999):05d}"
+        url = f"https://arxiv.org/abs/{paper_id.split(':')[1]}"
+    else:
+        paper_id = f"custom-{i}"
+        url = None if i % 8 == 3 else f"https://doi.org/10.1000/{i}"
+    return (paper_id, f"A study of thing number {i}", rng.randint(1, 30), rng.randint(1950, 2024),
+            rng.randint(10, 50000), rng.choice(FIELDS), rng.choice([None, 'Optics']), rng.choice(VENUES), url)
+
+
+papers = [row_to_paper(make_row(i)) for i in range(1500)]
+papers.sort(key=lambda p: p['citation_count'], reverse=True)
+
+encoded = encode_columnar('01-01', papers)
+decoded = decode_columnar(json.loads(json.dumps(encoded)))
+assert decoded == papers, "round-trip mismatch"
+print(f"✓ Round-trip of {len(papers)} papers matches the regular format")
+
+assert decode_columnar(encode_columnar('02-29', [])) == []
+print("✓ Empty date")
+
+prefixes = encoded['dicts']['url_prefix']
+assert len(prefixes) <= 6, prefixes
+for rest, paper in zip(encoded['columns']['url'], papers):
+    # Only the part after the prefix is stored, and nothing when it is the paper id
+    assert rest is None or (len(rest) < len(paper['url']) and not rest.startswith('http')), paper
+    if paper['id'].isdigit():
+        assert rest == paper['url'].rsplit('/', 1)[1], "bulk URL should keep only its sha"
+assert set(encoded['dicts']['venue']) == {p['venue'] for p in papers}
+print(f"✓ {len(prefixes)} URL prefixes, {len(encoded['dicts']['venue'])} venues / "
+      f"{len(encoded['dicts']['field'])} fields in lookup tables")
+
+regular = {'date': '01-01', 'total_papers': len(papers), 'papers': papers}
+indented = len(json.dumps(regular, indent=2, ensure_ascii=False))
+minified = len(json.dumps(regular, ensure_ascii=False, separators=(',', ':')))
+columnar = len(json.dumps(encoded, ensure_ascii=False, separators=(',', ':')))
+print(f"\nSizes: indented {indented / 1024:.0f} KB, minified {minified / 1024:.0f} KB, "
+      f"columnar {columnar / 1024:.0f} KB ({columnar / indented:.0%} of indented)")
+
+print("\nAll columnar format checks passed")
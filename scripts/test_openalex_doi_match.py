@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""OpenAlex works whose DOI is already stored update that paper (no database needed)"""
+
+import ingestion_engine
+from ingestion_engine import FieldNormalizer, upsert_papers
+from ingest_openalex import record_from_openalex
+
+# paper_id -> stored row, as Semantic Scholar wrote it
+STORED = {
+    '649def34f8be52c8b66281af98ae884c09aef38b': {'doi': '10.1038/nature14539', 'openalex_id': None},
+}
+
+
+class FakeCursor:
+    """Answers the lookups upsert_papers makes against the papers table"""
+
+    def execute(self, sql, params=None):
+        if 'WHERE doi = ANY' in sql:
+            self.rows = [(row['doi'], paper_id) for paper_id, row in STORED.items() if row['doi'] in params[0]]
+        elif 'WHERE paper_id = ANY' in sql:
+            self.rows = [(paper_id,) for paper_id in params[0] if paper_id in STORED]
+        elif 'information_schema.columns' in sql:
+            self.rows = [('arxiv_id',), ('pubmed_id',), ('openalex_id',)]
+
+    def fetchall(self):
+        return self.rows
+
+
+written = []
+
+
+def fake_execute_values(cursor, sql, rows, page_size=100, fetch=False):
+    """Stands in for the INSERT ... ON CONFLICT: records the rows, reports inserted/updated"""
+    written.append((sql, rows))
+    return [(row[0] not in STORED,) for row in rows]
+
+
+ingestion_engine.execute_values = fake_execute_values
+
+
+def work(openalex_id, doi, cited_by_count=500):
+    return {
+        'id': f"https://openalex.org/{openalex_id}",
+        'title': 'Deep learning',
+        'publication_date': '2015-05-28',
+        'doi': f"https://doi.org/{doi}" if doi else None,
+        'cited_by_count': cited_by_count,
+        'authorships': [{'author': {'display_name': 'Yann LeCun'}}],
+        'primary_location': {'source': {'display_name': 'Nature'}},
+        'open_access': {'is_oa': False},
+        'ids': {},
+    }
+
+
+normalizer = FieldNormalizer()
+records = [
+    record_from_openalex(work('W1919803322', '10.1038/nature14539'), normalizer),
+    record_from_openalex(work('W2000000001', '10.1000/new-paper'), normalizer),
+]
+
+inserted, updated, failures = upsert_papers(FakeCursor(), records)
+sql, rows = written[-1]
+columns = sql[sql.index('(') + 1:sql.index(')')].split(', ')
+by_id = {row[0]: dict(zip(columns, row)) for row in rows}
+
+assert (inserted, updated, failures) == (1, 1, []), (inserted, updated, failures)
+assert '649def34f8be52c8b66281af98ae884c09aef38b' in by_id, "existing DOI should update the stored paper"
+assert by_id['649def34f8be52c8b66281af98ae884c09aef38b']['openalex_id'] == 'W1919803322'
+assert 'W1919803322' not in by_id
+print("✓ Work with a stored DOI updates the Semantic Scholar row and carries its openalex_id")
+
+assert 'openalex_id = COALESCE(papers.openalex_id, EXCLUDED.openalex_id)' in sql
+assert 'GREATEST(EXCLUDED.citation_count, papers.citation_count)' in sql
+print("✓ openalex_id fills the stored row's gap; citations from another source never go down")
+
+assert by_id['W2000000001']['source'] == 'openalex'
+print("✓ Work with a new DOI is inserted under its OpenAlex id")
+
+print("\nAll OpenAlex DOI matching checks passed")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""PubMed articles take their field from MeSH headings or the journal title (no network or database needed)"""
+
+import io
+
+from ingest_pubmed import iter_pubmed_file, record_from_pubmed
+from ingestion_engine import FieldNormalizer
+
+ARTICLE = """
+<PubmedArticle>
+  <MedlineCitation>
+    <PMID>{pmid}</PMID>
+    <Article>
+      <Journal>
+        <JournalIssue><PubDate><Year>2020</Year><Month>Mar</Month><Day>14</Day></PubDate></JournalIssue>
+        <Title>{journal}</Title>
+      </Journal>
+      <ArticleTitle>Article {pmid}</ArticleTitle>
+    </Article>
+    <MeshHeadingList>{mesh}</MeshHeadingList>
+  </MedlineCitation>
+</PubmedArticle>"""
+
+HEADING = '<MeshHeading><DescriptorName MajorTopicYN="{major}">{name}</DescriptorName>{qualifier}</MeshHeading>'
+
+
+def heading(name, major='N', qualifier_major=None):
+    qualifier = f'<QualifierName MajorTopicYN="{qualifier_major}">methods</QualifierName>' if qualifier_major else ''
+    return HEADING.format(name=name, major=major, qualifier=qualifier)
+
+
+XML = '<PubmedArticleSet>' + ''.join([
+    # Major topic wins over the journal title
+    ARTICLE.format(pmid=1, journal='Journal of Medicinal Chemistry',
+                   mesh=heading('Humans') + heading('Machine Learning', qualifier_major='Y')),
+    # No recognizable heading: the journal title decides
+    ARTICLE.format(pmid=2, journal='The New England journal of medicine',
+                   mesh=heading('Humans') + heading('Neoplasms', major='Y')),
+    # Neither: left to the normalizer, which says Other
+    ARTICLE.format(pmid=3, journal='Cell', mesh=heading('Humans')),
+]) + '</PubmedArticleSet>'
+
+normalizer = FieldNormalizer()
+records = {
+    record.pubmed_id: record
+    for kind, entry in iter_pubmed_file(io.BytesIO(XML.encode()))
+    for record in [record_from_pubmed(entry, normalizer)]
+}
+
+assert records['1'].field == 'Computer Science', records['1'].field
+assert records['1'].fields_of_study[0] == 'Machine Learning'
+print("✓ Major MeSH topic (major through its qualifier) decides the field")
+
+assert records['2'].field == 'Medicine', records['2'].field
+assert records['2'].fields_of_study == ['The New England journal of medicine', 'Neoplasms', 'Humans']
+print("✓ Journal title decides when no heading maps to a field")
+
+assert records['3'].field == 'Other', records['3'].field
+assert records['3'].fields_of_study == ['Humans']
+print("✓ Articles with nothing recognizable are not assumed to be Medicine")
+
+print("\nAll PubMed field checks passed")
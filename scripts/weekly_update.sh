@@ -79,10 +79,21 @@ print(f'Total papers in database: {total:,}')
 db.close()
 "
 
+# Flag month-only dates piled onto the 1st before the date files are built
+echo ""
+echo "📅 Flagging placeholder dates..."
+python scripts/flag_placeholder_dates.py
+
 # Regenerate JSON files
 echo ""
 echo "📝 Regenerating JSON files..."
-python scripts/generate_json.py all
+# --search-index: the static title search that PaperSearchSubscribe queries first
+python scripts/generate_json.py all --search-index
+
+# Refresh the sitemap shards for the new papers
+echo ""
+echo "🗺️  Updating sitemaps..."
+python scripts/generate_sitemaps.py
 
 echo ""
 echo "======================================"
@@ -9,6 +9,7 @@ export interface Paper {
   venue: string;
   url: string;
   publication_month_day?: string; // Optional: MM-DD format for subscription feature
+  slug?: string; // papers.slug; only set on papers read from the database
 }
 
 export interface DailyPapers {
@@ -17,3 +18,46 @@ export interface DailyPapers {
   papers: Paper[];
   last_updated?: string;
 }
+
+// Walker alias table (public/data/sampling/MM-DD.json)
+export interface AliasTable {
+  prob: number[]; // Out of prob_scale
+  alias: number[];
+  positions?: number[]; // Per-field tables: date positions the entries refer to
+}
+
+export interface SamplingTable extends AliasTable {
+  date: string; // MM-DD
+  total_papers: number;
+  weight: { citation_exponent: number; age_half_life: number | null };
+  prob_scale: number;
+  fields?: Record<string, AliasTable>;
+}
+
+// public/data/twins/YYYY/MM-DD.json: papers published on one full date
+export interface BirthdayTwins {
+  date: string; // YYYY-MM-DD
+  total_papers: number;
+  top: Paper[];
+  last_updated?: string;
+}
+
+// public/data/MM-DD/facets.json: filter histograms over the citation-sorted page files
+export interface FacetBucket<K> {
+  bucket: K; // decade start, citation lower bound (0, 1, 10, 100, ...), field, or min authors
+  count: number;
+  pages: [number, number][]; // [page number, papers from this bucket on that page]
+  start?: number; // Citation buckets only: [start, end) positions in the date
+  end?: number;
+}
+
+export interface DateFacets {
+  date: string; // MM-DD
+  total_papers: number;
+  page_size: number;
+  decade: FacetBucket<number | null>[];
+  citations: FacetBucket<number>[];
+  field: FacetBucket<string>[];
+  authors: FacetBucket<number>[];
+  last_updated?: string;
+}